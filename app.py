@@ -5,6 +5,7 @@ Starten mit: streamlit run app.py
 
 import os
 import sys
+import time
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -27,8 +28,13 @@ except Exception:
 
 sys.path.insert(0, str(PROJECT_ROOT / "tools"))
 
-from research_guest import run_research, disambiguate_guest, slugify
-from create_dossier import create_dossier
+from research_guest import disambiguate_guest
+from guest_registry import remember_choice
+from create_dossier import ThrottledPreview, regenerate_section
+from dossier_sections import SECTION_IDS, SECTION_LABELS
+import archive_index
+import clients
+import jobs
 
 # --- Page Config ---
 st.set_page_config(
@@ -38,6 +44,14 @@ st.set_page_config(
     initial_sidebar_state="collapsed",
 )
 
+# --- API-Clients einmal pro Prozess anlegen (Keep-Alive über alle Reruns) ---
+@st.cache_resource(show_spinner=False)
+def warm_up_clients() -> list[str]:
+    return clients.warm_up()
+
+
+warm_up_clients()
+
 # --- Styles aus styles.css laden + Streamlit-spezifische Overrides ---
 css_path = PROJECT_ROOT / "styles.css"
 base_css = css_path.read_text(encoding="utf-8") if css_path.exists() else ""
@@ -543,24 +557,110 @@ st.markdown("""
 # --- Session State ---
 if "step" not in st.session_state:
     st.session_state.step = "input"
+
+# Laufender Job in der URL (?job=...): Reconnect oder zweiter Tab hängt sich an denselben Job
+if st.session_state.step != "running" and "job" in st.query_params:
+    if jobs.get_job(st.query_params["job"]) is not None:
+        st.session_state.job_id = st.query_params["job"]
+        st.session_state.step = "running"
+    else:
+        del st.query_params["job"]
+
+JOB_POLL_SECONDS = 1.0
+
+
+def leave_job():
+    """Verlässt die Job-Ansicht (der Job selbst läuft ggf. weiter) und startet neu."""
+    st.session_state.pop("job_id", None)
+    if "job" in st.query_params:
+        del st.query_params["job"]
+    st.session_state.step = "input"
+    st.rerun()
+
+
+def step_html(number: int, title: str, done: bool) -> str:
+    """HTML für einen Pipeline-Schritt: aktiv (mit Fortschrittsbalken) oder abgeschlossen."""
+    if done:
+        return f"""
+        <div class="pipeline-step">
+            <div class="pipeline-step-header">
+                <div class="step-number done">✓</div>
+                <span class="step-title">{title}</span>
+            </div>
+        </div>
+        """
+    return f"""
+    <div class="pipeline-step">
+        <div class="pipeline-step-header">
+            <div class="step-number active">{number}</div>
+            <span class="step-title">{title}</span>
+        </div>
+        <div class="active-progress"></div>
+    </div>
+    """
+
 if "session_dossiers" not in st.session_state:
     st.session_state.session_dossiers = {}  # {guest: {"content": str, "filename": str}}
 if "session_research" not in st.session_state:
     st.session_state.session_research = {}  # {guest: {"content": str, "filename": str}}
 
 # --- Sidebar ---
+SIDEBAR_PAGE_SIZE = 15
+
+
+def archive_list(kind: str, icon: str, view_key: str, filter_text: str) -> bool:
+    """Eine Seite des Archiv-Index (neueste zuerst) mit Blätter-Buttons. True, wenn Einträge gezeigt wurden."""
+    page_key = f"sidebar_page_{kind}"
+    # Neuer Filter → zurück auf Seite 1
+    if st.session_state.get(f"{page_key}_filter") != filter_text:
+        st.session_state[page_key] = 0
+        st.session_state[f"{page_key}_filter"] = filter_text
+    total = archive_index.count(kind, filter_text)
+    pages = max(1, -(-total // SIDEBAR_PAGE_SIZE))
+    page = min(st.session_state.get(page_key, 0), pages - 1)
+
+    for entry in archive_index.query(kind, filter_text, limit=SIDEBAR_PAGE_SIZE, offset=page * SIDEBAR_PAGE_SIZE):
+        path = entry["path"]
+        if st.button(f"{icon} {path.stem}", key=f"sidebar_{kind}_{path.name}", use_container_width=True):
+            st.session_state[view_key] = path
+
+    if pages > 1:
+        col_prev, col_info, col_next = st.columns([1, 2, 1])
+        with col_prev:
+            if st.button("‹", key=f"{page_key}_prev", disabled=page == 0):
+                st.session_state[page_key] = page - 1
+                st.rerun()
+        with col_info:
+            st.caption(f"Seite {page + 1}/{pages} · {total}")
+        with col_next:
+            if st.button("›", key=f"{page_key}_next", disabled=page >= pages - 1):
+                st.session_state[page_key] = page + 1
+                st.rerun()
+    return total > 0
+
+
 with st.sidebar:
-    st.markdown("## Bisherige Dossiers")
-    dossier_dir = PROJECT_ROOT / "dossiers"
-    shown_dossiers = False
+    # Index einmalig aus dem bestehenden Archiv anlegen, danach pflegt ihn die Pipeline
+    archive_index.ensure_index()
+
+    st.markdown("## Archiv durchsuchen")
+    search_text = st.text_input("Volltextsuche", placeholder="z.B. Hamburger Musikszene", label_visibility="collapsed")
+    if search_text.strip():
+        hits = archive_index.search(search_text, limit=10)
+        for hit in hits:
+            icon, view_key = ("📄", "view_dossier") if hit["kind"] == "dossier" else ("🔍", "view_research")
+            if st.button(f"{icon} {hit['guest']} · {hit['date']}", key=f"search_{hit['path'].name}", use_container_width=True):
+                st.session_state[view_key] = hit["path"]
+            st.caption(" ".join(hit["snippet"].split()))
+        if not hits:
+            st.caption("Keine Treffer.")
+        st.divider()
+
+    filter_text = st.text_input("Archiv filtern", placeholder="Gast oder Datum", label_visibility="collapsed")
 
+    st.markdown("## Bisherige Dossiers")
     # Datei-basiert (lokal/persistent)
-    if dossier_dir.exists():
-        file_dossiers = sorted(dossier_dir.glob("*.md"), key=lambda f: f.stat().st_mtime, reverse=True)
-        for d in file_dossiers:
-            if st.button(f"📄 {d.stem}", key=f"sidebar_{d.name}", use_container_width=True):
-                st.session_state["view_dossier"] = d
-            shown_dossiers = True
+    shown_dossiers = archive_list("dossier", "📄", "view_dossier", filter_text)
 
     # Session-basiert (Cloud-kompatibel)
     for g, data in st.session_state.session_dossiers.items():
@@ -575,19 +675,8 @@ with st.sidebar:
 
     st.divider()
     st.markdown("## Research-Daten")
-    tmp_dir = PROJECT_ROOT / ".tmp"
-    shown_research = False
-
     # Datei-basiert (lokal/persistent)
-    if tmp_dir.exists():
-        research_files = sorted(
-            [f for f in tmp_dir.glob("*_research.md") if "_raw" not in f.name],
-            key=lambda f: f.stat().st_mtime, reverse=True,
-        )
-        for r in research_files:
-            if st.button(f"🔍 {r.stem}", key=f"sidebar_r_{r.name}", use_container_width=True):
-                st.session_state["view_research"] = r
-            shown_research = True
+    shown_research = archive_list("research", "🔍", "view_research", filter_text)
 
     # Session-basiert (Cloud-kompatibel)
     for g, data in st.session_state.session_research.items():
@@ -645,13 +734,18 @@ if st.session_state.step == "input":
     with col_btn:
         st.markdown('<div style="height: 1.65rem;"></div>', unsafe_allow_html=True)
         check_button = st.button("Person prüfen", type="primary", use_container_width=True)
+    refresh_identity = st.checkbox(
+        "Identität neu prüfen",
+        value=False,
+        help="Bekannte Gäste werden aus der Registry erkannt. Aktivieren, um erneut zu suchen.",
+    )
 
     if check_button and not guest_name:
         st.warning("Bitte einen Gastnamen eingeben.")
     elif check_button and guest_name:
         with st.spinner("Identität wird geprüft..."):
             try:
-                candidates, is_ambiguous = disambiguate_guest(guest_name)
+                candidates, is_ambiguous = disambiguate_guest(guest_name, refresh=refresh_identity)
                 st.session_state.candidates = candidates
                 st.session_state.is_ambiguous = is_ambiguous
                 st.session_state.guest_input_name = guest_name
@@ -681,11 +775,12 @@ elif st.session_state.step == "disambiguate":
     for i, c in enumerate(st.session_state.candidates):
         st.markdown(f"""
         <div class="disambig-card">
-            <h4>{c['name']}</h4>
+            <h4>{c['name']}{' · zuletzt gewählt' if c.get('chosen') else ''}</h4>
             <p>{c['description']}</p>
         </div>
         """, unsafe_allow_html=True)
         if st.button(f"Auswählen: {c['name']}", key=f"select_{i}", use_container_width=True):
+            remember_choice(st.session_state.guest_input_name, c)
             st.session_state.selected_guest = c["name"]
             st.session_state.context_hint = c.get("context_hint", "")
             st.session_state.step = "confirm"
@@ -711,9 +806,18 @@ elif st.session_state.step == "confirm":
     </div>
     """, unsafe_allow_html=True)
 
+    refresh = st.checkbox(
+        "Frisch recherchieren (Cache ignorieren)",
+        value=False,
+        help="Standardmäßig werden Research-Ergebnisse der letzten Tage wiederverwendet.",
+    )
+
     col1, col2, col3 = st.columns([1, 1, 2])
     with col1:
         if st.button("Dossier erstellen", type="primary", use_container_width=True):
+            job = jobs.submit(guest, hint, refresh=refresh, candidates=st.session_state.get("candidates"))
+            st.session_state.job_id = job["job_id"]
+            st.query_params["job"] = job["job_id"]
             st.session_state.step = "running"
             st.rerun()
     with col2:
@@ -723,11 +827,18 @@ elif st.session_state.step == "confirm":
 
 
 # ============================================================
-# SCHRITT 3: Pipeline läuft
+# SCHRITT 3: Pipeline läuft (Hintergrund-Job, die UI fragt nur den Zustand ab)
 # ============================================================
 elif st.session_state.step == "running":
-    guest = st.session_state.selected_guest
-    hint = st.session_state.get("context_hint", "")
+    job = jobs.get_job(st.session_state.job_id)
+    if job is None:
+        st.error("Job nicht gefunden.")
+        if st.button("↩ Zurück"):
+            leave_job()
+        st.stop()
+
+    guest = job["guest"]
+    hint = job["context_hint"]
 
     st.markdown(f"""
     <div class="identity-card">
@@ -737,39 +848,19 @@ elif st.session_state.step == "running":
     """, unsafe_allow_html=True)
 
     # --- Schritt 1: Research ---
-    step1_status = st.empty()
-    step1_status.markdown("""
-    <div class="pipeline-step">
-        <div class="pipeline-step-header">
-            <div class="step-number active">1</div>
-            <span class="step-title">Deep Research</span>
-        </div>
-        <div class="active-progress"></div>
-    </div>
-    """, unsafe_allow_html=True)
-
-    research_status = st.empty()
-    research_status.caption("Perplexity Deep Research + Tavily Echtzeit-Check + Verifikation...")
-
-    try:
-        research_path = run_research(guest, context_hint=hint)
+    research_done = job["research_path"] is not None
+    st.markdown(step_html(1, "Deep Research — abgeschlossen" if research_done else "Deep Research", research_done), unsafe_allow_html=True)
 
+    if not research_done and job["status"] in jobs.ACTIVE_STATUSES:
+        st.caption("Perplexity Deep Research + Tavily Echtzeit-Check...")
+    elif research_done:
+        research_path = Path(job["research_path"])
         # Research in session_state sichern (Cloud-kompatibel)
-        st.session_state.session_research[guest] = {
-            "content": research_path.read_text(encoding="utf-8"),
-            "filename": research_path.name,
-        }
-
-        # Step 1 als erledigt markieren (ersetzt den aktiven Balken komplett)
-        step1_status.markdown("""
-        <div class="pipeline-step">
-            <div class="pipeline-step-header">
-                <div class="step-number done">✓</div>
-                <span class="step-title">Deep Research — abgeschlossen</span>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
-        research_status.empty()
+        if guest not in st.session_state.session_research:
+            st.session_state.session_research[guest] = {
+                "content": research_path.read_text(encoding="utf-8"),
+                "filename": research_path.name,
+            }
 
         with st.expander("Research-Daten anzeigen", expanded=False):
             raw_path = research_path.parent / research_path.name.replace("_research.md", "_research_raw.md")
@@ -781,56 +872,41 @@ elif st.session_state.step == "running":
                     st.markdown(f'<div class="research-data-view">{raw_path.read_text(encoding="utf-8")}</div>', unsafe_allow_html=True)
             else:
                 st.markdown(f'<div class="research-data-view">{research_path.read_text(encoding="utf-8")}</div>', unsafe_allow_html=True)
-    except Exception as e:
-        research_status.empty()
-        st.error(f"Research fehlgeschlagen: {e}")
-        if st.button("↩ Zurück"):
-            st.session_state.step = "input"
-            st.rerun()
-        st.stop()
 
     # --- Schritt 2: Dossier ---
-    step2_status = st.empty()
-    step2_status.markdown("""
-    <div class="pipeline-step">
-        <div class="pipeline-step-header">
-            <div class="step-number active">2</div>
-            <span class="step-title">Dossier wird erstellt</span>
-        </div>
-        <div class="active-progress"></div>
-    </div>
-    """, unsafe_allow_html=True)
-
-    dossier_live = st.empty()
-    dossier_live.caption("Claude schreibt das Dossier...")
-
-    try:
-        # Streaming: Live-Vorschau des Dossiers (mit dossier-result Wrapper für korrektes CSS)
-        def update_preview(content_so_far):
-            dossier_live.markdown(f'<div class="dossier-result">{content_so_far}</div>', unsafe_allow_html=True)
-
-        dossier_path = create_dossier(guest, research_path, on_chunk=update_preview)
-
-        # Step 2 als erledigt (ersetzt den aktiven Balken komplett)
-        step2_status.markdown("""
-        <div class="pipeline-step">
-            <div class="pipeline-step-header">
-                <div class="step-number done">✓</div>
-                <span class="step-title">Dossier — abgeschlossen</span>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
-        dossier_live.empty()
-
-    except Exception as e:
-        dossier_live.empty()
-        st.error(f"Dossier-Erstellung fehlgeschlagen: {e}")
-        if st.button("↩ Zurück"):
-            st.session_state.step = "input"
-            st.rerun()
+    if research_done:
+        dossier_done = job["status"] == "done"
+        st.markdown(step_html(2, "Dossier — abgeschlossen" if dossier_done else "Dossier wird erstellt", dossier_done), unsafe_allow_html=True)
+        if not dossier_done:
+            # Live-Vorschau des Dossiers (mit dossier-result Wrapper für korrektes CSS)
+            preview = jobs.read_preview(job["job_id"])
+            if preview:
+                st.markdown(f'<div class="dossier-result">{preview}</div>', unsafe_allow_html=True)
+            elif job["status"] in jobs.ACTIVE_STATUSES:
+                st.caption("Claude schreibt das Dossier...")
+
+    # --- Fehler ---
+    if job["status"] in ("error", "interrupted"):
+        stage = "Research" if not research_done else "Dossier-Erstellung"
+        st.error(f"{stage} fehlgeschlagen: {job['error']}")
+        col1, col2, col3 = st.columns([1, 1, 2])
+        with col1:
+            # Abgeschlossene Stufen (z.B. Perplexity/Tavily) werden aus den Checkpoints übernommen
+            if st.button("↻ Fortsetzen", type="primary", use_container_width=True):
+                jobs.resume(job["job_id"])
+                st.rerun()
+        with col2:
+            if st.button("↩ Zurück", use_container_width=True):
+                leave_job()
         st.stop()
 
+    # --- Läuft noch: Zustand regelmäßig neu abfragen ---
+    if job["status"] in jobs.ACTIVE_STATUSES:
+        time.sleep(JOB_POLL_SECONDS)
+        st.rerun()
+
     # --- Ergebnis ---
+    dossier_path = Path(job["dossier_path"])
     dossier_content = dossier_path.read_text(encoding="utf-8")
 
     # Dossier in session_state sichern (Cloud-kompatibel)
@@ -862,5 +938,29 @@ elif st.session_state.step == "running":
             )
     with col3:
         if st.button("Neues Dossier", use_container_width=True):
-            st.session_state.step = "input"
-            st.rerun()
+            leave_job()
+
+    # --- Einzelnen Abschnitt neu generieren (nur dieser Abschnitt wird neu geschrieben) ---
+    with st.expander("✏️ Abschnitt neu generieren", expanded=False):
+        anchor = st.selectbox("Abschnitt", SECTION_IDS, format_func=SECTION_LABELS.get, key="regen_anchor")
+        note = st.text_input("Hinweis für die Neufassung (optional)", placeholder="z.B. frecher, weniger Politik", key="regen_note")
+        if st.button("Abschnitt neu schreiben", type="primary"):
+            section_preview = st.empty()
+            preview = ThrottledPreview(
+                lambda text: section_preview.markdown(f'<div class="dossier-result">{text}</div>', unsafe_allow_html=True),
+                max_per_second=4,
+            )
+            try:
+                with st.spinner(f"Claude schreibt {SECTION_LABELS[anchor]} neu..."):
+                    regenerate_section(
+                        guest,
+                        dossier_path,
+                        anchor,
+                        research_path=Path(job["research_path"]),
+                        instructions=note,
+                        on_chunk=preview,
+                    )
+            except Exception as e:
+                st.error(f"Neufassung fehlgeschlagen: {e}")
+            else:
+                st.rerun()
@@ -0,0 +1,53 @@
+"""
+Tests für die Volltextsuche im Archiv-Index.
+
+Ausführen:
+    python -m pytest -q tests
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tools"))
+
+import archive_index  # noqa: E402
+
+
+@pytest.fixture
+def archive(tmp_path, monkeypatch):
+    """Leerer Index samt Archiv-Verzeichnis unter tmp_path statt im Projekt."""
+    monkeypatch.setattr(archive_index, "PROJECT_ROOT", tmp_path)
+    monkeypatch.setattr(archive_index, "INDEX_PATH", tmp_path / ".tmp" / "archive.sqlite")
+    (tmp_path / "dossiers").mkdir()
+    return tmp_path
+
+
+def _dossier(root: Path, slug: str, guest: str, body: str) -> Path:
+    path = root / "dossiers" / f"{slug}_2026-10-18.md"
+    content = f"# Dossier: {guest}\n\n{body}\n"
+    path.write_text(content, encoding="utf-8")
+    archive_index.record(path, "dossier", guest_name=guest, content=content)
+    return path
+
+
+def test_guest_name_match_ranks_above_body_match(archive):
+    # Der Text-Treffer nennt den Begriff öfter – trotzdem muss der Gastname gewinnen
+    body_hit = _dossier(
+        archive,
+        "anna_berg",
+        "Anna Berg",
+        "Sie sprach mit Weber über Weber, Weber-Verlag und die Weber-Stiftung.",
+    )
+    name_hit = _dossier(archive, "jonas_weber", "Jonas Weber", "Ein Gespräch über Architektur und Städtebau.")
+
+    hits = archive_index.search("Weber")
+
+    assert [hit["path"] for hit in hits] == [name_hit, body_hit]
+
+
+def test_search_filters_by_kind(archive):
+    _dossier(archive, "jonas_weber", "Jonas Weber", "Architektur")
+    assert archive_index.search("Weber", kind="research") == []
+    assert len(archive_index.search("Weber", kind="dossier")) == 1
@@ -0,0 +1,314 @@
+"""
+Metadaten-Index für das Archiv (Dossiers + Research).
+Statt bei jedem Streamlit-Rerun dossiers/*.md und .tmp/*_research.md zu globben und
+jede Datei zu stat-en, schreibt die Pipeline beim Speichern einen Eintrag in
+.tmp/archive.sqlite (Gast, Datum, Pfad, Größe, Hash, genutzte Provider). Die Sidebar
+liest daraus seitenweise und gefiltert – die Kosten wachsen nicht mit dem Archiv.
+
+Zusätzlich hält der Index einen FTS5-Volltextindex über alle Inhalte ("welcher Gast hat
+über X gesprochen?"), der beim Speichern inkrementell mitgepflegt wird.
+
+Usage:
+    python tools/archive_index.py rebuild          # Index aus den Dateien neu aufbauen
+    python tools/archive_index.py list [Filter]    # Einträge anzeigen
+    python tools/archive_index.py search "Suchbegriffe"
+"""
+
+import hashlib
+import re
+import sqlite3
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import research_providers
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+INDEX_PATH = PROJECT_ROOT / ".tmp" / "archive.sqlite"
+
+KINDS = ("dossier", "research")
+
+# Erhöhen, wenn sich das Schema ändert – ensure_index() baut dann neu auf
+SCHEMA_VERSION = 2
+
+# Überschriften, aus denen beim Neuaufbau der Gastname gelesen wird
+_TITLE_PATTERNS = {
+    "dossier": re.compile(r"^#\s*Dossier:\s*(.+)$", re.MULTILINE),
+    "research": re.compile(r"^#\s*Research-Dossier:\s*(.+)$", re.MULTILINE),
+}
+_DATE_IN_NAME = re.compile(r"_(\d{4}-\d{2}-\d{2})$")
+
+
+def _connect() -> sqlite3.Connection:
+    INDEX_PATH.parent.mkdir(exist_ok=True)
+    conn = sqlite3.connect(INDEX_PATH, timeout=30)
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS documents (
+            path TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            guest TEXT NOT NULL,
+            slug TEXT NOT NULL,
+            date TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            mtime REAL NOT NULL,
+            sha256 TEXT NOT NULL,
+            providers TEXT NOT NULL DEFAULT '',
+            indexed_at REAL NOT NULL
+        )"""
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_documents_kind_mtime ON documents(kind, mtime DESC)")
+    conn.execute(
+        """CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+            path UNINDEXED,
+            kind UNINDEXED,
+            guest,
+            content,
+            tokenize = 'unicode61 remove_diacritics 2'
+        )"""
+    )
+    return conn
+
+
+def _delete(conn: sqlite3.Connection, stored_paths: list[str]) -> None:
+    conn.executemany("DELETE FROM documents WHERE path = ?", [(p,) for p in stored_paths])
+    conn.executemany("DELETE FROM documents_fts WHERE path = ?", [(p,) for p in stored_paths])
+
+
+def _relative(path: Path) -> str:
+    path = Path(path).resolve()
+    try:
+        return str(path.relative_to(PROJECT_ROOT))
+    except ValueError:
+        return str(path)
+
+
+def _absolute(stored: str) -> Path:
+    path = Path(stored)
+    return path if path.is_absolute() else PROJECT_ROOT / path
+
+
+def providers_from_research(content: str) -> list[str]:
+    """
+    Welche Provider in einem zusammengeführten Research stecken – anhand der Marker der
+    registrierten Provider. Platzhalter für Provider über dem Zeitbudget zählen nicht.
+    """
+    providers = []
+    for provider in research_providers.providers():
+        if not provider.marker or provider.marker not in content:
+            continue
+        section = content.split(provider.marker, 1)[1].lstrip()
+        if research_providers.TIMED_OUT_NOTE not in section.split("\n", 1)[0]:
+            providers.append(provider.label)
+    return providers
+
+
+def record(path: Path, kind: str, guest_name: Optional[str] = None, content: Optional[str] = None) -> dict:
+    """
+    Nimmt eine gerade geschriebene Datei in den Index auf (oder aktualisiert sie).
+    content: bereits vorliegender Dateiinhalt – spart das erneute Lesen.
+    """
+    if kind not in KINDS:
+        raise ValueError(f"Unbekannte Art: {kind}")
+    path = Path(path)
+    if content is None:
+        content = path.read_text(encoding="utf-8")
+    stat = path.stat()
+
+    if not guest_name:
+        match = _TITLE_PATTERNS[kind].search(content)
+        guest_name = match.group(1).strip() if match else path.stem
+    slug = path.stem.removesuffix("_research")
+    date_match = _DATE_IN_NAME.search(slug)
+    if date_match:
+        date = date_match.group(1)
+        slug = slug[: date_match.start()]
+    else:
+        date = datetime.fromtimestamp(stat.st_mtime).strftime("%Y-%m-%d")
+
+    entry = {
+        "path": _relative(path),
+        "kind": kind,
+        "guest": guest_name,
+        "slug": slug,
+        "date": date,
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+        "sha256": hashlib.sha256(content.encode("utf-8")).hexdigest(),
+        "providers": ",".join(providers_from_research(content)) if kind == "research" else "",
+        "indexed_at": time.time(),
+    }
+    with _connect() as conn:
+        previous = conn.execute("SELECT sha256 FROM documents WHERE path = ?", (entry["path"],)).fetchone()
+        # Volltext nur bei geändertem Inhalt neu indexieren
+        if previous is None or previous[0] != entry["sha256"]:
+            conn.execute("DELETE FROM documents_fts WHERE path = ?", (entry["path"],))
+            conn.execute(
+                "INSERT INTO documents_fts (path, kind, guest, content) VALUES (?, ?, ?, ?)",
+                (entry["path"], kind, guest_name, content),
+            )
+        conn.execute(
+            "INSERT OR REPLACE INTO documents (path, kind, guest, slug, date, size, mtime, sha256, providers, indexed_at) "
+            "VALUES (:path, :kind, :guest, :slug, :date, :size, :mtime, :sha256, :providers, :indexed_at)",
+            entry,
+        )
+    return entry
+
+
+def remove(path: Path) -> None:
+    """Entfernt eine Datei aus dem Index."""
+    with _connect() as conn:
+        _delete(conn, [_relative(path)])
+
+
+def _where(kind: str, filter_text: str) -> tuple[str, list]:
+    clause = "kind = ?"
+    params: list = [kind]
+    filter_text = filter_text.strip()
+    if filter_text:
+        # "_" ist in LIKE ein Einzelzeichen-Platzhalter: "udo lindenberg" trifft so Gastname und Slug
+        like = "%" + "_".join(filter_text.split()) + "%"
+        clause += " AND (guest LIKE ? OR slug LIKE ? OR date LIKE ?)"
+        params += [like, like, like]
+    return clause, params
+
+
+def query(kind: str, filter_text: str = "", limit: int = 20, offset: int = 0) -> list[dict]:
+    """
+    Einträge einer Art, neueste zuerst, optional gefiltert (Gast, Slug oder Datum).
+    Einträge, deren Datei inzwischen gelöscht wurde, werden dabei aus dem Index entfernt.
+    """
+    clause, params = _where(kind, filter_text)
+    with _connect() as conn:
+        conn.row_factory = sqlite3.Row
+        rows = conn.execute(
+            f"SELECT * FROM documents WHERE {clause} ORDER BY mtime DESC LIMIT ? OFFSET ?",
+            (*params, limit, offset),
+        ).fetchall()
+        result, stale = [], []
+        for row in rows:
+            entry = dict(row)
+            entry["path"] = _absolute(entry["path"])
+            if entry["path"].exists():
+                result.append(entry)
+            else:
+                stale.append(row["path"])
+        if stale:
+            _delete(conn, stale)
+    return result
+
+
+def count(kind: str, filter_text: str = "") -> int:
+    """Anzahl der Einträge einer Art (für die Seitennavigation)."""
+    clause, params = _where(kind, filter_text)
+    with _connect() as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM documents WHERE {clause}", params).fetchone()[0]
+
+
+def _archive_files() -> list[tuple[Path, str]]:
+    files = []
+    dossier_dir = PROJECT_ROOT / "dossiers"
+    if dossier_dir.exists():
+        files += [(path, "dossier") for path in dossier_dir.glob("*.md")]
+    tmp_dir = PROJECT_ROOT / ".tmp"
+    if tmp_dir.exists():
+        files += [(path, "research") for path in tmp_dir.glob("*_research.md")]
+    return files
+
+
+def rebuild() -> int:
+    """Baut den Index vollständig aus dossiers/ und .tmp/ neu auf. Gibt die Anzahl der Einträge zurück."""
+    if INDEX_PATH.exists():
+        # Tabellen verwerfen statt leeren, damit auch ein altes Schema ersetzt wird
+        with sqlite3.connect(INDEX_PATH, timeout=30) as conn:
+            conn.execute("DROP TABLE IF EXISTS documents")
+            conn.execute("DROP TABLE IF EXISTS documents_fts")
+    files = _archive_files()
+    for path, kind in files:
+        record(path, kind)
+    with _connect() as conn:
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    return len(files)
+
+
+def ensure_index() -> None:
+    """Legt den Index beim ersten Aufruf (oder nach einer Schema-Änderung) aus dem bestehenden Archiv an."""
+    if INDEX_PATH.exists():
+        with sqlite3.connect(INDEX_PATH, timeout=30) as conn:
+            if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+                return
+    rebuild()
+
+
+def _fts_query(text: str) -> str:
+    """
+    Wandelt Freitext in eine sichere FTS5-Abfrage: jedes Wort als Phrase (keine
+    Syntaxfehler durch Anführungszeichen, Bindestriche o.ä.), das letzte als Präfix.
+    """
+    words = re.findall(r"\w+", text)
+    if not words:
+        return ""
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def search(text: str, kind: Optional[str] = None, limit: int = 20) -> list[dict]:
+    """
+    Volltextsuche über Dossiers und Research, nach Relevanz (BM25) sortiert.
+    bm25() erwartet ein Gewicht pro Spalte (auch für die UNINDEXED-Spalten path und kind):
+    ein Treffer im Gastnamen zählt fünfmal so viel wie einer im Text.
+    Jeder Treffer enthält path, kind, guest, date und einen Textausschnitt (snippet, Treffer in **…**).
+    """
+    match = _fts_query(text)
+    if not match:
+        return []
+    sql = (
+        "SELECT f.path, f.kind, f.guest, d.date, "
+        "snippet(documents_fts, 3, '**', '**', ' … ', 16) AS snippet, bm25(documents_fts, 0.0, 0.0, 5.0, 1.0) AS rank "
+        "FROM documents_fts f JOIN documents d ON d.path = f.path "
+        "WHERE documents_fts MATCH ?"
+    )
+    params: list = [match]
+    if kind:
+        sql += " AND f.kind = ?"
+        params.append(kind)
+    sql += " ORDER BY rank LIMIT ?"
+    params.append(limit)
+    with _connect() as conn:
+        conn.row_factory = sqlite3.Row
+        rows = conn.execute(sql, params).fetchall()
+        hits = [{**dict(row), "path": _absolute(row["path"])} for row in rows]
+        stale = [row["path"] for row, hit in zip(rows, hits) if not hit["path"].exists()]
+        if stale:
+            _delete(conn, stale)
+    return [hit for hit in hits if hit["path"].exists()]
+
+
+if __name__ == "__main__":
+    # Die Provider-Marker registriert research_guest.py
+    import research_guest  # noqa: F401
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "list"
+    if command == "rebuild":
+        print(f"🗂️  {rebuild()} Dateien indexiert")
+    elif command == "list":
+        ensure_index()
+        filter_text = " ".join(sys.argv[2:])
+        for kind in KINDS:
+            print(f"\n{kind.upper()} ({count(kind, filter_text)})")
+            for entry in query(kind, filter_text, limit=50):
+                providers = f"  [{entry['providers']}]" if entry["providers"] else ""
+                print(f"  {entry['date']}  {entry['guest']}  {entry['size'] / 1024:.0f} KB{providers}")
+    elif command == "search" and len(sys.argv) > 2:
+        ensure_index()
+        start = time.perf_counter()
+        hits = search(" ".join(sys.argv[2:]))
+        print(f"🔎 {len(hits)} Treffer in {(time.perf_counter() - start) * 1000:.0f} ms")
+        for hit in hits:
+            print(f"\n{hit['kind']:8}  {hit['date']}  {hit['guest']}  ({hit['path'].name})")
+            print(f"  {' '.join(hit['snippet'].split())}")
+    else:
+        print("Usage: python tools/archive_index.py [rebuild|list [Filter]|search \"Begriffe\"]")
+        sys.exit(1)
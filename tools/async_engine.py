@@ -0,0 +1,482 @@
+"""
+Async-Engine: Research und Dossier-Erstellung auf einem einzigen Event-Loop.
+Gleiche Abläufe und Ergebnisse wie research_guest.py / create_dossier.py / run_pipeline.py
+(Disambiguierung, Provider, Hedging, Cache, Checkpoints, Single-Flight, Budgets, Tracing),
+aber mit AsyncAnthropic, AsyncOpenAI, AsyncTavilyClient und httpx statt blockierender
+Clients. Ein Prozess treibt so Dutzende Gäste gleichzeitig voran, ohne Thread pro Request.
+
+Pro Provider begrenzt ein Semaphor die gleichzeitigen Calls (ASYNC_CONCURRENCY_<PROVIDER>);
+Rate Limits und Kontingente aus rate_limit.py gelten unverändert.
+
+    async with AsyncEngine() as engine:
+        paths = await asyncio.gather(*(engine.run_pipeline(name) for name in names))
+
+Usage:
+    python tools/async_engine.py "Gast A" "Gast B" ... [--refresh]
+    python tools/run_batch.py gaeste.csv --async --workers 20
+"""
+
+import argparse
+import asyncio
+import inspect
+import os
+import sys
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Optional
+
+# Projekt-Root ermitteln
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "tools"))
+
+import clients
+import cost_ledger
+import rate_limit
+import research_cache
+import research_providers
+import resilience
+import singleflight
+import tracing
+from checkpoints import RunCheckpoint, discard_empty_run, new_run_id, run_exists
+from create_dossier import StreamBuffer, _dossier_prompt, _report_usage, _stream_request, save_dossier, usage_to_dict
+from research_guest import (
+    _cache_template,
+    _disambiguation_request,
+    _disambiguation_search,
+    _format_openai,
+    _format_perplexity,
+    _format_tavily,
+    _keep_result,
+    _known_identity,
+    _log_hedge,
+    _merge_research,
+    _openai_request,
+    _parse_disambiguation,
+    _perplexity_request,
+    _print_timings,
+    _report_deadline,
+    _research_plan,
+    _resolve_deadline,
+    _reuse_result,
+    _stage_label,
+    _tavily_searches,
+    save_research,
+    slugify,
+)
+from research_providers import ResearchProvider
+
+# Gleichzeitige Calls pro Provider (über alle Gäste des Event-Loops)
+DEFAULT_CONCURRENCY = {
+    "perplexity": 20,
+    "tavily": 30,
+    "openai": 10,
+    "anthropic": 20,
+}
+
+
+def concurrency_for(provider: str) -> int:
+    """Maximale Anzahl gleichzeitiger Calls eines Providers (Env ASYNC_CONCURRENCY_<PROVIDER>)."""
+    return max(1, int(os.getenv(f"ASYNC_CONCURRENCY_{provider.upper()}", DEFAULT_CONCURRENCY[provider])))
+
+
+class AsyncEngine:
+    """
+    Hält die Async-Clients und Provider-Semaphore eines Event-Loops. Als
+    `async with AsyncEngine() as engine:` verwenden, damit die Clients am Ende geschlossen werden.
+    """
+
+    def __init__(self):
+        self._clients: dict[str, object] = {}
+        self._semaphores = {provider: asyncio.Semaphore(concurrency_for(provider)) for provider in DEFAULT_CONCURRENCY}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+        return False
+
+    async def aclose(self) -> None:
+        """Schließt alle erzeugten Clients (Connection-Pools)."""
+        for client in self._clients.values():
+            close = getattr(client, "aclose", None) or getattr(client, "close", None)
+            if close is not None:
+                result = close()
+                if inspect.isawaitable(result):
+                    await result
+        self._clients.clear()
+
+    def _client(self, provider: str):
+        if provider not in self._clients:
+            self._clients[provider] = clients.create_async_client(provider)
+        return self._clients[provider]
+
+    @asynccontextmanager
+    async def _slot(self, provider: str):
+        """Platz im Provider-Semaphor plus Rate Limit/Kontingent für einen Call."""
+        async with self._semaphores[provider]:
+            await rate_limit.acquire_async(provider)
+            yield
+
+    # --- Disambiguierung ---
+
+    async def disambiguate_guest(self, guest_name: str, refresh: bool = False) -> tuple[list[dict], bool]:
+        """Async-Variante von research_guest.disambiguate_guest."""
+        with tracing.span("disambiguation", guest=slugify(guest_name), refresh=refresh) as span:
+            candidates, is_ambiguous = await self._disambiguate(guest_name, refresh)
+            span.set(candidates=len(candidates), is_ambiguous=is_ambiguous)
+            return candidates, is_ambiguous
+
+    async def _disambiguate(self, guest_name: str, refresh: bool) -> tuple[list[dict], bool]:
+        known = await asyncio.to_thread(_known_identity, guest_name, refresh)
+        if known is not None:
+            return known
+
+        # Kontingent für beide Calls vorab prüfen, damit die Tavily-Suche nicht verschwendet wird
+        await asyncio.to_thread(rate_limit.check_quota, "anthropic")
+        async with self._slot("tavily"):
+            results = await self._client("tavily").search(**_disambiguation_search(guest_name))
+        async with self._slot("anthropic"):
+            message = await self._client("anthropic").messages.create(**_disambiguation_request(guest_name, results))
+        return await asyncio.to_thread(_parse_disambiguation, guest_name, message.content[0].text)
+
+    # --- Provider ---
+
+    async def research_perplexity(self, guest_name: str, context_hint: str = "") -> str:
+        """Async-Variante von research_guest.research_perplexity (httpx)."""
+        url, payload = _perplexity_request(guest_name, context_hint)
+
+        async def post():
+            async with self._slot("perplexity"):
+                response = await self._client("perplexity").post(url, json=payload, timeout=120)
+            response.raise_for_status()
+            return response
+
+        response = await resilience.call_async("perplexity", post)
+        return _format_perplexity(response.json())
+
+    async def research_tavily(self, guest_name: str, context_hint: str = "") -> str:
+        """Async-Variante von research_guest.research_tavily (drei Suchen gleichzeitig)."""
+        await asyncio.to_thread(rate_limit.check_quota, "tavily", calls=3)
+        news_results, social_results, instagram_results = await asyncio.gather(
+            *(self._tavily_search(kwargs) for kwargs in _tavily_searches(guest_name, context_hint))
+        )
+        return _format_tavily(news_results, social_results, instagram_results)
+
+    async def _tavily_search(self, kwargs: dict) -> dict:
+        async def search():
+            async with self._slot("tavily"):
+                return await self._client("tavily").search(**kwargs)
+
+        return await resilience.call_async("tavily", search)
+
+    async def research_openai_fallback(self, guest_name: str, context_hint: str = "") -> str:
+        """Async-Variante von research_guest.research_openai_fallback."""
+        async def create():
+            async with self._slot("openai"):
+                return await self._client("openai").responses.create(**_openai_request(guest_name, context_hint))
+
+        return _format_openai(await resilience.call_async("openai", create))
+
+    async def _run_provider(
+        self,
+        provider: ResearchProvider,
+        guest_name: str,
+        context_hint: str,
+        timings: dict,
+        refresh: bool = False,
+        checkpoint=None,
+    ) -> Optional[str]:
+        """
+        Wie research_guest._run_provider: Checkpoint/Cache nutzen, sonst den Provider abrufen (None bei Fehler).
+        Native Async-Variante laut provider.async_method, sonst provider.fetch in einem Worker-Thread.
+        Der Cache-Fingerprint kommt vom synchronen Provider – so teilen sich beide Engines den Research-Cache.
+        Cache, Checkpoint und Latenz-Log (SQLite/Dateien) laufen in Worker-Threads.
+        """
+        label = provider.label
+        with tracing.span("provider", provider=label, guest=slugify(guest_name)) as span:
+            template = _cache_template(provider) if research_cache.is_enabled() else ""
+            result = await asyncio.to_thread(_reuse_result, label, guest_name, context_hint, timings, refresh, checkpoint, template)
+            if result is None:
+                print(f"  → {label} gestartet...")
+                tracing.annotate(source="api")
+                start = time.perf_counter()
+                try:
+                    if provider.async_method:
+                        result = await getattr(self, provider.async_method)(guest_name, context_hint)
+                    else:
+                        result = await asyncio.to_thread(provider.fetch, guest_name, context_hint)
+                    print(f"  ✓ {label} abgeschlossen")
+                except resilience.CircuitOpenError as e:
+                    # Provider gerade gesperrt – ohne Wartezeit weiter zum Fallback
+                    print(f"  ⚡ {label} übersprungen: {e}")
+                    tracing.annotate(error=f"{type(e).__name__}: {e}")
+                    result = None
+                except Exception as e:
+                    print(f"  ✗ {label} fehlgeschlagen: {e}")
+                    tracing.annotate(error=f"{type(e).__name__}: {e}")
+                    result = None
+                elapsed = time.perf_counter() - start
+                await asyncio.to_thread(_keep_result, label, guest_name, context_hint, timings, elapsed, result, checkpoint, template)
+            span.set(ok=result is not None, bytes=len(result.encode("utf-8")) if result else 0)
+            return result
+
+    # --- Research ---
+
+    async def _run_group(
+        self,
+        group: list[list[ResearchProvider]],
+        guest_name: str,
+        context_hint: str,
+        hedge_after: Optional[float],
+        timings: dict,
+        refresh: bool = False,
+        checkpoint=None,
+    ) -> dict[str, str]:
+        """Wie research_guest._run_group; Hedging-Verlierer werden hier wirklich abgebrochen."""
+        args = (guest_name, context_hint, timings, refresh, checkpoint)
+        hedging = hedge_after is not None and len(group) > 1
+        if not hedging and all(len(stage) == 1 for stage in group):
+            for (provider,) in group:
+                result = await self._run_provider(provider, *args)
+                if result is not None:
+                    return {provider.label: result}
+            return {}
+
+        start = time.perf_counter()
+        tasks = {}
+        launched = 0
+        hedge_at = None
+        hedged = False
+        winner = None
+
+        def launch() -> None:
+            nonlocal launched, hedge_at
+            for provider in group[launched]:
+                tasks[asyncio.create_task(self._run_provider(provider, *args))] = (launched, provider)
+            launched += 1
+            hedge_at = time.perf_counter() + hedge_after if hedging and launched < len(group) else None
+
+        try:
+            launch()
+            while winner is None:
+                pending = [task for task in tasks if not task.done()]
+                if not pending:
+                    if launched == len(group):
+                        break
+                    launch()
+                    continue
+                timeout = None if hedge_at is None else max(0.0, hedge_at - time.perf_counter())
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedged = True
+                    print(f"  ⏳ {_stage_label(group[launched - 1])} nach {hedge_after:.1f}s ohne Antwort – {_stage_label(group[launched])} startet spekulativ")
+                    launch()
+                    continue
+                # Bei Gleichstand hat die frühere Stufe Vorrang (z.B. Perplexity: strukturiertere Ergebnisse)
+                succeeded = sorted({stage for task, (stage, _) in tasks.items() if task.done() and task.result() is not None})
+                if succeeded:
+                    winner = succeeded[0]
+                    # Übrige Provider derselben Stufe (Policy parallel) gehören mit zum Ergebnis
+                    await asyncio.wait([task for task, (stage, _) in tasks.items() if stage == winner])
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+        results = {
+            provider.label: task.result()
+            for task, (stage, provider) in tasks.items()
+            if stage == winner and task.result() is not None
+        }
+        if hedging:
+            await asyncio.to_thread(_log_hedge, guest_name, hedge_after, hedged, list(results), time.perf_counter() - start)
+        return results
+
+    async def run_research(
+        self,
+        guest_name: str,
+        context_hint: str = "",
+        timings: Optional[dict] = None,
+        hedge_after=None,
+        refresh: bool = False,
+        checkpoint=None,
+        deadline=None,
+        policy: Optional[str] = None,
+    ) -> Path:
+        """
+        Async-Variante von research_guest.run_research (die Gruppen des Plans laufen immer gleichzeitig).
+        Nach Ablauf des Zeitbudgets (deadline) werden die noch laufenden Provider abgebrochen.
+        """
+        deadline_seconds = _resolve_deadline(deadline)
+        if timings is None:
+            timings = {}
+
+        print(f"🔍 Starte Research für: {guest_name}")
+        if context_hint:
+            print(f"  Kontext: {context_hint}")
+
+        if checkpoint is not None and await asyncio.to_thread(checkpoint.has, "research"):
+            print("  ↻ Research aus Checkpoint")
+            output = await asyncio.to_thread(checkpoint.load, "research")
+            return await asyncio.to_thread(save_research, guest_name, output, context_hint)
+
+        # Der Plan liest beobachtete Latenzen (p90-Hedging) aus Dateien
+        groups, hedge_seconds = await asyncio.to_thread(_research_plan, policy, hedge_after)
+        start = time.perf_counter()
+        # Retries der Provider enden mit dem Zeitbudget (die Tasks übernehmen den Kontext)
+        with resilience.deadline_context(deadline_seconds):
+            tasks = [
+                asyncio.create_task(self._run_group(group, guest_name, context_hint, hedge_seconds, timings, refresh, checkpoint))
+                for group in groups
+            ]
+        try:
+            if tasks:
+                await asyncio.wait(tasks, timeout=deadline_seconds)
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        results = {}
+        timed_out = []
+        for group, task in zip(groups, tasks):
+            if task.cancelled():
+                timed_out += research_providers.waiting_on(group, timings)
+            else:
+                results.update(task.result())
+        _print_timings(timings, time.perf_counter() - start)
+        if timed_out:
+            await asyncio.to_thread(_report_deadline, guest_name, deadline_seconds, timed_out, time.perf_counter() - start)
+
+        output = _merge_research(guest_name, context_hint, results, timed_out)
+        # Unvollständigen Research nicht sichern – ein fortgesetzter Lauf versucht es erneut
+        if checkpoint is not None and not timed_out:
+            await asyncio.to_thread(checkpoint.save, "research", output)
+        return await asyncio.to_thread(save_research, guest_name, output, context_hint)
+
+    # --- Dossier ---
+
+    async def create_dossier(
+        self, guest_name: str, research_path: Path, on_chunk=None, usage: Optional[dict] = None, context_hint: str = ""
+    ) -> Path:
+        """Async-Variante von create_dossier.create_dossier (on_chunk/usage/context_hint wie dort)."""
+        print(f"📝 Erstelle Dossier für: {guest_name}")
+        system, messages = await asyncio.to_thread(_dossier_prompt, research_path)
+
+        buffer = StreamBuffer()
+        async with self._slot("anthropic"):
+            with tracing.span("dossier_stream", provider="anthropic", guest=slugify(guest_name), section="all") as span:
+                async with self._client("anthropic").messages.stream(**_stream_request(system, messages, 8000)) as stream:
+                    async for text in stream.text_stream:
+                        if not buffer.length:
+                            span.set(ttft_ms=round(span.elapsed_ms(), 1))
+                        buffer.append(text)
+                        if on_chunk:
+                            on_chunk(text, buffer)
+                    final_message = await stream.get_final_message()
+                span.set(output_chars=buffer.length, **usage_to_dict(final_message.usage))
+        _report_usage(final_message, on_chunk, usage)
+
+        print("  ✓ Dossier generiert")
+
+        return await asyncio.to_thread(save_dossier, guest_name, buffer.text, context_hint)
+
+    # --- Pipeline ---
+
+    async def run_pipeline(
+        self,
+        guest_name: str,
+        context_hint: str = "",
+        refresh: bool = False,
+        run_id: Optional[str] = None,
+        on_chunk=None,
+        on_stage=None,
+        deadline=None,
+    ) -> Path:
+        """
+        Async-Variante von run_pipeline.run_pipeline: Research → Dossier mit Checkpoints,
+        Single-Flight und Budget-Prüfung (wirft cost_ledger.BudgetExceededError bei refuse).
+        deadline: Zeitbudget des Research in Sekunden (siehe run_research).
+        """
+        economy = await asyncio.to_thread(cost_ledger.check_budget, slugify(guest_name))
+        requested_run_id = run_id or new_run_id(guest_name)
+
+        flight_key = singleflight.identity_key(guest_name, context_hint)
+        run_id = requested_run_id
+        while True:
+            owner = await asyncio.to_thread(singleflight.acquire, flight_key, run_id)
+            if owner is None:
+                break
+            print(f"🔗 Identischer Lauf aktiv ({owner['run_id']}) – warte auf dessen Ergebnis...")
+            await singleflight.wait_or_fail_async(flight_key)
+            # Nur echte Läufe übernehmen (ein Freshness-Refresh hält den Lock ohne Checkpoints)
+            if await asyncio.to_thread(run_exists, owner["run_id"]):
+                run_id = owner["run_id"]
+        if run_id != requested_run_id:
+            await asyncio.to_thread(discard_empty_run, requested_run_id)
+
+        try:
+            checkpoint = await asyncio.to_thread(RunCheckpoint, run_id, guest_name, context_hint)
+            if not await asyncio.to_thread(checkpoint.has, "disambiguation"):
+                await asyncio.to_thread(checkpoint.save_json, "disambiguation", {"guest": guest_name, "context_hint": context_hint})
+            with cost_ledger.run_context(slugify(guest_name), checkpoint.run_id, economy), \
+                    tracing.span("pipeline", guest=slugify(guest_name), run_id=checkpoint.run_id, engine="async"):
+                return await self._run_stages(guest_name, context_hint, refresh, checkpoint, on_chunk, on_stage, deadline)
+        finally:
+            await asyncio.to_thread(singleflight.release, flight_key, run_id)
+
+    async def _run_stages(
+        self, guest_name: str, context_hint: str, refresh: bool, checkpoint: RunCheckpoint, on_chunk, on_stage, deadline=None
+    ) -> Path:
+        start = time.time()
+        print(f"▶ {guest_name} (Lauf {checkpoint.run_id})")
+
+        with tracing.span("stage", stage="research"):
+            research_path = await self.run_research(guest_name, context_hint, refresh=refresh, checkpoint=checkpoint, deadline=deadline)
+        if on_stage:
+            on_stage("research", research_path)
+
+        with tracing.span("stage", stage="dossier"):
+            if await asyncio.to_thread(checkpoint.has, "dossier"):
+                print("  ↻ Dossier aus Checkpoint")
+                content = await asyncio.to_thread(checkpoint.load, "dossier")
+                dossier_path = await asyncio.to_thread(save_dossier, guest_name, content, context_hint)
+            else:
+                dossier_path = await self.create_dossier(guest_name, research_path, on_chunk=on_chunk, context_hint=context_hint)
+                content = await asyncio.to_thread(dossier_path.read_text, encoding="utf-8")
+                await asyncio.to_thread(checkpoint.save, "dossier", content)
+        if on_stage:
+            on_stage("dossier", dossier_path)
+
+        print(f"✅ {guest_name} fertig in {time.time() - start:.0f} Sekunden: {dossier_path}")
+        return dossier_path
+
+
+async def _run_all(names: list[str], refresh: bool) -> list:
+    async with AsyncEngine() as engine:
+        return await asyncio.gather(
+            *(engine.run_pipeline(name, refresh=refresh) for name in names),
+            return_exceptions=True,
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gästedossiers für mehrere Gäste auf einem Event-Loop")
+    parser.add_argument("guests", nargs="+", help="Namen der Gäste")
+    parser.add_argument("--refresh", action="store_true", help="Research-Cache ignorieren")
+    args = parser.parse_args()
+
+    start = time.time()
+    results = asyncio.run(_run_all(args.guests, args.refresh))
+    print("\n" + "=" * 60)
+    print(f"  {len(args.guests)} Gäste in {time.time() - start:.0f} Sekunden")
+    print("=" * 60)
+    for name, result in zip(args.guests, results):
+        if isinstance(result, Exception):
+            print(f"  ✗ {name:<30} {type(result).__name__}: {result}")
+        else:
+            print(f"  ✓ {name:<30} {result}")
+    sys.exit(1 if any(isinstance(result, Exception) for result in results) else 0)
@@ -0,0 +1,347 @@
+"""
+End-to-End-Benchmark der Pipeline gegen simulierte Provider.
+Treibt run_research und create_dossier (einzeln und parallel wie im Batch-Modus) gegen
+lokale Stand-ins mit konfigurierbaren Latenzverteilungen und Fehlerraten
+(transport.py, Modus "simulate") – ohne Netzwerk, API-Keys oder Kosten.
+
+Gemessen pro Stufe (Perplexity, OpenAI Fallback, Tavily, Research, TTFT, Dossier, Gesamt):
+p50/p95/p99 und Mittelwert, dazu Durchsatz in Gästen pro Minute und Fehlerzahl.
+
+Latenzen werden log-normal aus Median und p95 gezogen und mit time_scale verkürzt, damit
+ein Lauf nur Sekunden dauert. Alle berichteten Zeiten sind auf simulierte Sekunden
+zurückgerechnet (Messwert / time_scale). Ergebnisse landen als JSON in .tmp/benchmarks/
+und lassen sich mit --compare gegen einen früheren Lauf vergleichen.
+
+Usage:
+    python tools/benchmark.py [--guests 20] [--workers 1 4] [--profile profil.json]
+                              [--seed 42] [--sequential-research] [--compare alt.json]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "tools"))
+
+import archive_index
+import transport
+from create_dossier import create_dossier
+from dossier_sections import SECTION_IDS, SECTION_LABELS
+from research_guest import identity_slug, run_research
+
+BENCHMARKS_DIR = PROJECT_ROOT / ".tmp" / "benchmarks"
+
+# Latenzen in (simulierten) Sekunden, Fehlerrate je Call. Eigene Profile (JSON) überschreiben einzelne Werte.
+DEFAULT_PROFILE = {
+    "time_scale": 0.05,
+    "providers": {
+        "perplexity": {"median": 25.0, "p95": 60.0, "failure_rate": 0.05},
+        "openai": {"median": 20.0, "p95": 45.0, "failure_rate": 0.02},
+        "tavily": {"median": 1.5, "p95": 4.0, "failure_rate": 0.02},
+        "anthropic": {"median": 3.0, "p95": 8.0, "failure_rate": 0.01},
+        # messages.stream: Zeit bis zum ersten Token und Gesamtdauer des Streams
+        "anthropic_stream": {
+            "ttft_median": 2.0,
+            "ttft_p95": 6.0,
+            "median": 60.0,
+            "p95": 100.0,
+            "chunks": 200,
+            "failure_rate": 0.01,
+        },
+    },
+}
+
+STAGES = ["Perplexity", "OpenAI Fallback", "Tavily", "research", "ttft", "dossier", "total"]
+
+
+class SimulatedProviderError(RuntimeError):
+    """Simulierter Provider-Fehler (gemäß failure_rate im Profil), verhält sich wie ein 503."""
+
+    status_code = 503
+
+
+def load_profile(path: Optional[Path] = None) -> dict:
+    """Standardprofil, optional mit Werten aus einer JSON-Datei überschrieben."""
+    profile = json.loads(json.dumps(DEFAULT_PROFILE))
+    if path:
+        custom = json.loads(Path(path).read_text(encoding="utf-8"))
+        profile["time_scale"] = custom.get("time_scale", profile["time_scale"])
+        for provider, values in custom.get("providers", {}).items():
+            profile["providers"].setdefault(provider, {}).update(values)
+    return profile
+
+
+def _synthetic_dossier(chunks: int) -> list[str]:
+    """Dossier-Text im Ziel-Format (alle Anker), aufgeteilt in ungefähr `chunks` Stücke."""
+    text = "# Dossier: Benchmark\n\n"
+    for anchor in SECTION_IDS:
+        text += f'<a id="{anchor}"></a>\n# {SECTION_LABELS[anchor].upper()}\n'
+        text += "* Simulierter Inhalt für den Benchmark. " * 20 + "\n\n---\n\n"
+    size = max(1, math.ceil(len(text) / max(1, chunks)))
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class SimulatedProviders:
+    """Erzeugt Antworten im Fixture-Format mit zufälliger Latenz und Fehlerrate (für transport.set_simulator)."""
+
+    def __init__(self, profile: dict, seed: Optional[int] = None):
+        self.profile = profile
+        self.scale = profile["time_scale"]
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def _lognormal(self, median: float, p95: float) -> float:
+        sigma = max(0.0, math.log(p95 / median) / 1.645) if p95 > median > 0 else 0.0
+        with self.lock:
+            return self.random.lognormvariate(math.log(median), sigma)
+
+    def _fails(self, config: dict) -> bool:
+        with self.lock:
+            return self.random.random() < config.get("failure_rate", 0.0)
+
+    def __call__(self, provider: str, operation: str, args: tuple, kwargs: dict) -> dict:
+        key = "anthropic_stream" if operation == "messages.stream" else provider
+        config = self.profile["providers"][key]
+        latency = self._lognormal(config["median"], config["p95"]) * self.scale
+
+        if self._fails(config):
+            # Fehler kommen wie im echten Betrieb erst nach einer gewissen Wartezeit
+            time.sleep(latency)
+            raise SimulatedProviderError(f"Simulierter Fehler: {provider} {operation}")
+
+        if operation == "messages.stream":
+            ttft = min(self._lognormal(config["ttft_median"], config["ttft_p95"]) * self.scale, latency)
+            pieces = _synthetic_dossier(config.get("chunks", 200))
+            step = (latency - ttft) / max(1, len(pieces) - 1)
+            return {
+                "chunks": [[ttft + i * step, piece] for i, piece in enumerate(pieces)],
+                "response": {
+                    "content": [{"type": "text", "text": "".join(pieces)}],
+                    "usage": {"input_tokens": 12000, "output_tokens": 6000, "cache_creation_input_tokens": 0, "cache_read_input_tokens": 0},
+                },
+            }
+        return {"latency": latency, "response": self._response(provider)}
+
+    def _response(self, provider: str):
+        text = "Simulierte Recherche. " * 50
+        if provider == "perplexity":
+            return {
+                "status_code": 200,
+                "headers": {},
+                "json": {"choices": [{"message": {"content": text}}], "citations": ["https://example.org/quelle"]},
+            }
+        if provider == "tavily":
+            return {
+                "answer": "Simulierte Echtzeit-Zusammenfassung.",
+                "results": [{"title": "Simuliert", "content": text[:300], "url": f"https://example.org/{i}"} for i in range(3)],
+            }
+        if provider == "openai":
+            return {"output": [{"type": "message", "text": text}]}
+        return {
+            "content": [{"type": "text", "text": text}],
+            "usage": {"input_tokens": 1000, "output_tokens": 200, "cache_creation_input_tokens": 0, "cache_read_input_tokens": 0},
+        }
+
+
+def percentile(values: list[float], quantile: float) -> Optional[float]:
+    """Perzentil per Nearest-Rank (None bei leerer Liste)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(quantile * len(ordered)))]
+
+
+def _bench_guest(index: int, research_concurrent: bool) -> dict:
+    """Ein Gast: Research + Dossier, mit Zeiten pro Stufe und TTFT."""
+    guest = f"Benchmark Gast {index:03d}"
+    result = {"guest": guest, "ok": False}
+    timings = {}
+    start = time.perf_counter()
+    try:
+        research_path = run_research(guest, "Benchmark", concurrent=research_concurrent, timings=timings, refresh=True)
+        result["research"] = time.perf_counter() - start
+
+        first_chunk = []
+
+        def on_chunk(delta, buffer):
+            if not first_chunk:
+                first_chunk.append(time.perf_counter())
+
+        dossier_start = time.perf_counter()
+        create_dossier(guest, research_path, on_chunk=on_chunk, context_hint="Benchmark")
+        result["dossier"] = time.perf_counter() - dossier_start
+        if first_chunk:
+            result["ttft"] = first_chunk[0] - dossier_start
+        result["ok"] = True
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["total"] = time.perf_counter() - start
+    result.update({label: seconds for label, seconds in timings.items()})
+    return result
+
+
+def _cleanup(guests: int) -> None:
+    """Entfernt die vom Benchmark geschriebenen Research-/Dossier-Dateien samt Index-Einträgen."""
+    today = datetime.now().strftime("%Y-%m-%d")
+    for index in range(guests):
+        slug = identity_slug(f"Benchmark Gast {index:03d}", "Benchmark")
+        for path in [
+            PROJECT_ROOT / ".tmp" / f"{slug}_research.md",
+            PROJECT_ROOT / ".tmp" / f"{slug}_research_raw.md",
+            PROJECT_ROOT / "dossiers" / f"{slug}_{today}.md",
+        ]:
+            if path.exists():
+                path.unlink()
+                archive_index.remove(path)
+
+
+def run_scenario(guests: int, workers: int, research_concurrent: bool, scale: float, verbose: bool = False) -> dict:
+    """Verarbeitet `guests` Gäste mit `workers` parallelen Pipelines und wertet die Zeiten aus."""
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    start = time.perf_counter()
+    with output:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bench") as pool:
+            results = list(pool.map(lambda i: _bench_guest(i, research_concurrent), range(guests)))
+    wall = (time.perf_counter() - start) / scale
+
+    stages = {}
+    for stage in STAGES:
+        values = [r[stage] / scale for r in results if r.get(stage) is not None and (r["ok"] or stage in ("Perplexity", "OpenAI Fallback", "Tavily"))]
+        stages[stage] = {
+            "n": len(values),
+            "mean": round(sum(values) / len(values), 3) if values else None,
+            **{f"p{q}": round(percentile(values, q / 100), 3) if values else None for q in (50, 95, 99)},
+        }
+    completed = sum(1 for r in results if r["ok"])
+    return {
+        "name": f"workers={workers}" + ("" if research_concurrent else ", research sequentiell"),
+        "guests": guests,
+        "workers": workers,
+        "research_concurrent": research_concurrent,
+        "wall_seconds": round(wall, 3),
+        "throughput_per_minute": round(completed / wall * 60, 3) if wall > 0 else None,
+        "completed": completed,
+        "errors": [r["error"] for r in results if not r["ok"]],
+        "stages": stages,
+    }
+
+
+def _git_version() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(
+    guests: int = 20,
+    workers: tuple[int, ...] = (1, 4),
+    profile: Optional[dict] = None,
+    seed: Optional[int] = 42,
+    research_concurrent: bool = True,
+    verbose: bool = False,
+) -> dict:
+    """Führt alle Szenarien gegen simulierte Provider aus und gibt den Report zurück."""
+    profile = profile or load_profile()
+    # Wird am Ende wiederhergestellt – run_benchmark() kann auch als Bibliotheksfunktion laufen
+    saved_env = {name: os.getenv(name) for name in ("PROVIDER_TRANSPORT", "RESEARCH_CACHE", "RETRY_BASE_DELAY", "RETRY_MAX_DELAY")}
+    os.environ["PROVIDER_TRANSPORT"] = "simulate"
+    # Simulierte Ergebnisse dürfen weder im Research-Cache noch im Latenz-Log landen
+    os.environ["RESEARCH_CACHE"] = "0"
+    # Retry-Backoff läuft in simulierter Zeit, sonst verzerrt er die Latenzen
+    os.environ["RETRY_BASE_DELAY"] = str(float(saved_env["RETRY_BASE_DELAY"] or 1) * profile["time_scale"])
+    os.environ["RETRY_MAX_DELAY"] = str(float(saved_env["RETRY_MAX_DELAY"] or 20) * profile["time_scale"])
+    transport.set_simulator(SimulatedProviders(profile, seed))
+
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "version": _git_version(),
+        "seed": seed,
+        "profile": profile,
+        "scenarios": [],
+    }
+    try:
+        for worker_count in workers:
+            print(f"⏱ Szenario: {guests} Gäste, {worker_count} parallel...")
+            report["scenarios"].append(run_scenario(guests, worker_count, research_concurrent, profile["time_scale"], verbose))
+    finally:
+        transport.set_simulator(None)
+        for name, value in saved_env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        _cleanup(guests)
+    return report
+
+
+def _fmt(value: Optional[float]) -> str:
+    return "—" if value is None else f"{value:.1f}"
+
+
+def print_report(report: dict, baseline: Optional[dict] = None) -> None:
+    """Tabelle pro Szenario; mit baseline zusätzlich die Veränderung von p50/p95 in Prozent."""
+    base_scenarios = {s["name"]: s for s in (baseline or {}).get("scenarios", [])}
+    for scenario in report["scenarios"]:
+        print(f"\n=== {scenario['name']} · {scenario['completed']}/{scenario['guests']} ok · "
+              f"{_fmt(scenario['throughput_per_minute'])} Gäste/min (simuliert) ===")
+        base = base_scenarios.get(scenario["name"])
+        for stage, stats in scenario["stages"].items():
+            line = f"  {stage:16} p50 {_fmt(stats['p50']):>7}s  p95 {_fmt(stats['p95']):>7}s  p99 {_fmt(stats['p99']):>7}s"
+            if base and stats["p50"] is not None:
+                old = base["stages"].get(stage, {})
+                deltas = []
+                for key in ("p50", "p95"):
+                    if old.get(key):
+                        deltas.append(f"{key} {(stats[key] - old[key]) / old[key] * 100:+.0f}%")
+                if deltas:
+                    line += "   Δ " + ", ".join(deltas)
+            print(line)
+        if scenario["errors"]:
+            print(f"  ✗ {len(scenario['errors'])} Fehler, z.B. {scenario['errors'][0]}")
+
+
+def save_report(report: dict) -> Path:
+    BENCHMARKS_DIR.mkdir(parents=True, exist_ok=True)
+    path = BENCHMARKS_DIR / f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    path.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pipeline-Benchmark mit simulierten Providern")
+    parser.add_argument("--guests", type=int, default=20, help="Gäste pro Szenario")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4], help="Parallele Pipelines je Szenario")
+    parser.add_argument("--profile", type=Path, help="JSON mit Latenzen/Fehlerraten (überschreibt das Standardprofil)")
+    parser.add_argument("--seed", type=int, default=42, help="Zufalls-Seed für reproduzierbare Läufe")
+    parser.add_argument("--sequential-research", action="store_true", help="Perplexity und Tavily nacheinander statt parallel")
+    parser.add_argument("--compare", type=Path, help="Früheren Benchmark-Report zum Vergleich")
+    parser.add_argument("--verbose", action="store_true", help="Ausgaben der Pipeline anzeigen")
+    args = parser.parse_args()
+
+    result = run_benchmark(
+        guests=args.guests,
+        workers=tuple(args.workers),
+        profile=load_profile(args.profile),
+        seed=args.seed,
+        research_concurrent=not args.sequential_research,
+        verbose=args.verbose,
+    )
+    baseline = json.loads(args.compare.read_text(encoding="utf-8")) if args.compare else None
+    print_report(result, baseline)
+    print(f"\n💾 Report gespeichert: {save_report(result)}")
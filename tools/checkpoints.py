@@ -0,0 +1,178 @@
+"""
+Stufen-Checkpoints pro Pipeline-Lauf.
+Jede erfolgreich abgeschlossene Stufe (Disambiguierung, einzelne Provider, zusammengeführtes
+Research, Dossier) wird unter .tmp/runs/{run_id}/ gespeichert. Ein fehlgeschlagener Lauf kann
+so ab der letzten erfolgreichen Stufe fortgesetzt werden, ohne Perplexity & Co. erneut zu bezahlen.
+
+Usage:
+    python tools/checkpoints.py              # Läufe auflisten
+    python tools/checkpoints.py "Gastname"   # Läufe eines Gastes
+"""
+
+import json
+import os
+import shutil
+import sys
+import threading
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "tools"))
+
+import research_providers
+from research_guest import slugify
+
+RUNS_DIR = PROJECT_ROOT / ".tmp" / "runs"
+
+_lock = threading.Lock()
+
+
+def stages() -> list[str]:
+    """Reihenfolge der Stufen (für Anzeige und "letzte erfolgreiche Stufe"), Provider laut Registry."""
+    return ["disambiguation", *(provider.label for provider in research_providers.providers()), "research", "dossier"]
+
+
+def new_run_id(guest_name: str) -> str:
+    """Neue Lauf-ID: Gast-Slug + Zeitstempel + Zufallssuffix (gleichnamige Gäste in derselben Sekunde)."""
+    return f"{slugify(guest_name)}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+
+
+class RunCheckpoint:
+    """Checkpoints eines Pipeline-Laufs (ein Verzeichnis, eine Datei pro Stufe)."""
+
+    def __init__(self, run_id: str, guest_name: str = "", context_hint: str = ""):
+        self.run_id = run_id
+        self.dir = RUNS_DIR / run_id
+        manifest = self._read_manifest()
+        if manifest is None:
+            manifest = {
+                "run_id": run_id,
+                "guest": guest_name,
+                "context_hint": context_hint,
+                "created_at": datetime.now().isoformat(timespec="seconds"),
+                "stages": {},
+            }
+            self._write(self.dir / "run.json", json.dumps(manifest, ensure_ascii=False, indent=2))
+        self.manifest = manifest
+
+    @property
+    def guest(self) -> str:
+        return self.manifest["guest"]
+
+    @property
+    def context_hint(self) -> str:
+        return self.manifest["context_hint"]
+
+    def _read_manifest(self) -> Optional[dict]:
+        path = self.dir / "run.json"
+        if not path.exists():
+            return None
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def _write(self, path: Path, text: str) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{threading.get_ident()}.tmp")
+        tmp_path.write_text(text, encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    def _stage_path(self, stage: str) -> Path:
+        return self.dir / f"{slugify(stage)}.md"
+
+    def has(self, stage: str) -> bool:
+        return stage in self.manifest["stages"] and self._stage_path(stage).exists()
+
+    def load(self, stage: str) -> str:
+        return self._stage_path(stage).read_text(encoding="utf-8")
+
+    def save(self, stage: str, content: str) -> None:
+        """Speichert das Ergebnis einer Stufe (thread-sicher, atomar)."""
+        with _lock:
+            self._write(self._stage_path(stage), content)
+            self.manifest = self._read_manifest() or self.manifest
+            self.manifest["stages"][stage] = {"saved_at": datetime.now().isoformat(timespec="seconds")}
+            self._write(self.dir / "run.json", json.dumps(self.manifest, ensure_ascii=False, indent=2))
+
+    def load_json(self, stage: str) -> dict:
+        return json.loads(self.load(stage))
+
+    def save_json(self, stage: str, data: dict) -> None:
+        self.save(stage, json.dumps(data, ensure_ascii=False, indent=2))
+
+    def completed_stages(self) -> list[str]:
+        """
+        Abgeschlossene Stufen in Pipeline-Reihenfolge. Stufen von Providern, die nicht (mehr)
+        registriert sind, stehen vor "research".
+        """
+        order = stages()
+        unknown = [stage for stage in self.manifest["stages"] if stage not in order]
+        order[-2:-2] = unknown
+        return [stage for stage in order if self.has(stage)]
+
+    @property
+    def is_complete(self) -> bool:
+        return self.has("dossier")
+
+
+def list_runs(guest_name: Optional[str] = None) -> list[RunCheckpoint]:
+    """Alle Läufe (optional nur eines Gastes), neueste zuerst."""
+    if not RUNS_DIR.exists():
+        return []
+    runs = []
+    for path in RUNS_DIR.iterdir():
+        if path.is_dir() and (path / "run.json").exists():
+            run = RunCheckpoint(path.name)
+            if guest_name is None or slugify(run.guest) == slugify(guest_name):
+                runs.append(run)
+    return sorted(runs, key=lambda run: run.manifest["created_at"], reverse=True)
+
+
+def run_exists(run_id: str) -> bool:
+    """True, wenn es zu run_id ein Lauf-Verzeichnis gibt (Locks von --freshness haben keins)."""
+    return (RUNS_DIR / run_id / "run.json").exists()
+
+
+def update_dossier(guest_name: str, old_content: str, new_content: str) -> list[str]:
+    """
+    Ersetzt den Dossier-Checkpoint der Läufe eines Gastes, deren Dossier old_content ist
+    (z.B. nach einer Neufassung einzelner Abschnitte). Sonst stellte --resume bzw. ein
+    wartender Lauf das alte Dossier wieder her. Gibt die IDs der aktualisierten Läufe zurück.
+    """
+    updated = []
+    for run in list_runs(guest_name):
+        if run.has("dossier") and run.load("dossier") == old_content:
+            run.save("dossier", new_content)
+            updated.append(run.run_id)
+    return updated
+
+
+def discard_empty_run(run_id: str) -> bool:
+    """
+    Löscht einen Lauf, der außer der Disambiguierung nichts enthält – z.B. wenn ein Lauf den
+    eines identischen, parallel gestarteten übernommen hat. Sonst bliebe er als jüngster
+    unvollständiger Lauf liegen und würde von --resume gewählt.
+    """
+    if not (RUNS_DIR / run_id / "run.json").exists():
+        return False
+    run = RunCheckpoint(run_id)
+    if set(run.manifest["stages"]) - {"disambiguation"}:
+        return False
+    shutil.rmtree(run.dir, ignore_errors=True)
+    return True
+
+
+def latest_incomplete_run(guest_name: str) -> Optional[RunCheckpoint]:
+    """Jüngster nicht abgeschlossener Lauf eines Gastes (Kandidat für --resume)."""
+    for run in list_runs(guest_name):
+        if not run.is_complete:
+            return run
+    return None
+
+
+if __name__ == "__main__":
+    guest = sys.argv[1] if len(sys.argv) > 1 else None
+    for run in list_runs(guest):
+        state = "✅" if run.is_complete else "⏸️ "
+        print(f"{state} {run.run_id}  {run.guest}  [{', '.join(run.completed_stages()) or '—'}]")
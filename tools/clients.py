@@ -0,0 +1,201 @@
+"""
+Langlebige API-Clients pro Prozess.
+Jeder Provider-Client wird einmal erzeugt und wiederverwendet, damit TCP- und
+TLS-Handshakes nur beim ersten Call anfallen (Keep-Alive über alle Calls eines
+Pipeline-Laufs und über Streamlit-Reruns hinweg).
+
+Perplexity läuft über eine geteilte requests.Session mit angepasster Pool-Größe
+(PERPLEXITY_POOL_SIZE, Default 10). Anthropic und OpenAI bekommen einen eigenen
+httpx-Pool (DefaultHttpxClient des SDKs), den warm_up() vorab verbinden kann.
+TavilyClient hält keine Session – jeder Request baut seine Verbindung selbst auf,
+ein Vorab-Verbindungsaufbau würde nicht wiederverwendet.
+
+Alle Clients laufen über transport.py: mit PROVIDER_TRANSPORT=record werden Antworten als
+Fixtures aufgezeichnet, mit replay ohne Netzwerk und API-Keys aus den Fixtures bedient.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import transport
+
+PERPLEXITY_BASE_URL = "https://api.perplexity.ai"
+PERPLEXITY_POOL_SIZE = int(os.getenv("PERPLEXITY_POOL_SIZE", "10"))
+
+_clients: dict[tuple[str, str], object] = {}
+_lock = threading.Lock()
+
+# Verbindungs-Pools der geteilten Clients für warm_up(): Provider → (Pool, Basis-URL)
+_pools: dict[str, tuple[object, str]] = {}
+
+
+def _require_key(env_name: str) -> str:
+    api_key = os.getenv(env_name)
+    if not api_key:
+        raise ValueError(f"{env_name} nicht in .env gesetzt")
+    return api_key
+
+
+def _get_or_create(provider: str, api_key: str, factory):
+    # Schlüssel enthält den API-Key, damit ein geänderter Key (z.B. via st.secrets) greift
+    key = (provider, api_key)
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = factory(api_key)
+                _clients[key] = client
+    return client
+
+
+def anthropic_client():
+    """Geteilter anthropic.Anthropic-Client."""
+    if transport.is_offline():
+        return transport.replay_client("anthropic")
+    import anthropic
+
+    def factory(api_key: str):
+        http_client = anthropic.DefaultHttpxClient()
+        client = anthropic.Anthropic(api_key=api_key, http_client=http_client)
+        _pools["anthropic"] = (http_client, str(client.base_url))
+        return client
+
+    client = _get_or_create("anthropic", _require_key("ANTHROPIC_API_KEY"), factory)
+    return transport.wrap("anthropic", client)
+
+
+def openai_client():
+    """Geteilter OpenAI-Client."""
+    if transport.is_offline():
+        return transport.replay_client("openai")
+    from openai import DefaultHttpxClient, OpenAI
+
+    def factory(api_key: str):
+        http_client = DefaultHttpxClient()
+        # Wiederholungen übernimmt resilience.py (Retry-Policy + Circuit Breaker), nicht das SDK
+        client = OpenAI(api_key=api_key, max_retries=0, http_client=http_client)
+        _pools["openai"] = (http_client, str(client.base_url))
+        return client
+
+    client = _get_or_create("openai", _require_key("OPENAI_API_KEY"), factory)
+    return transport.wrap("openai", client)
+
+
+def tavily_client():
+    """Geteilter TavilyClient."""
+    if transport.is_offline():
+        return transport.replay_client("tavily")
+    from tavily import TavilyClient
+
+    client = _get_or_create("tavily", _require_key("TAVILY_API_KEY"), lambda key: TavilyClient(api_key=key))
+    return transport.wrap("tavily", client)
+
+
+def perplexity_session():
+    """Geteilte requests.Session für Perplexity mit Auth-Header und Connection-Pool."""
+    if transport.is_offline():
+        return transport.replay_client("perplexity")
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    def factory(api_key: str):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=PERPLEXITY_POOL_SIZE)
+        session.mount("https://", adapter)
+        session.headers.update({
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+        })
+        _pools["perplexity"] = (session, PERPLEXITY_BASE_URL)
+        return session
+
+    session = _get_or_create("perplexity", _require_key("PERPLEXITY_API_KEY"), factory)
+    return transport.wrap("perplexity", session)
+
+
+def create_async_client(provider: str):
+    """
+    Neuer Async-Client für async_engine.py (AsyncAnthropic, AsyncOpenAI, AsyncTavilyClient,
+    httpx.AsyncClient für Perplexity). Async-Clients hängen an ihrem Event-Loop und werden
+    deshalb nicht geteilt – der Aufrufer schließt sie wieder.
+    """
+    if transport.is_offline():
+        return transport.replay_client(provider, is_async=True)
+    if provider == "anthropic":
+        from anthropic import AsyncAnthropic
+
+        client = AsyncAnthropic(api_key=_require_key("ANTHROPIC_API_KEY"))
+    elif provider == "openai":
+        from openai import AsyncOpenAI
+
+        client = AsyncOpenAI(api_key=_require_key("OPENAI_API_KEY"), max_retries=0)
+    elif provider == "tavily":
+        from tavily import AsyncTavilyClient
+
+        client = AsyncTavilyClient(api_key=_require_key("TAVILY_API_KEY"))
+    elif provider == "perplexity":
+        import httpx
+
+        client = httpx.AsyncClient(
+            headers={
+                "Authorization": f"Bearer {_require_key('PERPLEXITY_API_KEY')}",
+                "Content-Type": "application/json",
+            },
+            limits=httpx.Limits(max_connections=PERPLEXITY_POOL_SIZE, max_keepalive_connections=PERPLEXITY_POOL_SIZE),
+        )
+    else:
+        raise ValueError(f"Unbekannter Provider: {provider}")
+    return transport.wrap(provider, client, is_async=True)
+
+
+def _connect(name: str) -> None:
+    """Baut eine Verbindung im Pool des Providers auf (die Antwort selbst ist egal)."""
+    pool, url = _pools[name]
+    try:
+        pool.head(url, timeout=5)
+    except Exception:
+        pass
+
+
+def warm_up(connect: bool = True) -> list[str]:
+    """
+    Erzeugt alle Clients, für die ein API-Key gesetzt ist (z.B. beim App-Start).
+    Mit connect=True werden zusätzlich die Verbindungen zu Anthropic, OpenAI und Perplexity
+    parallel aufgebaut, damit der erste echte Request keinen Handshake mehr zahlt (Tavily
+    hält keine Verbindung, siehe oben). Gibt die bereiten Provider zurück.
+    """
+    if transport.is_offline():
+        return []
+    ready = []
+    for name, factory in [
+        ("anthropic", anthropic_client),
+        ("openai", openai_client),
+        ("tavily", tavily_client),
+        ("perplexity", perplexity_session),
+    ]:
+        try:
+            factory()
+        except (ValueError, ImportError):
+            continue
+        ready.append(name)
+    pooled = [name for name in ready if name in _pools]
+    if connect and pooled:
+        with ThreadPoolExecutor(max_workers=len(pooled), thread_name_prefix="warm-up") as pool:
+            list(pool.map(_connect, pooled))
+    return ready
+
+
+def reset() -> None:
+    """Verwirft alle Clients (z.B. nach Key-Rotation)."""
+    with _lock:
+        for client in _clients.values():
+            close = getattr(client, "close", None)
+            if close:
+                try:
+                    close()
+                except Exception:
+                    pass
+        _clients.clear()
+        _pools.clear()
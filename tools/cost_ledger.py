@@ -0,0 +1,299 @@
+"""
+Kosten-Ledger: eine Zeile pro API-Call mit Provider, Modell, Tokens, Latenz und Kosten.
+Die Einträge schreibt die Transportschicht (transport.py) automatisch für jeden echten Call;
+Gast-Slug und Lauf-ID kommen aus dem Lauf-Kontext (run_context), den die Pipeline setzt.
+
+Budgets (USD, 0 = kein Limit) werden VOR einem Lauf geprüft:
+    BUDGET_DAILY_USD, BUDGET_MONTHLY_USD, BUDGET_PER_GUEST_USD (pro Gast und Monat)
+    BUDGET_POLICY=refuse     Lauf ablehnen (BudgetExceededError)
+    BUDGET_POLICY=downgrade  Lauf im Sparmodus: günstigere Modelle, kein Hedging
+
+Preise (USD pro 1 Mio. Tokens bzw. pro Call) stehen in PRICES und lassen sich per
+COST_PRICES_PATH (JSON im selben Format) überschreiben.
+
+Usage:
+    python tools/cost_ledger.py report [--by guest|day|month] [--since YYYY-MM-DD]
+    python tools/cost_ledger.py budget
+"""
+
+import argparse
+import contextvars
+import json
+import os
+import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+LEDGER_PATH = PROJECT_ROOT / ".tmp" / "cost_ledger.sqlite"
+
+# USD pro 1 Mio. Tokens (input, output, cache_read, cache_write) und Gebühr pro Call
+PRICES = {
+    "claude-sonnet-4-5-20250929": {"input": 3.00, "output": 15.00, "cache_read": 0.30, "cache_write": 3.75},
+    "claude-haiku-4-5-20251001": {"input": 1.00, "output": 5.00, "cache_read": 0.10, "cache_write": 1.25},
+    "gpt-4o": {"input": 2.50, "output": 10.00, "cache_read": 1.25, "per_call": 0.025},
+    "gpt-4o-mini": {"input": 0.15, "output": 0.60, "cache_read": 0.075, "per_call": 0.025},
+    "sonar-pro": {"input": 3.00, "output": 15.00, "per_call": 0.010},
+    "sonar": {"input": 1.00, "output": 1.00, "per_call": 0.008},
+    # Tavily rechnet in Credits: basic = 1, advanced = 2
+    "tavily-basic": {"per_call": 0.008},
+    "tavily-advanced": {"per_call": 0.016},
+}
+
+# Sparmodus: günstigeres Modell pro Standardmodell
+ECONOMY_MODELS = {
+    "claude-sonnet-4-5-20250929": "claude-haiku-4-5-20251001",
+    "gpt-4o": "gpt-4o-mini",
+    "sonar-pro": "sonar",
+}
+
+BUDGET_POLICIES = ("refuse", "downgrade")
+
+_context: contextvars.ContextVar[dict] = contextvars.ContextVar("cost_context", default={})
+
+
+class BudgetExceededError(RuntimeError):
+    """Ein Budget ist ausgeschöpft und BUDGET_POLICY=refuse."""
+
+    def __init__(self, budget: str, spent: float, limit: float):
+        self.budget = budget
+        self.spent = spent
+        self.limit = limit
+        super().__init__(f"Budget '{budget}' ausgeschöpft: {spent:.2f} von {limit:.2f} USD")
+
+
+def _prices() -> dict:
+    path = os.getenv("COST_PRICES_PATH")
+    if not path:
+        return PRICES
+    return {**PRICES, **json.loads(Path(path).read_text(encoding="utf-8"))}
+
+
+def _connect() -> sqlite3.Connection:
+    LEDGER_PATH.parent.mkdir(exist_ok=True)
+    conn = sqlite3.connect(LEDGER_PATH, timeout=30)
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS calls (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ts REAL NOT NULL,
+            day TEXT NOT NULL,
+            month TEXT NOT NULL,
+            provider TEXT NOT NULL,
+            operation TEXT NOT NULL,
+            model TEXT NOT NULL,
+            input_tokens INTEGER NOT NULL,
+            output_tokens INTEGER NOT NULL,
+            cache_read_tokens INTEGER NOT NULL,
+            cache_write_tokens INTEGER NOT NULL,
+            latency_ms REAL NOT NULL,
+            cost_usd REAL NOT NULL,
+            guest TEXT NOT NULL,
+            run_id TEXT NOT NULL,
+            ok INTEGER NOT NULL
+        )"""
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_calls_day ON calls(day)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_calls_month_guest ON calls(month, guest)")
+    return conn
+
+
+# --- Lauf-Kontext ---
+
+@contextmanager
+def run_context(guest: str = "", run_id: str = "", economy: bool = False):
+    """Ordnet alle Calls innerhalb des Blocks einem Gast und Lauf zu (economy: Sparmodus)."""
+    token = _context.set({"guest": guest, "run_id": run_id, "economy": economy})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+def economy_mode() -> bool:
+    """True, wenn der aktuelle Lauf wegen eines Budgets im Sparmodus läuft."""
+    return _context.get().get("economy", False)
+
+
+def model_for(model: str) -> str:
+    """Das zu verwendende Modell: im Sparmodus die günstigere Variante (ECONOMY_MODELS)."""
+    return ECONOMY_MODELS.get(model, model) if economy_mode() else model
+
+
+# --- Erfassung ---
+
+def _get(obj, name: str, default=0):
+    if isinstance(obj, dict):
+        return obj.get(name, default)
+    return getattr(obj, name, default)
+
+
+def usage_from_response(provider: str, operation: str, request: dict, response) -> dict:
+    """Modell und Token-Zahlen aus Request/Antwort eines Providers."""
+    if provider == "tavily":
+        depth = request.get("search_depth", "basic")
+        return {"model": f"tavily-{depth}"}
+    if provider == "perplexity":
+        body = request.get("json") or {}
+        try:
+            usage = response.json().get("usage", {}) if response is not None else {}
+        except ValueError:
+            usage = {}
+        return {
+            "model": body.get("model", "unknown"),
+            "input_tokens": usage.get("prompt_tokens", 0),
+            "output_tokens": usage.get("completion_tokens", 0),
+        }
+    usage = _get(response, "usage", None)
+    result = {"model": request.get("model", "unknown")}
+    if usage is None:
+        return result
+    if provider == "openai":
+        details = _get(usage, "input_tokens_details", None)
+        cached = _get(details, "cached_tokens", 0) if details is not None else 0
+        result.update(input_tokens=(_get(usage, "input_tokens") or 0) - (cached or 0), output_tokens=_get(usage, "output_tokens") or 0, cache_read_tokens=cached or 0)
+        return result
+    result.update(
+        input_tokens=_get(usage, "input_tokens") or 0,
+        output_tokens=_get(usage, "output_tokens") or 0,
+        cache_read_tokens=_get(usage, "cache_read_input_tokens") or 0,
+        cache_write_tokens=_get(usage, "cache_creation_input_tokens") or 0,
+    )
+    return result
+
+
+def compute_cost(model: str, input_tokens: int = 0, output_tokens: int = 0, cache_read_tokens: int = 0, cache_write_tokens: int = 0, ok: bool = True) -> float:
+    """Kosten eines Calls in USD (0 für unbekannte Modelle)."""
+    price = _prices().get(model)
+    if price is None:
+        return 0.0
+    cost = (
+        input_tokens * price.get("input", 0)
+        + output_tokens * price.get("output", 0)
+        + cache_read_tokens * price.get("cache_read", price.get("input", 0))
+        + cache_write_tokens * price.get("cache_write", price.get("input", 0))
+    ) / 1_000_000
+    if ok:
+        cost += price.get("per_call", 0)
+    return round(cost, 6)
+
+
+def record_call(provider: str, operation: str, request: dict, response, latency: float, ok: bool = True) -> None:
+    """Schreibt einen Call ins Ledger (Fehler beim Schreiben werden nur gemeldet)."""
+    usage = usage_from_response(provider, operation, request, response if ok else None)
+    tokens = {key: usage.get(key, 0) for key in ("input_tokens", "output_tokens", "cache_read_tokens", "cache_write_tokens")}
+    context = _context.get()
+    now = datetime.now()
+    try:
+        with _connect() as conn:
+            conn.execute(
+                "INSERT INTO calls (ts, day, month, provider, operation, model, input_tokens, output_tokens, "
+                "cache_read_tokens, cache_write_tokens, latency_ms, cost_usd, guest, run_id, ok) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    time.time(), now.strftime("%Y-%m-%d"), now.strftime("%Y-%m"), provider, operation, usage["model"],
+                    *tokens.values(), round(latency * 1000, 1), compute_cost(usage["model"], **tokens, ok=ok),
+                    context.get("guest", ""), context.get("run_id", ""), int(ok),
+                ),
+            )
+    except sqlite3.Error as e:
+        print(f"  ⚠️  Kosten-Ledger konnte nicht geschrieben werden: {e}")
+
+
+# --- Auswertung ---
+
+def spent(day: Optional[str] = None, month: Optional[str] = None, guest: Optional[str] = None) -> float:
+    """Summe der Kosten (USD), gefiltert nach Tag, Monat und/oder Gast-Slug."""
+    clauses, params = [], []
+    for column, value in (("day", day), ("month", month), ("guest", guest)):
+        if value is not None:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    with _connect() as conn:
+        return conn.execute(f"SELECT COALESCE(SUM(cost_usd), 0) FROM calls {where}", params).fetchone()[0]
+
+
+def summary(by: str = "day", since: Optional[str] = None) -> list[dict]:
+    """Aggregierte Calls, Tokens, Kosten und mittlere Latenz pro Gast, Tag oder Monat."""
+    if by not in ("guest", "day", "month"):
+        raise ValueError(f"Unbekannte Gruppierung: {by}")
+    where, params = ("WHERE day >= ?", [since]) if since else ("", [])
+    with _connect() as conn:
+        conn.row_factory = sqlite3.Row
+        rows = conn.execute(
+            f"SELECT {by} AS key, COUNT(*) AS calls, SUM(1 - ok) AS errors, SUM(input_tokens) AS input_tokens, "
+            f"SUM(output_tokens) AS output_tokens, SUM(cache_read_tokens) AS cache_read_tokens, "
+            f"SUM(cost_usd) AS cost_usd, AVG(latency_ms) AS avg_latency_ms "
+            f"FROM calls {where} GROUP BY {by} ORDER BY {by}",
+            params,
+        ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def budgets() -> dict[str, float]:
+    """Konfigurierte Budgets in USD (0 = kein Limit)."""
+    return {
+        "daily": float(os.getenv("BUDGET_DAILY_USD") or 0),
+        "monthly": float(os.getenv("BUDGET_MONTHLY_USD") or 0),
+        "per_guest": float(os.getenv("BUDGET_PER_GUEST_USD") or 0),
+    }
+
+
+def budget_status(guest: str = "") -> list[tuple[str, float, float]]:
+    """(Budget, ausgegeben, Limit) für alle gesetzten Budgets."""
+    now = datetime.now()
+    limits = budgets()
+    status = []
+    if limits["daily"] > 0:
+        status.append(("daily", spent(day=now.strftime("%Y-%m-%d")), limits["daily"]))
+    if limits["monthly"] > 0:
+        status.append(("monthly", spent(month=now.strftime("%Y-%m")), limits["monthly"]))
+    if limits["per_guest"] > 0 and guest:
+        status.append((f"per_guest:{guest}", spent(month=now.strftime("%Y-%m"), guest=guest), limits["per_guest"]))
+    return status
+
+
+def check_budget(guest: str = "") -> bool:
+    """
+    Vor einem Lauf aufrufen. Gibt True zurück, wenn der Lauf im Sparmodus laufen soll
+    (Budget erschöpft, BUDGET_POLICY=downgrade), wirft BudgetExceededError bei refuse.
+    """
+    policy = os.getenv("BUDGET_POLICY", "refuse")
+    if policy not in BUDGET_POLICIES:
+        raise ValueError(f"BUDGET_POLICY muss refuse oder downgrade sein, nicht '{policy}'")
+    for name, amount, limit in budget_status(guest):
+        if amount >= limit:
+            if policy == "refuse":
+                raise BudgetExceededError(name, amount, limit)
+            print(f"  💸 Budget '{name}' ausgeschöpft ({amount:.2f}/{limit:.2f} USD) – Sparmodus")
+            return True
+    return False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Kosten-Ledger")
+    parser.add_argument("command", nargs="?", default="report", choices=["report", "budget"])
+    parser.add_argument("--by", default="day", choices=["guest", "day", "month"])
+    parser.add_argument("--since", help="Nur Calls ab diesem Tag (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    if args.command == "report":
+        rows = summary(args.by, args.since)
+        print(f"{args.by:<24} {'Calls':>6} {'Fehler':>6} {'Input':>10} {'Output':>9} {'Cache':>10} {'Ø ms':>8} {'USD':>9}")
+        for row in rows:
+            print(
+                f"{row['key'] or '—':<24} {row['calls']:>6} {row['errors']:>6} {row['input_tokens']:>10} "
+                f"{row['output_tokens']:>9} {row['cache_read_tokens']:>10} {row['avg_latency_ms']:>8.0f} {row['cost_usd']:>9.4f}"
+            )
+        print(f"{'Summe':<24} {sum(r['calls'] for r in rows):>6} {'':>6} {'':>10} {'':>9} {'':>10} {'':>8} {sum(r['cost_usd'] for r in rows):>9.4f}")
+    else:
+        status = budget_status()
+        if not status:
+            print("Keine Budgets gesetzt (BUDGET_DAILY_USD, BUDGET_MONTHLY_USD, BUDGET_PER_GUEST_USD).")
+        for name, amount, limit in status:
+            print(f"  {name:<12} {amount:>8.2f} / {limit:.2f} USD ({amount / limit * 100:.0f}%)")
+        print(f"  Policy: {os.getenv('BUDGET_POLICY', 'refuse')}")
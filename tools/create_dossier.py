@@ -7,11 +7,22 @@ Moderations-Dossier im definierten Format.
 import os
 import sys
 import re
+import time
 from datetime import datetime
 from pathlib import Path
+from typing import Optional
 
 from dotenv import load_dotenv
 
+import archive_index
+import checkpoints
+import clients
+import cost_ledger
+import dossier_sections
+import rate_limit
+import tracing
+from research_guest import REALTIME_MARKER, identity_slug, research_path_for, slugify
+
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 load_dotenv(PROJECT_ROOT / ".env")
 
@@ -27,17 +38,11 @@ Du bist ein erfahrener Chefredakteur und Stratege für eine hochwertige Unterhal
 * Formatierung: Nutze Emojis sparsam zur Orientierung. Nutze Fettungen für Schlüsselwörter.
 * WICHTIG: Beginne das Dossier IMMER mit dem Inhaltsverzeichnis (Navigation) wie im Format vorgegeben. Halte dich EXAKT an die vorgegebenen HTML-Anker-IDs."""
 
-DOSSIER_USER_PROMPT = """# DEINE INPUTS
-
-## SHOW_INFO
+# Statischer Teil des User-Prompts: für alle Gäste identisch und daher als
+# Prompt-Cache-Block markiert (SHOW_INFO + Ziel-Format).
+DOSSIER_FORMAT_PROMPT = """# SHOW_INFO
 {show_info}
 
-## RESEARCH_DATA
-{research_data}
-
-## ECHTZEIT-DATEN (für Freshness-Check)
-{realtime_data}
-
 # DAS ZIEL-FORMAT (DOSSIER STRUKTUR)
 Erstelle das Dossier strikt nach folgender Struktur. Nutze Markdown (Fettungen, Bulletpoints), um es scannbar zu machen.
 
@@ -114,17 +119,69 @@ Formuliere 3 konkrete Fragen, die den Gast aus der Reserve locken.
 * **Breaking News:** Gab es heute Schlagzeilen?
 * **Social Media:** Was war der allerletzte Post? (Damit der Moderator sagen kann: "Ich hab gesehen, du hast heute morgen...")"""
 
+# Gast-spezifischer Teil: wird hinter dem gecachten Präfix angehängt
+DOSSIER_INPUT_PROMPT = """# AKTUELLES DATUM
+Heute ist der {today}. Informationen aus 2025 und 2026 sind GEGENWART — behandle sie als aktuell. Schreibe niemals, dass etwas 'in der Zukunft' liegt oder 'noch nicht bekannt' ist, wenn es sich um Ereignisse aus 2025/2026 handelt.
+
+# DEINE INPUTS
+
+## RESEARCH_DATA
+{research_data}
+
+## ECHTZEIT-DATEN (für Freshness-Check)
+{realtime_data}
+
+Erstelle jetzt das Dossier strikt nach dem oben definierten Ziel-Format."""
 
-def slugify(name: str) -> str:
-    """Wandelt einen Namen in einen Dateinamen-tauglichen String um."""
-    slug = name.lower().strip()
-    slug = re.sub(r"[äÄ]", "ae", slug)
-    slug = re.sub(r"[öÖ]", "oe", slug)
-    slug = re.sub(r"[üÜ]", "ue", slug)
-    slug = re.sub(r"ß", "ss", slug)
-    slug = re.sub(r"[^a-z0-9]+", "_", slug)
-    slug = slug.strip("_")
-    return slug
+# Freshness-Refresh: nur Abschnitt 7 und die Vibe-Zeile neu schreiben (gleiches gecachtes Präfix)
+FRESHNESS_PROMPT = """# AKTUELLES DATUM
+Heute ist der {today}. Informationen aus 2025 und 2026 sind GEGENWART — behandle sie als aktuell.
+
+# AUFGABE
+Das Dossier für {guest_name} existiert bereits. Aktualisiere NUR den Abschnitt "7. FRESHNESS CHECK"
+und die Zeile "Der aktuelle Vibe" im Cheat Sheet anhand der neuen Echtzeit-Daten.
+
+## BISHERIGES CHEAT SHEET
+{cheat_sheet}
+
+## BISHERIGER FRESHNESS CHECK
+{freshness}
+
+## NEUE ECHTZEIT-DATEN
+{realtime_data}
+
+# ANTWORTFORMAT
+Antworte EXAKT in diesem Format, ohne weitere Einleitung:
+
+VIBE: <neuer Text für "Der aktuelle Vibe", eine Zeile>
+<a id="freshness-check"></a>
+# 7. FRESHNESS CHECK
+<neuer Abschnittsinhalt im Ziel-Format>"""
+
+# Einzelnen Abschnitt neu schreiben (gleiches gecachtes Präfix, Rest des Dossiers als Kontext)
+SECTION_PROMPT = """# AKTUELLES DATUM
+Heute ist der {today}. Informationen aus 2025 und 2026 sind GEGENWART — behandle sie als aktuell.
+
+# DEINE INPUTS
+
+## RESEARCH_DATA
+{research_data}
+
+## ECHTZEIT-DATEN (für Freshness-Check)
+{realtime_data}
+
+## BESTEHENDES DOSSIER
+{dossier}
+
+# AUFGABE
+Die Redaktion ist mit dem Abschnitt "{section_title}" (Anker-ID "{anchor}") nicht zufrieden.
+Schreibe NUR diesen Abschnitt neu – strikt nach dem Ziel-Format, mit neuen Ideen und ohne
+Inhalte anderer Abschnitte zu wiederholen.{instructions}
+
+Beginne exakt mit <a id="{anchor}"></a> und der Abschnittsüberschrift. Keine Einleitung, keine weiteren Abschnitte."""
+
+# Prompt-Cache-Lebensdauer: "5m" (Standard) oder "1h" (lohnt bei wenigen Dossiers pro Stunde)
+PROMPT_CACHE_TTL = os.getenv("PROMPT_CACHE_TTL", "5m")
 
 
 def load_show_info() -> str:
@@ -134,72 +191,363 @@ def load_show_info() -> str:
     return SHOW_INFO_PATH.read_text(encoding="utf-8")
 
 
-def create_dossier(guest_name: str, research_path: Path, on_chunk=None) -> Path:
-    """Erstellt das Dossier via Claude API. on_chunk(text) wird bei jedem Streaming-Chunk aufgerufen."""
-    import anthropic
+class StreamBuffer:
+    """
+    Sammelt Streaming-Chunks. Der Gesamttext wird erst bei Bedarf zusammengefügt
+    und bis zum nächsten Chunk gecacht – Anhängen bleibt O(1).
+    """
+
+    def __init__(self):
+        self._chunks: list[str] = []
+        self._text = ""
+        self._joined = 0
+        self.length = 0
+
+    def append(self, delta: str) -> None:
+        self._chunks.append(delta)
+        self.length += len(delta)
+
+    @property
+    def text(self) -> str:
+        if self._joined < len(self._chunks):
+            self._text += "".join(self._chunks[self._joined:])
+            self._joined = len(self._chunks)
+        return self._text
+
+
+class ThrottledPreview:
+    """
+    on_chunk-Callback, der Deltas sammelt und render(text) höchstens
+    max_per_second-mal pro Sekunde aufruft (und nur, wenn mindestens min_chars
+    neue Zeichen da sind). flush() rendert den letzten Stand.
+    """
+
+    def __init__(self, render, max_per_second: float = 4.0, min_chars: int = 1):
+        self.render = render
+        self.interval = 1.0 / max_per_second if max_per_second > 0 else 0.0
+        self.min_chars = min_chars
+        self.pending = 0
+        self.last_render = 0.0
+        self.buffer: Optional[StreamBuffer] = None
+        self.renders = 0
+
+    def __call__(self, delta: str, buffer: StreamBuffer) -> None:
+        self.buffer = buffer
+        self.pending += len(delta)
+        now = time.monotonic()
+        if self.pending >= self.min_chars and now - self.last_render >= self.interval:
+            self._render(now)
+
+    def _render(self, now: float) -> None:
+        self.render(self.buffer.text)
+        self.pending = 0
+        self.last_render = now
+        self.renders += 1
+
+    def flush(self) -> None:
+        if self.buffer is not None and self.pending:
+            self._render(time.monotonic())
+
+
+def split_research(research_content: str) -> tuple[str, str]:
+    """Trennt Research und Echtzeit-Daten (Tavily-Teil)."""
+    if REALTIME_MARKER in research_content:
+        parts = research_content.split(REALTIME_MARKER, 1)
+        return parts[0].strip(), REALTIME_MARKER + parts[1]
+    return research_content, "Keine Echtzeit-Daten verfügbar."
+
+
+def _cache_control() -> dict:
+    control = {"type": "ephemeral"}
+    if PROMPT_CACHE_TTL == "1h":
+        control["ttl"] = "1h"
+    return control
+
+
+def build_prompt(show_info: str, dynamic_text: str) -> tuple[list[dict], list[dict]]:
+    """
+    Baut System-Prompt und User-Nachricht so, dass das unveränderliche Präfix
+    (System-Prompt, SHOW_INFO, Ziel-Format) als ein Prompt-Cache-Block vorangeht
+    und nur dynamic_text (Datum, Research) pro Gast neu verarbeitet wird.
+    """
+    with tracing.span("prompt_assembly") as span:
+        system, messages = _assemble_prompt(show_info, dynamic_text)
+        span.set(
+            static_bytes=len(DOSSIER_SYSTEM_PROMPT.encode("utf-8")) + len(messages[0]["content"][0]["text"].encode("utf-8")),
+            dynamic_bytes=len(dynamic_text.encode("utf-8")),
+        )
+    return system, messages
+
+
+def _assemble_prompt(show_info: str, dynamic_text: str) -> tuple[list[dict], list[dict]]:
+    system = [{"type": "text", "text": DOSSIER_SYSTEM_PROMPT}]
+    messages = [
+        {
+            "role": "user",
+            "content": [
+                {
+                    "type": "text",
+                    "text": DOSSIER_FORMAT_PROMPT.format(show_info=show_info),
+                    "cache_control": _cache_control(),
+                },
+                {"type": "text", "text": dynamic_text},
+            ],
+        }
+    ]
+    return system, messages
+
+
+def usage_to_dict(usage) -> dict:
+    """Token-Verbrauch einer Anthropic-Antwort inkl. Prompt-Cache-Treffern."""
+    return {
+        "input_tokens": getattr(usage, "input_tokens", 0) or 0,
+        "output_tokens": getattr(usage, "output_tokens", 0) or 0,
+        "cache_creation_input_tokens": getattr(usage, "cache_creation_input_tokens", 0) or 0,
+        "cache_read_input_tokens": getattr(usage, "cache_read_input_tokens", 0) or 0,
+    }
+
+
+def print_usage(usage: dict) -> None:
+    """Gibt Token-Verbrauch und Cache-Status aus."""
+    if usage["cache_read_input_tokens"]:
+        cache_state = "Cache-Hit"
+    elif usage["cache_creation_input_tokens"]:
+        cache_state = "Cache-Miss (Präfix gespeichert)"
+    else:
+        cache_state = "kein Cache"
+    print(
+        f"  📊 Tokens: {usage['input_tokens']} Input, "
+        f"{usage['cache_read_input_tokens']} aus Cache, "
+        f"{usage['cache_creation_input_tokens']} in Cache geschrieben, "
+        f"{usage['output_tokens']} Output – {cache_state}"
+    )
 
-    api_key = os.getenv("ANTHROPIC_API_KEY")
-    if not api_key:
-        raise ValueError("ANTHROPIC_API_KEY nicht in .env gesetzt")
+
+def _stream_request(system: list[dict], messages: list[dict], max_tokens: int) -> dict:
+    """Parameter des Streaming-Calls (auch für async_engine.py)."""
+    return {
+        "model": cost_ledger.model_for("claude-sonnet-4-5-20250929"),
+        "max_tokens": max_tokens,
+        "system": system,
+        "messages": messages,
+    }
+
+
+def _stream_message(client, system: list[dict], messages: list[dict], max_tokens: int, on_chunk, **attributes):
+    """
+    Streamt eine Claude-Antwort in einen StreamBuffer und ruft on_chunk(delta, buffer) pro Chunk auf.
+    Traced als "dossier_stream" mit Time-to-first-Token, Streaming-Dauer und Tokens.
+    Gibt (buffer, final_message) zurück.
+    """
+    buffer = StreamBuffer()
+    rate_limit.acquire("anthropic")
+    with tracing.span("dossier_stream", provider="anthropic", **attributes) as span:
+        with client.messages.stream(**_stream_request(system, messages, max_tokens)) as stream:
+            for text in stream.text_stream:
+                if not buffer.length:
+                    span.set(ttft_ms=round(span.elapsed_ms(), 1))
+                buffer.append(text)
+                if on_chunk:
+                    on_chunk(text, buffer)
+            final_message = stream.get_final_message()
+        span.set(output_chars=buffer.length, **usage_to_dict(final_message.usage))
+    return buffer, final_message
+
+
+def create_dossier(guest_name: str, research_path: Path, on_chunk=None, usage: Optional[dict] = None, context_hint: str = "") -> Path:
+    """
+    Erstellt das Dossier via Claude API.
+    on_chunk(delta, buffer) wird bei jedem Streaming-Chunk mit dem neuen Textstück und
+    dem StreamBuffer (Gesamttext über buffer.text) aufgerufen. Für Live-Vorschauen
+    ThrottledPreview verwenden; hat der Callback eine flush()-Methode, wird sie am Ende aufgerufen.
+    usage: Optionales Dict, das mit dem Token-Verbrauch (inkl. Prompt-Cache) befüllt wird.
+    context_hint: Identifikations-Hinweis, bestimmt den Dateinamen (siehe save_dossier).
+    """
+    client = clients.anthropic_client()
 
     print(f"📝 Erstelle Dossier für: {guest_name}")
+    system, messages = _dossier_prompt(research_path)
+    buffer, final_message = _stream_message(client, system, messages, 8000, on_chunk, guest=slugify(guest_name), section="all")
+    _report_usage(final_message, on_chunk, usage)
+
+    print("  ✓ Dossier generiert")
+
+    return save_dossier(guest_name, buffer.text, context_hint)
 
+
+def _dossier_prompt(research_path: Path) -> tuple[list[dict], list[dict]]:
+    """System-Prompt und Nachricht für ein komplettes Dossier aus dem gespeicherten Research."""
     # Inputs laden
     show_info = load_show_info()
     research_content = research_path.read_text(encoding="utf-8")
 
     # Research und Echtzeit-Daten trennen (Tavily-Teil extrahieren)
-    realtime_marker = "## Echtzeit-Check (Tavily)"
-    if realtime_marker in research_content:
-        parts = research_content.split(realtime_marker, 1)
-        research_data = parts[0].strip()
-        realtime_data = realtime_marker + parts[1]
-    else:
-        research_data = research_content
-        realtime_data = "Keine Echtzeit-Daten verfügbar."
+    research_data, realtime_data = split_research(research_content)
 
     # Claude API aufrufen (Streaming, um Timeouts zu vermeiden)
     print("  → Claude API aufrufen (Streaming)...")
-    client = anthropic.Anthropic(api_key=api_key)
 
     today = datetime.now().strftime("%d.%m.%Y")
-    system_with_date = (
-        DOSSIER_SYSTEM_PROMPT
-        + f"\n\n# AKTUELLES DATUM\nHeute ist der {today}. "
-        "Informationen aus 2025 und 2026 sind GEGENWART — behandle sie als aktuell. "
-        "Schreibe niemals, dass etwas 'in der Zukunft' liegt oder 'noch nicht bekannt' ist, wenn es sich um Ereignisse aus 2025/2026 handelt."
+    return build_prompt(
+        show_info,
+        DOSSIER_INPUT_PROMPT.format(today=today, research_data=research_data, realtime_data=realtime_data),
     )
 
-    dossier_content = ""
-    with client.messages.stream(
-        model="claude-sonnet-4-5-20250929",
-        max_tokens=8000,
-        system=system_with_date,
-        messages=[
-            {
-                "role": "user",
-                "content": DOSSIER_USER_PROMPT.format(
-                    show_info=show_info,
-                    research_data=research_data,
-                    realtime_data=realtime_data,
-                ),
-            }
-        ],
-    ) as stream:
-        for text in stream.text_stream:
-            dossier_content += text
-            if on_chunk:
-                on_chunk(dossier_content)
 
-    print("  ✓ Dossier generiert")
+def _report_usage(final_message, on_chunk, usage: Optional[dict]) -> None:
+    """Gibt den Token-Verbrauch aus, befüllt usage und ruft on_chunk.flush() auf (falls vorhanden)."""
+    token_usage = usage_to_dict(final_message.usage)
+    print_usage(token_usage)
+    if usage is not None:
+        usage.update(token_usage)
+
+    flush = getattr(on_chunk, "flush", None)
+    if flush:
+        flush()
+
+
+def latest_dossier(guest_name: str, context_hint: str = "") -> Optional[Path]:
+    """Jüngstes gespeichertes Dossier einer Gast-Identität (None, falls keins existiert)."""
+    dossier_dir = PROJECT_ROOT / "dossiers"
+    candidates = sorted(dossier_dir.glob(f"{identity_slug(guest_name, context_hint)}_????-??-??.md"))
+    return candidates[-1] if candidates else None
+
+
+def _parse_freshness_response(text: str) -> tuple[str, str]:
+    """Zerlegt die Antwort des Freshness-Refreshs in (Vibe-Zeile, Abschnitt 7)."""
+    vibe = ""
+    match = re.search(r"^VIBE:\s*(.+)$", text, re.MULTILINE)
+    if match:
+        vibe = match.group(1).strip()
+        text = text[match.end():]
+    return vibe, text.strip()
+
+
+def refresh_freshness(
+    guest_name: str,
+    research_path: Path,
+    dossier_path: Optional[Path] = None,
+    usage: Optional[dict] = None,
+    context_hint: str = "",
+) -> Path:
+    """
+    Schreibt nur den Freshness Check (Abschnitt 7) und die Vibe-Zeile eines bestehenden
+    Dossiers mit den aktuellen Echtzeit-Daten neu; alle anderen Abschnitte bleiben unverändert.
+    Gespeichert wird als Dossier mit heutigem Datum; der Dossier-Checkpoint des zugehörigen
+    Laufs wird mit aktualisiert.
+    """
+    dossier_path = dossier_path or latest_dossier(guest_name, context_hint)
+    if dossier_path is None or not dossier_path.exists():
+        raise FileNotFoundError(f"Kein Dossier für '{guest_name}' vorhanden – bitte zuerst die komplette Pipeline ausführen.")
+
+    client = clients.anthropic_client()
+    print(f"🔄 Aktualisiere Freshness Check: {dossier_path.name}")
+
+    dossier_content = dossier_path.read_text(encoding="utf-8")
+    _, realtime_data = split_research(research_path.read_text(encoding="utf-8"))
+    system, messages = build_prompt(
+        load_show_info(),
+        FRESHNESS_PROMPT.format(
+            today=datetime.now().strftime("%d.%m.%Y"),
+            guest_name=guest_name,
+            cheat_sheet=dossier_sections.get_section(dossier_content, "cheat-sheet"),
+            freshness=dossier_sections.get_section(dossier_content, "freshness-check"),
+            realtime_data=realtime_data,
+        ),
+    )
+
+    rate_limit.acquire("anthropic")
+    response = client.messages.create(
+        model=cost_ledger.model_for("claude-sonnet-4-5-20250929"),
+        max_tokens=2000,
+        system=system,
+        messages=messages,
+    )
+    token_usage = usage_to_dict(response.usage)
+    print_usage(token_usage)
+    if usage is not None:
+        usage.update(token_usage)
+
+    vibe, freshness = _parse_freshness_response(response.content[0].text)
+    previous_content = dossier_content
+    dossier_content = dossier_sections.replace_section(dossier_content, "freshness-check", freshness)
+    if vibe:
+        dossier_content = dossier_sections.replace_vibe(dossier_content, vibe)
+
+    print("  ✓ Freshness Check aktualisiert")
+    output_path = save_dossier(guest_name, dossier_content, context_hint)
+    for run_id in checkpoints.update_dossier(guest_name, previous_content, dossier_content):
+        print(f"  ↻ Checkpoint aktualisiert: {run_id}")
+    return output_path
+
+
+def regenerate_section(
+    guest_name: str,
+    dossier_path: Path,
+    anchor: str,
+    research_path: Optional[Path] = None,
+    instructions: str = "",
+    on_chunk=None,
+    usage: Optional[dict] = None,
+    context_hint: str = "",
+) -> Path:
+    """
+    Schreibt einen einzelnen Abschnitt (Anker-ID, z.B. "killer-fragen") eines bestehenden
+    Dossiers neu und setzt ihn an derselben Stelle ein. Output-Tokens und Wartezeit
+    entsprechen nur dem Abschnitt. Das Dossier wird in-place aktualisiert, ebenso der
+    Dossier-Checkpoint des zugehörigen Laufs.
+    instructions: optionaler Hinweis der Redaktion (z.B. "frecher, weniger Politik").
+    on_chunk/usage: wie bei create_dossier.
+    """
+    if anchor not in dossier_sections.SECTION_IDS:
+        raise ValueError(f"Unbekannter Abschnitt: {anchor}")
+    research_path = research_path or research_path_for(guest_name, context_hint)
+    dossier_content = dossier_path.read_text(encoding="utf-8")
+    dossier_sections.get_section(dossier_content, anchor)  # KeyError, falls der Anker im Dossier fehlt
+
+    client = clients.anthropic_client()
+    section_title = dossier_sections.SECTION_LABELS[anchor]
+    print(f"✏️  Schreibe Abschnitt neu: {section_title} ({dossier_path.name})")
+
+    research_data, realtime_data = split_research(research_path.read_text(encoding="utf-8"))
+    system, messages = build_prompt(
+        load_show_info(),
+        SECTION_PROMPT.format(
+            today=datetime.now().strftime("%d.%m.%Y"),
+            research_data=research_data,
+            realtime_data=realtime_data,
+            dossier=dossier_content,
+            section_title=section_title,
+            anchor=anchor,
+            instructions=f"\n\nHinweis der Redaktion: {instructions.strip()}" if instructions.strip() else "",
+        ),
+    )
+
+    buffer, final_message = _stream_message(client, system, messages, 3000, on_chunk, guest=slugify(guest_name), section=anchor)
+    _report_usage(final_message, on_chunk, usage)
+
+    previous_content = dossier_content
+    dossier_content = dossier_sections.replace_section(dossier_content, anchor, buffer.text)
+    with tracing.span("file_write", kind="dossier", guest=slugify(guest_name), path=dossier_path.name, bytes=len(dossier_content.encode("utf-8"))):
+        dossier_path.write_text(dossier_content, encoding="utf-8")
+        archive_index.record(dossier_path, "dossier", guest_name, dossier_content)
+    for run_id in checkpoints.update_dossier(guest_name, previous_content, dossier_content):
+        print(f"  ↻ Checkpoint aktualisiert: {run_id}")
+
+    print(f"✅ Abschnitt aktualisiert: {dossier_path}")
+    return dossier_path
+
 
-    # Speichern
+def save_dossier(guest_name: str, dossier_content: str, context_hint: str = "") -> Path:
+    """Speichert ein Dossier unter dossiers/{slug}_{datum}.md (slug: siehe research_guest.identity_slug)."""
     dossier_dir = PROJECT_ROOT / "dossiers"
     dossier_dir.mkdir(exist_ok=True)
-    slug = slugify(guest_name)
+    slug = identity_slug(guest_name, context_hint)
     date_str = datetime.now().strftime("%Y-%m-%d")
     output_path = dossier_dir / f"{slug}_{date_str}.md"
-    output_path.write_text(dossier_content, encoding="utf-8")
+    with tracing.span("file_write", kind="dossier", guest=slug, path=output_path.name, bytes=len(dossier_content.encode("utf-8"))):
+        output_path.write_text(dossier_content, encoding="utf-8")
+        archive_index.record(output_path, "dossier", guest_name, dossier_content)
 
     print(f"✅ Dossier gespeichert: {output_path}")
     return output_path
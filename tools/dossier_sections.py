@@ -0,0 +1,93 @@
+"""
+Abschnitte eines Dossiers über ihre HTML-Anker adressieren.
+Jeder Hauptabschnitt beginnt mit <a id="..."></a> (siehe Ziel-Format in create_dossier.py)
+und reicht bis zum nächsten Anker; der Trenner "---" am Ende gehört zum Abschnitt, bleibt
+beim Ersetzen aber erhalten. So lassen sich einzelne Abschnitte lesen und austauschen,
+ohne das restliche Dossier anzufassen.
+"""
+
+import re
+
+# Anker-IDs in Dossier-Reihenfolge (müssen zum Ziel-Format passen)
+SECTION_IDS = [
+    "cheat-sheet",
+    "hidden-gems",
+    "gespraechsfuehrung",
+    "killer-fragen",
+    "show-integration",
+    "red-flags",
+    "freshness-check",
+]
+
+# Anzeigenamen für Auswahl-Listen
+SECTION_LABELS = {
+    "cheat-sheet": "1. Cheat Sheet",
+    "hidden-gems": "2. Hidden Gems",
+    "gespraechsfuehrung": "3. Gesprächsführung",
+    "killer-fragen": "4. Killer-Fragen",
+    "show-integration": "5. Show-Integration",
+    "red-flags": "6. Red Flags",
+    "freshness-check": "7. Freshness Check",
+}
+
+ANCHOR_PATTERN = re.compile(r'<a id="([\w-]+)"></a>')
+_TRAILING_SEPARATOR = re.compile(r"\n\s*---\s*$")
+_VIBE_PATTERN = re.compile(r"^(\s*[*-]\s*\*\*Der aktuelle Vibe:\*\*)[^\n]*$", re.MULTILINE)
+
+
+def section_spans(content: str) -> dict[str, tuple[int, int]]:
+    """Anker-ID → (Start, Ende) im Dossier-Text; Ende ist der Beginn des nächsten Ankers."""
+    matches = list(ANCHOR_PATTERN.finditer(content))
+    spans = {}
+    for index, match in enumerate(matches):
+        end = matches[index + 1].start() if index + 1 < len(matches) else len(content)
+        spans[match.group(1)] = (match.start(), end)
+    return spans
+
+
+def _split_separator(text: str) -> tuple[str, str]:
+    """Trennt den abschließenden "---"-Trenner (samt Leerraum) vom Abschnittsinhalt."""
+    match = _TRAILING_SEPARATOR.search(text.rstrip())
+    if match is None:
+        body = text.rstrip()
+        return body, text[len(body):]
+    body = text.rstrip()[: match.start()]
+    return body, text[len(body):]
+
+
+def get_section(content: str, anchor: str) -> str:
+    """Text eines Abschnitts inkl. Anker und Überschrift, ohne abschließenden Trenner."""
+    spans = section_spans(content)
+    if anchor not in spans:
+        raise KeyError(f"Abschnitt nicht gefunden: {anchor}")
+    start, end = spans[anchor]
+    return _split_separator(content[start:end])[0]
+
+
+def replace_section(content: str, anchor: str, new_text: str) -> str:
+    """
+    Ersetzt einen Abschnitt durch new_text (mit oder ohne Anker-Zeile).
+    Trenner und Leerraum nach dem Abschnitt bleiben wie im Original.
+    """
+    spans = section_spans(content)
+    if anchor not in spans:
+        raise KeyError(f"Abschnitt nicht gefunden: {anchor}")
+    start, end = spans[anchor]
+    separator = _split_separator(content[start:end])[1]
+
+    new_body = _split_separator(new_text.strip())[0].strip()
+    anchor_line = f'<a id="{anchor}"></a>'
+    if not new_body.startswith(anchor_line):
+        new_body = f"{anchor_line}\n{new_body}"
+    return content[:start] + new_body + separator + content[end:]
+
+
+def get_vibe(content: str) -> str:
+    """Inhalt der Zeile "Der aktuelle Vibe" im Cheat Sheet (leer, falls nicht vorhanden)."""
+    match = _VIBE_PATTERN.search(content)
+    return match.group(0)[len(match.group(1)):].strip() if match else ""
+
+
+def replace_vibe(content: str, vibe: str) -> str:
+    """Ersetzt den Text der Zeile "Der aktuelle Vibe" (unverändert, falls die Zeile fehlt)."""
+    return _VIBE_PATTERN.sub(lambda match: f"{match.group(1)} {vibe.strip()}", content, count=1)
@@ -0,0 +1,195 @@
+"""
+Registry bekannter Gäste (SQLite).
+Merkt sich aufgelöste Identitäten aus der Disambiguierung, damit wiederkehrende Gäste
+ohne Tavily-Suche und Claude-Call erkannt werden.
+
+Namensvarianten werden normalisiert (Groß/klein, ü/ue, ß/ss, Akzente, Leerzeichen),
+"Jürgen Müller" und "juergen mueller" landen also beim selben Eintrag.
+
+Usage:
+    python tools/guest_registry.py list
+    python tools/guest_registry.py forget "Gastname"
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+import sys
+import time
+import unicodedata
+from pathlib import Path
+from typing import Optional
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+REGISTRY_PATH = PROJECT_ROOT / ".tmp" / "guest_registry.sqlite"
+
+
+def normalize_name(name: str) -> str:
+    """Normalisiert eine Namensvariante zum Registry-Schlüssel."""
+    name = name.lower().strip()
+    name = name.replace("ä", "ae").replace("ö", "oe").replace("ü", "ue").replace("ß", "ss")
+    # Übrige Akzente entfernen (é → e, ø bleibt ø)
+    name = unicodedata.normalize("NFKD", name)
+    name = "".join(ch for ch in name if not unicodedata.combining(ch))
+    name = re.sub(r"[^\w]+", " ", name)
+    return re.sub(r"\s+", " ", name).strip()
+
+
+def hint_hash(context_hint: str) -> str:
+    """Kurzer Hash des normalisierten Identifikations-Hinweises (unterscheidet Namensvettern)."""
+    return hashlib.sha256(normalize_name(context_hint).encode("utf-8")).hexdigest()[:8]
+
+
+def _connect() -> sqlite3.Connection:
+    REGISTRY_PATH.parent.mkdir(exist_ok=True)
+    conn = sqlite3.connect(REGISTRY_PATH, timeout=30)
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS identities (
+            key TEXT PRIMARY KEY,
+            query_name TEXT NOT NULL,
+            candidates TEXT NOT NULL,
+            is_ambiguous INTEGER NOT NULL,
+            chosen_name TEXT,
+            chosen_hint TEXT,
+            resolved_at REAL NOT NULL,
+            hits INTEGER NOT NULL DEFAULT 0
+        )"""
+    )
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS aliases (
+            variant TEXT PRIMARY KEY,
+            key TEXT NOT NULL
+        )"""
+    )
+    return conn
+
+
+def _resolve_key(conn: sqlite3.Connection, name: str) -> str:
+    variant = normalize_name(name)
+    row = conn.execute("SELECT key FROM aliases WHERE variant = ?", (variant,)).fetchone()
+    return row[0] if row else variant
+
+
+def lookup(name: str) -> Optional[dict]:
+    """
+    Sucht eine bekannte Identität. Gibt None zurück oder
+    {"candidates": [...], "is_ambiguous": bool, "chosen": dict | None}.
+    Ein zuvor gewählter Kandidat steht an erster Stelle und ist mit "chosen": True markiert.
+    """
+    with _connect() as conn:
+        key = _resolve_key(conn, name)
+        row = conn.execute(
+            "SELECT candidates, is_ambiguous, chosen_name, chosen_hint FROM identities WHERE key = ?",
+            (key,),
+        ).fetchone()
+        if row is None:
+            return None
+        conn.execute("UPDATE identities SET hits = hits + 1 WHERE key = ?", (key,))
+
+    candidates_json, is_ambiguous, chosen_name, chosen_hint = row
+    candidates = json.loads(candidates_json)
+    chosen = None
+    if chosen_name is not None:
+        for c in candidates:
+            if c.get("name") == chosen_name and c.get("context_hint", "") == (chosen_hint or ""):
+                chosen = c
+                break
+        if chosen is None:
+            chosen = {"name": chosen_name, "description": "Zuletzt gewählt", "context_hint": chosen_hint or ""}
+            candidates.append(chosen)
+        chosen["chosen"] = True
+        candidates = [chosen] + [c for c in candidates if c is not chosen]
+    return {"candidates": candidates, "is_ambiguous": bool(is_ambiguous), "chosen": chosen}
+
+
+def store(name: str, candidates: list[dict], is_ambiguous: bool) -> None:
+    """Speichert das Ergebnis einer Disambiguierung (überschreibt ältere Einträge, behält die Wahl)."""
+    with _connect() as conn:
+        key = _resolve_key(conn, name)
+        conn.execute(
+            """INSERT INTO identities (key, query_name, candidates, is_ambiguous, resolved_at)
+               VALUES (?, ?, ?, ?, ?)
+               ON CONFLICT(key) DO UPDATE SET
+                   query_name = excluded.query_name,
+                   candidates = excluded.candidates,
+                   is_ambiguous = excluded.is_ambiguous,
+                   resolved_at = excluded.resolved_at""",
+            (key, name, json.dumps(candidates, ensure_ascii=False), int(is_ambiguous), time.time()),
+        )
+        conn.execute("INSERT OR IGNORE INTO aliases (variant, key) VALUES (?, ?)", (normalize_name(name), key))
+
+
+def remember_choice(name: str, candidate: dict) -> None:
+    """
+    Merkt sich, welcher Kandidat für eine Namenseingabe gewählt wurde.
+    Der Name des Kandidaten wird zusätzlich als Variante registriert.
+    """
+    with _connect() as conn:
+        key = _resolve_key(conn, name)
+        updated = conn.execute(
+            "UPDATE identities SET chosen_name = ?, chosen_hint = ? WHERE key = ?",
+            (candidate.get("name", name), candidate.get("context_hint", ""), key),
+        ).rowcount
+        if not updated:
+            conn.execute(
+                """INSERT INTO identities
+                   (key, query_name, candidates, is_ambiguous, chosen_name, chosen_hint, resolved_at)
+                   VALUES (?, ?, ?, 0, ?, ?, ?)""",
+                (
+                    key,
+                    name,
+                    json.dumps([candidate], ensure_ascii=False),
+                    candidate.get("name", name),
+                    candidate.get("context_hint", ""),
+                    time.time(),
+                ),
+            )
+        conn.execute("INSERT OR IGNORE INTO aliases (variant, key) VALUES (?, ?)", (normalize_name(name), key))
+        conn.execute(
+            "INSERT OR IGNORE INTO aliases (variant, key) VALUES (?, ?)",
+            (normalize_name(candidate.get("name", name)), key),
+        )
+
+
+def forget(name: str) -> bool:
+    """Entfernt eine Identität samt Varianten aus der Registry."""
+    with _connect() as conn:
+        key = _resolve_key(conn, name)
+        removed = conn.execute("DELETE FROM identities WHERE key = ?", (key,)).rowcount
+        conn.execute("DELETE FROM aliases WHERE key = ?", (key,))
+    return bool(removed)
+
+
+def list_identities() -> list[dict]:
+    """Alle bekannten Identitäten, zuletzt aufgelöste zuerst."""
+    with _connect() as conn:
+        rows = conn.execute(
+            "SELECT query_name, chosen_name, chosen_hint, is_ambiguous, hits, resolved_at "
+            "FROM identities ORDER BY resolved_at DESC"
+        ).fetchall()
+    return [
+        {
+            "query_name": query_name,
+            "chosen_name": chosen_name,
+            "chosen_hint": chosen_hint,
+            "is_ambiguous": bool(is_ambiguous),
+            "hits": hits,
+            "resolved_at": resolved_at,
+        }
+        for query_name, chosen_name, chosen_hint, is_ambiguous, hits, resolved_at in rows
+    ]
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "list"
+    if command == "list":
+        for entry in list_identities():
+            chosen = f" → {entry['chosen_name']} ({entry['chosen_hint']})" if entry["chosen_name"] else ""
+            flag = " ⚠️ mehrdeutig" if entry["is_ambiguous"] else ""
+            print(f"{entry['query_name']}{chosen}{flag} [{entry['hits']} Treffer]")
+    elif command == "forget" and len(sys.argv) > 2:
+        print("🧹 Entfernt" if forget(sys.argv[2]) else "Nicht gefunden")
+    else:
+        print("Usage: python tools/guest_registry.py [list|forget \"Gastname\"]")
+        sys.exit(1)
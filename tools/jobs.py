@@ -0,0 +1,230 @@
+"""
+Hintergrund-Jobs für die Dossier-Pipeline.
+Research + Dossier laufen in einem Worker-Thread statt im Streamlit-Skript, damit
+Reruns (Widget-Klick, Reconnect, zweiter Tab) die Pipeline nicht neu starten.
+
+Jeder Job hat eine stabile ID und einen persistierten Zustand unter .tmp/jobs/:
+    {job_id}.json          Status, Stufe, Pfade der Artefakte, Fehler
+    {job_id}_preview.md    Live-Vorschau des Dossiers während des Streamings
+
+Die Job-ID ist zugleich die Lauf-ID der Stufen-Checkpoints (.tmp/runs/{job_id}/),
+ein fehlgeschlagener Job kann daher mit resume() fortgesetzt werden.
+
+Die UI fragt den Zustand per get_job()/read_preview() ab und hängt sich bei
+jedem Rerun wieder an denselben Job.
+
+Single-Flight: Fordert eine zweite Session denselben Gast (Name + context_hint) an,
+während ein Job läuft – auch in einem anderen Prozess –, bekommt sie den laufenden Job
+samt Live-Vorschau statt eines neuen.
+"""
+
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "tools"))
+
+from create_dossier import ThrottledPreview
+from checkpoints import RunCheckpoint, new_run_id
+from run_pipeline import run_pipeline
+import singleflight
+
+JOBS_DIR = PROJECT_ROOT / ".tmp" / "jobs"
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+
+# Zustände, in denen ein Job noch arbeitet
+ACTIVE_STATUSES = ("queued", "running")
+
+_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="job")
+_lock = threading.RLock()
+
+# Identitäts-Schlüssel → job_id der in diesem Prozess aktiven Jobs
+_inflight: dict[str, str] = {}
+
+
+def _state_path(job_id: str) -> Path:
+    return JOBS_DIR / f"{job_id}.json"
+
+
+def _preview_path(job_id: str) -> Path:
+    return JOBS_DIR / f"{job_id}_preview.md"
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{threading.get_ident()}.tmp")
+    tmp_path.write_text(text, encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def _save(state: dict) -> None:
+    state["updated_at"] = datetime.now().isoformat(timespec="seconds")
+    _write_atomic(_state_path(state["job_id"]), json.dumps(state, ensure_ascii=False, indent=2))
+
+
+def _update(job_id: str, **changes) -> dict:
+    with _lock:
+        state = json.loads(_state_path(job_id).read_text(encoding="utf-8"))
+        state.update(changes)
+        _save(state)
+    return state
+
+
+def get_job(job_id: str) -> Optional[dict]:
+    """
+    Lädt den Zustand eines Jobs. Ein aktiver Job, dessen Prozess nicht mehr läuft
+    (z.B. nach einem Server-Neustart, auch mit derselben PID) oder dessen Heartbeat
+    ausbleibt, wird als "interrupted" gemeldet.
+    """
+    path = _state_path(job_id)
+    if not path.exists():
+        return None
+    state = json.loads(path.read_text(encoding="utf-8"))
+    alive = singleflight.is_alive(state.get("pid", 0), state.get("token"), path.stat().st_mtime)
+    if state["status"] in ACTIVE_STATUSES and not alive:
+        state = _update(job_id, status="interrupted", error="Prozess wurde beendet, bevor der Job fertig war.")
+    return state
+
+
+def read_preview(job_id: str) -> str:
+    """Aktueller Stand der Dossier-Vorschau (leer, solange nichts gestreamt wurde)."""
+    path = _preview_path(job_id)
+    return path.read_text(encoding="utf-8") if path.exists() else ""
+
+
+def _run_job(job_id: str) -> None:
+    state = _update(job_id, status="running", pid=os.getpid(), token=singleflight.PROCESS_TOKEN)
+
+    def on_stage(stage: str, path: Path) -> None:
+        if stage == "research":
+            _update(job_id, stage="dossier", research_path=str(path))
+
+    try:
+        preview = ThrottledPreview(
+            lambda text: _write_atomic(_preview_path(job_id), text),
+            max_per_second=2,
+            min_chars=200,
+        )
+        dossier_path = run_pipeline(
+            state["guest"],
+            state["context_hint"],
+            refresh=state["refresh"],
+            run_id=job_id,
+            on_chunk=preview,
+            on_stage=on_stage,
+        )
+        _update(
+            job_id,
+            status="done",
+            stage="done",
+            dossier_path=str(dossier_path),
+            finished_at=datetime.now().isoformat(timespec="seconds"),
+        )
+    except Exception as e:
+        _update(
+            job_id,
+            status="error",
+            error=f"{type(e).__name__}: {e}",
+            finished_at=datetime.now().isoformat(timespec="seconds"),
+        )
+    finally:
+        singleflight.forget(_state_path(job_id))
+        with _lock:
+            key = singleflight.identity_key(state["guest"], state["context_hint"])
+            if _inflight.get(key) == job_id:
+                del _inflight[key]
+
+
+def find_active_job(guest: str, context_hint: str = "") -> Optional[dict]:
+    """Aktiver Job für dieselbe Gast-Identität – in diesem oder einem anderen Prozess."""
+    key = singleflight.identity_key(guest, context_hint)
+    candidates = [_inflight.get(key)]
+    flight_owner = singleflight.owner(key)
+    if flight_owner:
+        candidates.append(flight_owner["run_id"])
+    for job_id in candidates:
+        if job_id:
+            state = get_job(job_id)
+            if state and state["status"] in ACTIVE_STATUSES:
+                return state
+    return None
+
+
+def submit(guest: str, context_hint: str = "", refresh: bool = False, candidates: Optional[list] = None) -> dict:
+    """
+    Legt einen neuen Pipeline-Job an, startet ihn im Hintergrund und gibt seinen Zustand zurück.
+    candidates: Ergebnis der Disambiguierung, wird als erste Stufe gecheckpointet.
+
+    Läuft für dieselbe Identität bereits ein Job, wird dieser zurückgegeben (Single-Flight).
+    """
+    with _lock:
+        active = find_active_job(guest, context_hint)
+        if active is not None:
+            print(f"🔗 Hänge an laufenden Job an: {active['job_id']}")
+            return active
+        job_id = new_run_id(guest)
+        RunCheckpoint(job_id, guest, context_hint).save_json("disambiguation", {
+            "guest": guest,
+            "context_hint": context_hint,
+            "candidates": candidates or [],
+        })
+        state = {
+            "job_id": job_id,
+            "guest": guest,
+            "context_hint": context_hint,
+            "refresh": refresh,
+            "status": "queued",
+            "stage": "research",
+            "pid": os.getpid(),
+            "token": singleflight.PROCESS_TOKEN,
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "research_path": None,
+            "dossier_path": None,
+            "error": None,
+        }
+        _save(state)
+        singleflight.keep_alive(_state_path(job_id))
+        _inflight[singleflight.identity_key(guest, context_hint)] = job_id
+    _executor.submit(_run_job, job_id)
+    print(f"🧵 Job gestartet: {job_id}")
+    return state
+
+
+def resume(job_id: str) -> dict:
+    """
+    Setzt einen fehlgeschlagenen oder abgebrochenen Job fort. Bereits abgeschlossene
+    Stufen (Provider-Ergebnisse, Research) werden aus den Checkpoints übernommen.
+    """
+    state = get_job(job_id)
+    if state is None:
+        raise ValueError(f"Job nicht gefunden: {job_id}")
+    if state["status"] in ACTIVE_STATUSES:
+        return state
+    with _lock:
+        active = find_active_job(state["guest"], state["context_hint"])
+        if active is not None:
+            return active
+        state = _update(job_id, status="queued", error=None, finished_at=None, pid=os.getpid(), token=singleflight.PROCESS_TOKEN)
+        singleflight.keep_alive(_state_path(job_id))
+        _inflight[singleflight.identity_key(state["guest"], state["context_hint"])] = job_id
+    _executor.submit(_run_job, job_id)
+    print(f"🧵 Job fortgesetzt: {job_id}")
+    return state
+
+
+def list_jobs(active_only: bool = False) -> list[dict]:
+    """Alle bekannten Jobs, neueste zuerst."""
+    if not JOBS_DIR.exists():
+        return []
+    result = []
+    for path in sorted(JOBS_DIR.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True):
+        state = get_job(path.stem)
+        if state and (not active_only or state["status"] in ACTIVE_STATUSES):
+            result.append(state)
+    return result
@@ -0,0 +1,199 @@
+"""
+Rate Limiting und Kontingent-Verwaltung pro API-Provider.
+
+- Token Bucket pro Provider (prozessweit geteilt): höchstens N Requests pro Minute,
+  kleine Bursts erlaubt, ohne das Minutenlimit zu überschreiten.
+- Monatliches Kontingent (z.B. Tavily Free Tier: 1000 Calls/Monat), persistiert in
+  .tmp/quota.sqlite. Ist das Kontingent erschöpft, wird QuotaExhaustedError geworfen,
+  BEVOR ein Request verschwendet wird.
+
+Konfiguration per Env: RATE_LIMIT_<PROVIDER> (Requests/Minute), QUOTA_<PROVIDER> (Calls/Monat, 0 = unbegrenzt).
+
+Usage:
+    python tools/rate_limit.py
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import transport
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+QUOTA_PATH = PROJECT_ROOT / ".tmp" / "quota.sqlite"
+
+# Requests pro Minute (siehe workflows/guest_dossier.md, "Bekannte Einschränkungen")
+DEFAULT_RATE_LIMITS = {
+    "perplexity": 50,
+    "tavily": 100,
+    "openai": 60,
+    "anthropic": 50,
+}
+
+# Calls pro Kalendermonat, 0 = unbegrenzt
+DEFAULT_QUOTAS = {
+    "perplexity": 0,
+    "tavily": 1000,
+    "openai": 0,
+    "anthropic": 0,
+}
+
+
+class QuotaExhaustedError(RuntimeError):
+    """Das Monatskontingent eines Providers ist aufgebraucht."""
+
+    def __init__(self, provider: str, used: int, quota: int):
+        self.provider = provider
+        self.used = used
+        self.quota = quota
+        super().__init__(f"Monatskontingent für {provider} erschöpft ({used}/{quota} Calls)")
+
+
+class TokenBucket:
+    """
+    Thread-sicherer Token Bucket. Mit Burst b und Limit r/Minute wird mit
+    (r - b)/60 Tokens pro Sekunde nachgefüllt – so bleiben es auch im
+    ungünstigsten 60-Sekunden-Fenster höchstens r Requests.
+    """
+
+    def __init__(self, per_minute: int, burst: int = 5):
+        self.capacity = max(1, min(burst, per_minute))
+        self.rate = max(per_minute - self.capacity, 1) / 60.0
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self) -> float:
+        """Nimmt ein Token, falls verfügbar (0.0), sonst die Sekunden bis zum nächsten Token."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self) -> float:
+        """Wartet, bis ein Token verfügbar ist. Gibt die Wartezeit in Sekunden zurück."""
+        waited = 0.0
+        while (delay := self.take()) > 0:
+            time.sleep(delay)
+            waited += delay
+        return waited
+
+
+_buckets: dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def _bucket(provider: str) -> TokenBucket:
+    with _buckets_lock:
+        if provider not in _buckets:
+            per_minute = int(os.getenv(f"RATE_LIMIT_{provider.upper()}", DEFAULT_RATE_LIMITS.get(provider, 60)))
+            _buckets[provider] = TokenBucket(per_minute)
+        return _buckets[provider]
+
+
+def quota_for(provider: str) -> int:
+    """Monatskontingent eines Providers (0 = unbegrenzt)."""
+    return int(os.getenv(f"QUOTA_{provider.upper()}", DEFAULT_QUOTAS.get(provider, 0)))
+
+
+def _month() -> str:
+    return datetime.now().strftime("%Y-%m")
+
+
+def _connect() -> sqlite3.Connection:
+    QUOTA_PATH.parent.mkdir(exist_ok=True)
+    conn = sqlite3.connect(QUOTA_PATH, timeout=30)
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS usage (
+            month TEXT NOT NULL,
+            provider TEXT NOT NULL,
+            calls INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (month, provider)
+        )"""
+    )
+    return conn
+
+
+def used(provider: str) -> int:
+    """Im laufenden Monat verbrauchte Calls."""
+    with _connect() as conn:
+        row = conn.execute(
+            "SELECT calls FROM usage WHERE month = ? AND provider = ?", (_month(), provider)
+        ).fetchone()
+    return row[0] if row else 0
+
+
+def remaining(provider: str) -> float:
+    """Verbleibende Calls im laufenden Monat (inf bei unbegrenztem Kontingent)."""
+    quota = quota_for(provider)
+    return float("inf") if quota <= 0 else max(0, quota - used(provider))
+
+
+def check_quota(provider: str, calls: int = 1) -> None:
+    """Wirft QuotaExhaustedError, wenn für `calls` weitere Aufrufe kein Kontingent mehr da ist."""
+    quota = quota_for(provider)
+    if quota <= 0 or transport.is_offline():
+        return
+    current = used(provider)
+    if current + calls > quota:
+        raise QuotaExhaustedError(provider, current, quota)
+
+
+def _reserve(provider: str) -> None:
+    """Verbucht einen Call atomar – schlägt fehl, wenn das Kontingent dadurch überschritten würde."""
+    quota = quota_for(provider)
+    with _connect() as conn:
+        conn.execute(
+            "INSERT OR IGNORE INTO usage (month, provider, calls) VALUES (?, ?, 0)", (_month(), provider)
+        )
+        reserved = conn.execute(
+            "UPDATE usage SET calls = calls + 1 WHERE month = ? AND provider = ? AND (? <= 0 OR calls < ?)",
+            (_month(), provider, quota, quota),
+        ).rowcount
+    if not reserved:
+        raise QuotaExhaustedError(provider, used(provider), quota)
+
+
+def acquire(provider: str) -> None:
+    """
+    Vor jedem ausgehenden API-Call aufrufen: verbucht den Call im Monatskontingent
+    (QuotaExhaustedError, falls erschöpft) und wartet auf das Rate Limit.
+    Offline (Replay/Simulation, transport.py) gibt es keine echten Calls – nichts wird verbucht.
+    """
+    if transport.is_offline():
+        return
+    _reserve(provider)
+    waited = _bucket(provider).acquire()
+    if waited > 0.5:
+        print(f"  ⏳ Rate Limit {provider}: {waited:.1f}s gewartet")
+
+
+async def acquire_async(provider: str) -> None:
+    """Wie acquire(), wartet aber per asyncio.sleep, ohne den Event-Loop zu blockieren."""
+    if transport.is_offline():
+        return
+    # Kontingent-Buchung ist SQLite (Lock-Wartezeit) – im Worker-Thread
+    await asyncio.to_thread(_reserve, provider)
+    bucket = _bucket(provider)
+    waited = 0.0
+    while (delay := bucket.take()) > 0:
+        await asyncio.sleep(delay)
+        waited += delay
+    if waited > 0.5:
+        print(f"  ⏳ Rate Limit {provider}: {waited:.1f}s gewartet")
+
+
+if __name__ == "__main__":
+    print(f"Kontingent {_month()}:")
+    for name in DEFAULT_RATE_LIMITS:
+        quota = quota_for(name)
+        limit = f"{quota}" if quota > 0 else "unbegrenzt"
+        print(f"  {name:<12} {used(name):>6} Calls  (Kontingent: {limit})")
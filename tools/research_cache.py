@@ -0,0 +1,165 @@
+"""
+Persistenter Research-Cache (SQLite).
+Speichert die Ergebnisse der einzelnen Research-Provider, damit wiederkehrende Gäste
+nicht jedes Mal neue Perplexity-/Tavily-/OpenAI-Calls kosten.
+
+Schlüssel: normalisierter Gastname + context_hint + Provider + Hash des Prompt-Templates.
+TTL: lang für Deep Research, kurz für Echtzeit-Provider (Rolle "realtime" in der Registry).
+
+Usage:
+    python tools/research_cache.py stats
+    python tools/research_cache.py evict
+    python tools/research_cache.py clear
+"""
+
+import hashlib
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+import research_providers
+from guest_registry import normalize_name
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+CACHE_PATH = PROJECT_ROOT / ".tmp" / "research_cache.sqlite"
+
+# TTLs in Sekunden: Deep Research ändert sich langsam, Echtzeit-Daten schnell
+TTL_DEEP = int(os.getenv("CACHE_TTL_DEEP", str(7 * 24 * 3600)))
+TTL_REALTIME = int(os.getenv("CACHE_TTL_REALTIME", str(3600)))
+MAX_BYTES = int(float(os.getenv("CACHE_MAX_MB", "50")) * 1024 * 1024)
+
+
+def is_enabled() -> bool:
+    """Cache ist per Default aktiv, RESEARCH_CACHE=0 schaltet ihn ab."""
+    return os.getenv("RESEARCH_CACHE", "1") != "0"
+
+
+def _realtime_labels() -> list[str]:
+    """Labels der registrierten Echtzeit-Provider (kurze TTL)."""
+    return [provider.label for provider in research_providers.providers("realtime")]
+
+
+def ttl_for(provider: str) -> int:
+    """TTL in Sekunden für einen Provider – nach seiner Rolle in der Registry."""
+    return TTL_REALTIME if provider in _realtime_labels() else TTL_DEEP
+
+
+def cache_key(provider: str, guest_name: str, context_hint: str, template: str) -> str:
+    """Berechnet den Cache-Key aus Gast-Identität, Provider und Template-Hash."""
+    template_hash = hashlib.sha256(template.encode("utf-8")).hexdigest()[:16]
+    raw = "\x1f".join([normalize_name(guest_name), normalize_name(context_hint), provider, template_hash])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _connect() -> sqlite3.Connection:
+    CACHE_PATH.parent.mkdir(exist_ok=True)
+    conn = sqlite3.connect(CACHE_PATH, timeout=30)
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS research_cache (
+            key TEXT PRIMARY KEY,
+            provider TEXT NOT NULL,
+            guest TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            size INTEGER NOT NULL,
+            content TEXT NOT NULL
+        )"""
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_research_cache_created ON research_cache(created_at)")
+    return conn
+
+
+def get(provider: str, guest_name: str, context_hint: str, template: str) -> Optional[str]:
+    """Liefert ein gecachtes Ergebnis, falls vorhanden und nicht abgelaufen."""
+    key = cache_key(provider, guest_name, context_hint, template)
+    with _connect() as conn:
+        row = conn.execute(
+            "SELECT content, created_at FROM research_cache WHERE key = ?", (key,)
+        ).fetchone()
+    if row is None:
+        return None
+    content, created_at = row
+    if time.time() - created_at > ttl_for(provider):
+        return None
+    return content
+
+
+def put(provider: str, guest_name: str, context_hint: str, template: str, content: str) -> None:
+    """Speichert ein Provider-Ergebnis und hält den Cache unter der Größengrenze."""
+    key = cache_key(provider, guest_name, context_hint, template)
+    with _connect() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO research_cache (key, provider, guest, created_at, size, content) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (key, provider, normalize_name(guest_name), time.time(), len(content.encode("utf-8")), content),
+        )
+    evict()
+
+
+def evict(max_age: Optional[int] = None, max_bytes: Optional[int] = None) -> int:
+    """
+    Entfernt abgelaufene Einträge und – falls nötig – die ältesten, bis der Cache
+    unter max_bytes liegt. Gibt die Anzahl entfernter Einträge zurück.
+    """
+    max_age = max(TTL_DEEP, TTL_REALTIME) if max_age is None else max_age
+    max_bytes = MAX_BYTES if max_bytes is None else max_bytes
+    now = time.time()
+    with _connect() as conn:
+        removed = conn.execute(
+            "DELETE FROM research_cache WHERE created_at < ?", (now - max_age,)
+        ).rowcount
+        realtime = _realtime_labels()
+        if realtime:
+            removed += conn.execute(
+                "DELETE FROM research_cache WHERE provider IN ({}) AND created_at < ?".format(
+                    ",".join("?" * len(realtime))
+                ),
+                (*realtime, now - TTL_REALTIME),
+            ).rowcount
+
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM research_cache").fetchone()[0]
+        if total > max_bytes:
+            for key, size in conn.execute(
+                "SELECT key, size FROM research_cache ORDER BY created_at ASC"
+            ).fetchall():
+                if total <= max_bytes:
+                    break
+                conn.execute("DELETE FROM research_cache WHERE key = ?", (key,))
+                total -= size
+                removed += 1
+    return removed
+
+
+def clear() -> None:
+    """Leert den Cache vollständig."""
+    with _connect() as conn:
+        conn.execute("DELETE FROM research_cache")
+
+
+def stats() -> dict:
+    """Anzahl und Größe der Einträge pro Provider."""
+    with _connect() as conn:
+        rows = conn.execute(
+            "SELECT provider, COUNT(*), COALESCE(SUM(size), 0) FROM research_cache GROUP BY provider"
+        ).fetchall()
+    return {provider: {"entries": count, "bytes": size} for provider, count, size in rows}
+
+
+if __name__ == "__main__":
+    # Die Rollen der Provider (→ TTL) registriert research_guest.py
+    import research_guest  # noqa: F401
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    if command == "stats":
+        for provider, info in stats().items():
+            print(f"{provider}: {info['entries']} Einträge, {info['bytes'] / 1024:.0f} KB")
+    elif command == "evict":
+        print(f"🧹 {evict()} Einträge entfernt")
+    elif command == "clear":
+        clear()
+        print("🧹 Cache geleert")
+    else:
+        print("Usage: python tools/research_cache.py [stats|evict|clear]")
+        sys.exit(1)
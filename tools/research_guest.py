@@ -9,17 +9,47 @@ Enthält Disambiguierung: Vor dem Research wird geprüft, ob der Name eindeutig
 import os
 import sys
 import json
+import math
 import re
+import inspect
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
 from dotenv import load_dotenv
 
+import archive_index
+import clients
+import cost_ledger
+import guest_registry
+import rate_limit
+import research_cache
+import research_providers
+import resilience
+import tracing
+import transport
+from research_providers import ResearchProvider
+
 # Projekt-Root bestimmen
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 load_dotenv(PROJECT_ROOT / ".env")
 
+# Maximale Anzahl parallel laufender Tavily-Suchen pro Research
+TAVILY_MAX_WORKERS = int(os.getenv("TAVILY_MAX_WORKERS", "3"))
+
+# Protokolle für Provider-Latenzen und Hedging-Gewinner (zum späteren Tuning)
+LATENCY_LOG_PATH = PROJECT_ROOT / ".tmp" / "provider_latency.jsonl"
+HEDGE_LOG_PATH = PROJECT_ROOT / ".tmp" / "hedge_log.jsonl"
+# Provider, die das Zeitbudget eines Research-Laufs überschritten haben
+DEADLINE_LOG_PATH = PROJECT_ROOT / ".tmp" / "deadline_log.jsonl"
+_log_lock = threading.Lock()
+
+# Überschrift des Tavily-Teils im zusammengeführten Research
+REALTIME_MARKER = "## Echtzeit-Check (Tavily)"
+
 RESEARCH_PROMPT_TEMPLATE = """Du bist Chef-Rechercheur für eine führende TV-Talkshow. Deine Aufgabe ist es, ein detailliertes, kritisches und gesprächsorientiertes Dossier über den folgenden Gast zu erstellen:
 
 AKTUELLES DATUM: Heute ist der {today}. Informationen aus 2025 und 2026 sind GEGENWART, nicht Zukunft.
@@ -65,34 +95,65 @@ FORMAT-VORGABE:
 Nutze Markdown. Schreibe stichpunktartig aber detailreich. Füge bei kritischen Fakten oder Zitaten immer die Quelle/Datum in Klammern hinzu."""
 
 
-def disambiguate_guest(guest_name: str) -> list[dict]:
+def disambiguate_guest(guest_name: str, refresh: bool = False) -> tuple[list[dict], bool]:
     """
     Prüft via Tavily, ob es mehrere bekannte Personen mit diesem Namen gibt.
     Gibt eine Liste von Kandidaten zurück mit Name, Beschreibung und Kontext.
+
+    Bekannte Gäste kommen aus der Registry (ohne API-Calls); refresh=True erzwingt
+    eine neue Prüfung.
     """
-    from tavily import TavilyClient
+    with tracing.span("disambiguation", guest=slugify(guest_name), refresh=refresh) as span:
+        candidates, is_ambiguous = _disambiguate(guest_name, refresh)
+        span.set(candidates=len(candidates), is_ambiguous=is_ambiguous)
+        return candidates, is_ambiguous
 
-    api_key = os.getenv("TAVILY_API_KEY")
-    if not api_key:
-        raise ValueError("TAVILY_API_KEY nicht in .env gesetzt")
 
-    client = TavilyClient(api_key=api_key)
+def _disambiguate(guest_name: str, refresh: bool) -> tuple[list[dict], bool]:
+    known = _known_identity(guest_name, refresh)
+    if known is not None:
+        return known
 
-    # Breite Suche nach dem Namen
-    results = client.search(
-        query=f'"{guest_name}" wer ist Person Beruf',
-        search_depth="advanced",
-        max_results=8,
-        include_answer=True,
-    )
+    client = clients.tavily_client()
+    client_ai = clients.anthropic_client()
 
-    # Ergebnisse an Claude zur Disambiguierung schicken
-    import anthropic
+    # Kontingent für beide Calls vorab prüfen, damit die Tavily-Suche nicht verschwendet wird
+    rate_limit.check_quota("anthropic")
 
-    anthropic_key = os.getenv("ANTHROPIC_API_KEY")
-    if not anthropic_key:
-        raise ValueError("ANTHROPIC_API_KEY nicht in .env gesetzt")
+    # Breite Suche nach dem Namen
+    rate_limit.acquire("tavily")
+    results = client.search(**_disambiguation_search(guest_name))
 
+    # Ergebnisse an Claude zur Disambiguierung schicken
+    rate_limit.acquire("anthropic")
+    message = client_ai.messages.create(**_disambiguation_request(guest_name, results))
+    return _parse_disambiguation(guest_name, message.content[0].text)
+
+
+def _known_identity(guest_name: str, refresh: bool) -> Optional[tuple[list[dict], bool]]:
+    """Bekannte Identität aus der Registry (None bei refresh oder unbekanntem Gast)."""
+    if not refresh:
+        known = guest_registry.lookup(guest_name)
+        if known is not None:
+            print(f"  ⚡ Identität aus Registry: {guest_name}")
+            tracing.annotate(source="registry")
+            return known["candidates"], known["is_ambiguous"]
+    tracing.annotate(source="api")
+    return None
+
+
+def _disambiguation_search(guest_name: str) -> dict:
+    """Parameter der breiten Tavily-Suche nach dem Namen."""
+    return {
+        "query": f'"{guest_name}" wer ist Person Beruf',
+        "search_depth": "advanced",
+        "max_results": 8,
+        "include_answer": True,
+    }
+
+
+def _disambiguation_request(guest_name: str, results: dict) -> dict:
+    """Parameter des Claude-Calls, der die Suchergebnisse in Kandidaten aufteilt."""
     search_context = ""
     if results.get("answer"):
         search_context += f"Zusammenfassung: {results['answer']}\n\n"
@@ -100,12 +161,11 @@ def disambiguate_guest(guest_name: str) -> list[dict]:
         search_context += f"- {r.get('title', '')}: {r.get('content', '')[:400]}\n"
         search_context += f"  URL: {r.get('url', '')}\n\n"
 
-    client_ai = anthropic.Anthropic(api_key=anthropic_key)
-    message = client_ai.messages.create(
-        model="claude-haiku-4-5-20251001",
-        max_tokens=1500,
-        timeout=60.0,
-        messages=[{
+    return {
+        "model": "claude-haiku-4-5-20251001",
+        "max_tokens": 1500,
+        "timeout": 60.0,
+        "messages": [{
             "role": "user",
             "content": f"""Analysiere die folgenden Suchergebnisse zum Namen "{guest_name}".
 
@@ -133,15 +193,20 @@ Regeln:
 - Nur real existierende Personen, keine Vermutungen
 - WICHTIG für context_hint: Verwende konkrete, suchbare Keywords (Buchtitel, Firma, Ort, Beruf), KEINE vagen Beschreibungen"""
         }],
-    )
+    }
 
-    response_text = message.content[0].text
 
+def _parse_disambiguation(guest_name: str, response_text: str) -> tuple[list[dict], bool]:
+    """Kandidaten aus der Claude-Antwort (eindeutige Ergebnisse landen in der Registry)."""
     # JSON aus der Antwort extrahieren
     json_match = re.search(r'\{[\s\S]*\}', response_text)
     if json_match:
         data = json.loads(json_match.group())
-        return data.get("candidates", []), data.get("is_ambiguous", False)
+        candidates = data.get("candidates", [])
+        is_ambiguous = data.get("is_ambiguous", False)
+        if candidates:
+            guest_registry.store(guest_name, candidates, is_ambiguous)
+        return candidates, is_ambiguous
 
     # Fallback: nicht disambiguierbar
     return [{"name": guest_name, "description": "Nicht näher bestimmt", "context_hint": ""}], False
@@ -156,13 +221,21 @@ def _build_search_query(guest_name: str, context_hint: str, suffix: str = "") ->
 
 
 def research_perplexity(guest_name: str, context_hint: str = "") -> str:
-    """Haupt-Research via Perplexity Sonar API."""
-    import requests
+    """Haupt-Research via Perplexity Sonar API (geteilte Session mit Keep-Alive)."""
+    session = clients.perplexity_session()
+    url, payload = _perplexity_request(guest_name, context_hint)
 
-    api_key = os.getenv("PERPLEXITY_API_KEY")
-    if not api_key:
-        raise ValueError("PERPLEXITY_API_KEY nicht in .env gesetzt")
+    def post():
+        rate_limit.acquire("perplexity")
+        response = session.post(url, json=payload, timeout=120)
+        response.raise_for_status()
+        return response
 
+    return _format_perplexity(resilience.call("perplexity", post).json())
+
+
+def _perplexity_request(guest_name: str, context_hint: str) -> tuple[str, dict]:
+    """URL und JSON-Body des Perplexity-Requests."""
     hint_text = ""
     if context_hint:
         hint_text = f"""
@@ -175,26 +248,19 @@ WARNUNG: Es gibt andere Personen mit ähnlichem Namen. Prüfe bei JEDER Informat
     # Suchanfrage mit Kontext anreichern, damit Perplexity die richtige Person findet
     search_name = f"{guest_name} {context_hint}" if context_hint else guest_name
 
-    response = requests.post(
-        "https://api.perplexity.ai/chat/completions",
-        headers={
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json",
-        },
-        json={
-            "model": "sonar-pro",
-            "messages": [
-                {"role": "system", "content": f"Du bist ein erfahrener Rechercheur für deutsche TV-Talkshows. Heute ist der {today}. Informationen aus 2025 und 2026 sind Gegenwart. Recherchiere gründlich und liefere quellenbasierte Ergebnisse auf Deutsch. WICHTIG: Du recherchierst über {search_name}. Verwechsle diese Person NICHT mit Namensvetter."},
-                {"role": "user", "content": prompt},
-            ],
-            "temperature": 0.1,
-            "search_recency_filter": "month",
-        },
-        timeout=120,
-    )
-    response.raise_for_status()
-    data = response.json()
+    return f"{clients.PERPLEXITY_BASE_URL}/chat/completions", {
+        "model": cost_ledger.model_for("sonar-pro"),
+        "messages": [
+            {"role": "system", "content": f"Du bist ein erfahrener Rechercheur für deutsche TV-Talkshows. Heute ist der {today}. Informationen aus 2025 und 2026 sind Gegenwart. Recherchiere gründlich und liefere quellenbasierte Ergebnisse auf Deutsch. WICHTIG: Du recherchierst über {search_name}. Verwechsle diese Person NICHT mit Namensvetter."},
+            {"role": "user", "content": prompt},
+        ],
+        "temperature": 0.1,
+        "search_recency_filter": "month",
+    }
 
+
+def _format_perplexity(data: dict) -> str:
+    """Antworttext samt Quellenliste."""
     content = data["choices"][0]["message"]["content"]
 
     # Quellen anhängen wenn vorhanden
@@ -209,47 +275,66 @@ WARNUNG: Es gibt andere Personen mit ähnlichem Namen. Prüfe bei JEDER Informat
 
 def research_tavily(guest_name: str, context_hint: str = "") -> str:
     """Echtzeit-Check via Tavily API (News der letzten 48h, Social Media)."""
-    from tavily import TavilyClient
+    client = clients.tavily_client()
+
+    # Alle drei Suchen brauchen Kontingent – vorab prüfen statt nach der ersten abzubrechen
+    rate_limit.check_quota("tavily", calls=3)
+
+    def search(**kwargs) -> dict:
+        rate_limit.acquire("tavily")
+        return client.search(**kwargs)
 
-    api_key = os.getenv("TAVILY_API_KEY")
-    if not api_key:
-        raise ValueError("TAVILY_API_KEY nicht in .env gesetzt")
+    def search_with_retry(**kwargs) -> dict:
+        return resilience.call("tavily", search, **kwargs)
 
-    client = TavilyClient(api_key=api_key)
+    # Die drei Suchen sind unabhängig voneinander und laufen parallel
+    with ThreadPoolExecutor(max_workers=TAVILY_MAX_WORKERS, thread_name_prefix="tavily") as pool:
+        futures = [pool.submit(tracing.bind(search_with_retry), **kwargs) for kwargs in _tavily_searches(guest_name, context_hint)]
+        news_results, social_results, instagram_results = [future.result() for future in futures]
 
+    return _format_tavily(news_results, social_results, instagram_results)
+
+
+def _tavily_searches(guest_name: str, context_hint: str) -> list[dict]:
+    """Parameter der drei Tavily-Suchen: aktuelle News, Social Media, Instagram."""
     # Suchanfragen MIT Kontext, um Verwechslungen zu vermeiden
     news_query = _build_search_query(guest_name, context_hint, "aktuelle News")
 
-    # Aktuelle News suchen
-    news_results = client.search(
-        query=news_query,
-        search_depth="advanced",
-        max_results=5,
-        include_answer=True,
-        topic="news",
-    )
-
     # Social Media: Gezielte Suche auf Social-Media-Plattformen
     social_domains = ["instagram.com", "twitter.com", "x.com", "linkedin.com", "tiktok.com", "facebook.com", "youtube.com"]
     social_query = _build_search_query(guest_name, context_hint, "")
-    social_results = client.search(
-        query=social_query,
-        search_depth="advanced",
-        max_results=5,
-        include_answer=True,
-        include_domains=social_domains,
-    )
 
     # Zusätzliche gezielte Instagram-Suche (häufig übersehen)
     instagram_query = f"{guest_name} site:instagram.com"
-    instagram_results = client.search(
-        query=instagram_query,
-        search_depth="basic",
-        max_results=3,
-        include_answer=False,
-        include_domains=["instagram.com"],
-    )
 
+    return [
+        # Aktuelle News suchen
+        {
+            "query": news_query,
+            "search_depth": "advanced",
+            "max_results": 5,
+            "include_answer": True,
+            "topic": "news",
+        },
+        {
+            "query": social_query,
+            "search_depth": "advanced",
+            "max_results": 5,
+            "include_answer": True,
+            "include_domains": social_domains,
+        },
+        {
+            "query": instagram_query,
+            "search_depth": "basic",
+            "max_results": 3,
+            "include_answer": False,
+            "include_domains": ["instagram.com"],
+        },
+    ]
+
+
+def _format_tavily(news_results: dict, social_results: dict, instagram_results: dict) -> str:
+    """Echtzeit-Teil des Research aus den drei Suchergebnissen."""
     output = "## Echtzeit-Check (Tavily)\n\n"
     output += "### Aktuelle News (letzte 48h)\n"
     if news_results.get("answer"):
@@ -283,29 +368,56 @@ def research_tavily(guest_name: str, context_hint: str = "") -> str:
 
 def research_openai_fallback(guest_name: str, context_hint: str = "") -> str:
     """Fallback-Research via OpenAI mit Web Search."""
-    from openai import OpenAI
+    client = clients.openai_client()
+
+    def create():
+        rate_limit.acquire("openai")
+        return client.responses.create(**_openai_request(guest_name, context_hint))
 
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        raise ValueError("OPENAI_API_KEY nicht in .env gesetzt")
+    return _format_openai(resilience.call("openai", create))
 
-    client = OpenAI(api_key=api_key)
 
+def _openai_request(guest_name: str, context_hint: str) -> dict:
+    """Parameter des OpenAI-Calls mit Web Search."""
     hint = f" ({context_hint})" if context_hint else ""
-    response = client.responses.create(
-        model="gpt-4o",
-        tools=[{"type": "web_search_preview"}],
-        input=[
+    return {
+        "model": cost_ledger.model_for("gpt-4o"),
+        "tools": [{"type": "web_search_preview"}],
+        "input": [
             {"role": "system", "content": "Du bist ein erfahrener Rechercheur für deutsche TV-Talkshows. Recherchiere gründlich auf Deutsch."},
             {"role": "user", "content": f"Recherchiere aktuelle Informationen über {guest_name}{hint}: Aktuelle Projekte, Kontroversen, überraschende Fakten, wichtige Zitate der letzten 12 Monate. Nenne immer Quellen."},
         ],
-    )
+    }
+
 
+def _format_openai(response) -> str:
     # Text aus der Response extrahieren
     text_parts = [block.text for block in response.output if hasattr(block, "text")]
     return "\n".join(text_parts) if text_parts else "Keine Ergebnisse von OpenAI."
 
 
+# Eingebaute Provider (Kosten: grobe Schätzung pro Research, Latenz: Median aus benchmark.py).
+# Request-Aufbau und Formatierung gehören zum Cache-Fingerprint, auch für async_engine.py.
+research_providers.register(ResearchProvider(
+    "Perplexity", "deep", research_perplexity,
+    env_key="PERPLEXITY_API_KEY", cost_usd=0.06, latency_s=25, priority=10,
+    heading="## Deep Research (Perplexity)",
+    parts=(_perplexity_request, _format_perplexity), async_method="research_perplexity",
+))
+research_providers.register(ResearchProvider(
+    "OpenAI Fallback", "fallback", research_openai_fallback,
+    env_key="OPENAI_API_KEY", cost_usd=0.045, latency_s=20, priority=10,
+    heading="## Deep Research (OpenAI Fallback)",
+    parts=(_openai_request, _format_openai), async_method="research_openai_fallback",
+))
+research_providers.register(ResearchProvider(
+    "Tavily", "realtime", research_tavily,
+    env_key="TAVILY_API_KEY", cost_usd=0.024, latency_s=1.5, priority=10,
+    marker=REALTIME_MARKER,
+    parts=(_tavily_searches, _format_tavily), async_method="research_tavily",
+))
+
+
 def slugify(name: str) -> str:
     """Wandelt einen Namen in einen Dateinamen-tauglichen String um."""
     slug = name.lower().strip()
@@ -318,21 +430,28 @@ def slugify(name: str) -> str:
     return slug
 
 
+def identity_slug(guest_name: str, context_hint: str = "") -> str:
+    """
+    Dateinamen-Stamm einer Gast-Identität: Slug des Namens, mit Hinweis zusätzlich dessen Hash.
+    So überschreiben sich Namensvettern (gleicher Name, anderer context_hint) nicht gegenseitig.
+    """
+    slug = slugify(guest_name)
+    return f"{slug}_{guest_registry.hint_hash(context_hint)}" if context_hint.strip() else slug
+
+
 def verify_research(guest_name: str, context_hint: str, research_text: str) -> str:
     """
     Verifikationsschritt: Claude prüft das gesammelte Research auf Verwechslungen
     und entfernt Informationen, die zur falschen Person gehören.
     """
-    import anthropic
-
-    api_key = os.getenv("ANTHROPIC_API_KEY")
-    if not api_key:
+    if not os.getenv("ANTHROPIC_API_KEY"):
         return research_text  # Ohne API-Key: ungeprüft zurückgeben
 
     today = datetime.now().strftime("%d.%m.%Y")
-    client = anthropic.Anthropic(api_key=api_key)
+    client = clients.anthropic_client()
+    rate_limit.acquire("anthropic")
     message = client.messages.create(
-        model="claude-sonnet-4-5-20250929",
+        model=cost_ledger.model_for("claude-sonnet-4-5-20250929"),
         max_tokens=8000,
         timeout=120.0,
         messages=[{
@@ -361,64 +480,511 @@ WICHTIG: Markiere NICHT, weil du eine Information nicht bestätigen kannst. Mark
     return message.content[0].text
 
 
-def run_research(guest_name: str, context_hint: str = "") -> Path:
-    """Führt die komplette Research-Pipeline aus und speichert das Ergebnis."""
-    print(f"🔍 Starte Research für: {guest_name}")
-    if context_hint:
-        print(f"  Kontext: {context_hint}")
+def _append_jsonl(path: Path, entry: dict) -> None:
+    """Hängt einen Eintrag thread-sicher an eine JSONL-Datei an."""
+    with _log_lock:
+        path.parent.mkdir(exist_ok=True)
+        with path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+def _read_lines_backwards(path: Path, block_size: int = 64 * 1024):
+    """Zeilen einer Datei vom Ende her – liest blockweise nur so viel wie nötig."""
+    with path.open("rb") as f:
+        position = f.seek(0, os.SEEK_END)
+        rest = b""
+        while position > 0:
+            step = min(block_size, position)
+            position -= step
+            f.seek(position)
+            lines = (f.read(step) + rest).split(b"\n")
+            # Die erste Zeile des Blocks ist evtl. unvollständig – mit dem nächsten Block zusammensetzen
+            rest = lines.pop(0)
+            for line in reversed(lines):
+                yield line
+        yield rest
+
+
+def observed_latency(provider: str, quantile: float = 0.9, window: int = 200) -> Optional[float]:
+    """
+    Beobachtete Latenz eines Providers (z.B. p90) aus den letzten erfolgreichen Aufrufen.
+    Gelesen wird nur das Ende des Latenz-Logs, bis window Messwerte beisammen sind.
+    """
+    if not LATENCY_LOG_PATH.exists():
+        return None
+    samples = []
+    for line in _read_lines_backwards(LATENCY_LOG_PATH):
+        try:
+            entry = json.loads(line)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            continue
+        if entry.get("provider") == provider and entry.get("ok"):
+            samples.append(entry["seconds"])
+            if len(samples) >= window:
+                break
+    samples.sort()
+    if not samples:
+        return None
+    return samples[min(len(samples) - 1, int(quantile * len(samples)))]
+
+
+def _resolve_hedge_after(hedge_after, provider: str = "Perplexity") -> Optional[float]:
+    """
+    Wandelt die Hedging-Schwelle in Sekunden um.
+    Erlaubt sind Zahlen, "p90"/"p95" (beobachtete Latenz des ersten Deep-Providers) oder "off"/"0" (kein Hedging).
+    Wirft ValueError bei einem ungültigen Wert (z.B. RESEARCH_HEDGE_AFTER=p9x).
+    """
+    if hedge_after is None:
+        hedge_after = os.getenv("RESEARCH_HEDGE_AFTER", "off")
+    if isinstance(hedge_after, str):
+        value = hedge_after.strip().lower()
+        if value in ("", "off", "0"):
+            return None
+        if re.fullmatch(r"p\d{1,2}", value):
+            observed = observed_latency(provider, int(value[1:]) / 100)
+            # Ohne Messwerte: konservativer Default
+            return observed if observed is not None else 60.0
+        try:
+            hedge_after = float(value)
+        except ValueError:
+            raise ValueError(
+                f"RESEARCH_HEDGE_AFTER muss Sekunden, ein Perzentil (z.B. p90) oder 'off' sein, nicht '{hedge_after}'"
+            ) from None
+    return hedge_after if hedge_after > 0 else None
 
-    # Schritt A: Perplexity Deep Research
-    print("  → Perplexity Deep Research...")
-    try:
-        perplexity_result = research_perplexity(guest_name, context_hint)
-        print("  ✓ Perplexity abgeschlossen")
-    except Exception as e:
-        print(f"  ✗ Perplexity fehlgeschlagen: {e}")
-        perplexity_result = None
 
-    # Schritt B: Tavily Echtzeit-Check (jetzt MIT Kontext)
-    print("  → Tavily Echtzeit-Check...")
+def _cache_template(provider: ResearchProvider) -> str:
+    """
+    Fingerprint für den Cache-Key: Research-Prompt + Quelltext des Providers samt
+    Request-Aufbau und Formatierung (Prompts, Queries).
+    """
+    sources = []
+    for part in (provider.fetch, *provider.parts):
+        try:
+            sources.append(inspect.getsource(part))
+        except (OSError, TypeError):
+            sources.append(getattr(part, "__qualname__", repr(part)))
+    return RESEARCH_PROMPT_TEMPLATE + "".join(sources)
+
+
+def _run_provider(
+    provider: ResearchProvider,
+    guest_name: str,
+    context_hint: str,
+    timings: dict,
+    refresh: bool = False,
+    checkpoint=None,
+) -> Optional[str]:
+    """
+    Ruft einen Provider auf, misst die Laufzeit und fängt Fehler ab (None bei Fehlschlag).
+    Ergebnisse werden im Research-Cache abgelegt; refresh=True umgeht den Cache.
+    Mit checkpoint (RunCheckpoint) wird ein bereits gespeichertes Ergebnis dieses Laufs
+    wiederverwendet bzw. ein neues Ergebnis als Stufe gesichert.
+    """
+    with tracing.span("provider", provider=provider.label, guest=slugify(guest_name)) as span:
+        result = _fetch_provider(provider, guest_name, context_hint, timings, refresh, checkpoint)
+        span.set(ok=result is not None, bytes=len(result.encode("utf-8")) if result else 0)
+        return result
+
+
+def _fetch_provider(provider: ResearchProvider, guest_name: str, context_hint: str, timings: dict, refresh: bool, checkpoint) -> Optional[str]:
+    label = provider.label
+    template = _cache_template(provider) if research_cache.is_enabled() else ""
+    reused = _reuse_result(label, guest_name, context_hint, timings, refresh, checkpoint, template)
+    if reused is not None:
+        return reused
+
+    print(f"  → {label} gestartet...")
+    tracing.annotate(source="api")
+    start = time.perf_counter()
     try:
-        tavily_result = research_tavily(guest_name, context_hint)
-        print("  ✓ Tavily abgeschlossen")
+        result = provider.fetch(guest_name, context_hint)
+        print(f"  ✓ {label} abgeschlossen")
+    except resilience.CircuitOpenError as e:
+        # Provider gerade gesperrt – ohne Wartezeit weiter zum Fallback
+        print(f"  ⚡ {label} übersprungen: {e}")
+        tracing.annotate(error=f"{type(e).__name__}: {e}")
+        result = None
     except Exception as e:
-        print(f"  ✗ Tavily fehlgeschlagen: {e}")
-        tavily_result = None
-
-    # Schritt C: OpenAI Fallback (nur wenn Perplexity fehlgeschlagen)
-    openai_result = None
-    if perplexity_result is None:
-        print("  → OpenAI Fallback-Research...")
+        print(f"  ✗ {label} fehlgeschlagen: {e}")
+        tracing.annotate(error=f"{type(e).__name__}: {e}")
+        result = None
+    _keep_result(label, guest_name, context_hint, timings, time.perf_counter() - start, result, checkpoint, template)
+    return result
+
+
+def _reuse_result(label: str, guest_name: str, context_hint: str, timings: dict, refresh: bool, checkpoint, template: str) -> Optional[str]:
+    """Ergebnis aus dem Checkpoint des Laufs oder dem Research-Cache (None, wenn keins vorliegt)."""
+    if checkpoint is not None and checkpoint.has(label):
+        print(f"  ↻ {label} aus Checkpoint")
+        tracing.annotate(source="checkpoint")
+        timings[label] = 0.0
+        return checkpoint.load(label)
+
+    if template and not refresh:
+        cached = research_cache.get(label, guest_name, context_hint, template)
+        if cached is not None:
+            print(f"  ⚡ {label} aus Cache")
+            tracing.annotate(source="cache")
+            timings[label] = 0.0
+            if checkpoint is not None:
+                checkpoint.save(label, cached)
+            return cached
+    return None
+
+
+def _keep_result(label: str, guest_name: str, context_hint: str, timings: dict, seconds: float, result: Optional[str], checkpoint, template: str) -> None:
+    """Protokolliert die Latenz und sichert ein neues Ergebnis in Checkpoint und Research-Cache."""
+    timings[label] = seconds
+    # Nur echte Latenzen protokollieren – sie steuern die Hedging-Schwelle (observed_latency)
+    if not transport.is_offline():
+        _append_jsonl(LATENCY_LOG_PATH, {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "provider": label,
+            "seconds": round(seconds, 3),
+            "ok": result is not None,
+        })
+    if result is not None and checkpoint is not None:
+        checkpoint.save(label, result)
+    if result is not None and template:
         try:
-            openai_result = research_openai_fallback(guest_name, context_hint)
-            print("  ✓ OpenAI abgeschlossen")
+            research_cache.put(label, guest_name, context_hint, template, result)
         except Exception as e:
-            print(f"  ✗ OpenAI fehlgeschlagen: {e}")
+            print(f"  ⚠️  Cache konnte nicht geschrieben werden: {e}")
+
+
+def _run_group(
+    group: list[list[ResearchProvider]],
+    guest_name: str,
+    context_hint: str,
+    hedge_after: Optional[float],
+    timings: dict,
+    refresh: bool = False,
+    checkpoint=None,
+) -> dict[str, str]:
+    """
+    Führt eine Gruppe des Plans aus (research_providers.plan): Stufe für Stufe, bis eine Stufe
+    Ergebnisse liefert. Gibt {label: ergebnis} der gewinnenden Stufe zurück (leer, wenn keine lieferte).
+
+    Mit hedge_after (Sekunden) startet die nächste Stufe spekulativ, sobald die laufende länger
+    als die Schwelle braucht. Die erste Stufe mit Ergebnis gewinnt; bei Gleichstand die frühere.
+    """
+    hedging = hedge_after is not None and len(group) > 1
+    if not hedging and all(len(stage) == 1 for stage in group):
+        for (provider,) in group:
+            result = _run_provider(provider, guest_name, context_hint, timings, refresh, checkpoint)
+            if result is not None:
+                return {provider.label: result}
+        return {}
+
+    pool = ThreadPoolExecutor(max_workers=sum(len(stage) for stage in group), thread_name_prefix="provider")
+    start = time.perf_counter()
+    futures = {}
+    launched = 0
+    hedge_at = None
+    hedged = False
+    winner = None
+
+    def launch() -> None:
+        nonlocal launched, hedge_at
+        for provider in group[launched]:
+            future = pool.submit(tracing.bind(_run_provider), provider, guest_name, context_hint, timings, refresh, checkpoint)
+            futures[future] = (launched, provider)
+        launched += 1
+        hedge_at = time.perf_counter() + hedge_after if hedging and launched < len(group) else None
 
-    # Ergebnisse zusammenführen
-    if perplexity_result is None and openai_result is None:
-        raise RuntimeError(f"Research für '{guest_name}' komplett fehlgeschlagen. Weder Perplexity noch OpenAI lieferten Ergebnisse.")
+    try:
+        launch()
+        while winner is None:
+            pending = [future for future in futures if not future.done()]
+            if not pending:
+                if launched == len(group):
+                    break
+                launch()
+                continue
+            timeout = None if hedge_at is None else max(0.0, hedge_at - time.perf_counter())
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                hedged = True
+                print(f"  ⏳ {_stage_label(group[launched - 1])} nach {hedge_after:.1f}s ohne Antwort – {_stage_label(group[launched])} startet spekulativ")
+                launch()
+                continue
+            # Bei Gleichstand hat die frühere Stufe Vorrang (z.B. Perplexity: strukturiertere Ergebnisse)
+            succeeded = sorted({stage for future, (stage, _) in futures.items() if future.done() and future.result() is not None})
+            if succeeded:
+                winner = succeeded[0]
+                # Übrige Provider derselben Stufe (Policy parallel) gehören mit zum Ergebnis
+                wait([future for future, (stage, _) in futures.items() if stage == winner])
+    finally:
+        # Verlierer werden verworfen: laufende HTTP-Requests lassen sich nicht abbrechen,
+        # ihr Ergebnis wird aber ignoriert und blockiert den Research nicht.
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    results = {
+        provider.label: future.result()
+        for future, (stage, provider) in futures.items()
+        if stage == winner and future.result() is not None
+    }
+    if hedging:
+        _log_hedge(guest_name, hedge_after, hedged, list(results), time.perf_counter() - start)
+    return results
+
+
+def _stage_label(stage: list[ResearchProvider]) -> str:
+    return " + ".join(provider.label for provider in stage)
+
+
+def _log_hedge(guest_name: str, hedge_after: float, hedged: bool, winners: list[str], seconds: float) -> None:
+    if hedged:
+        print(f"  🏁 Hedging-Gewinner: {' + '.join(winners) or 'keiner'}")
+    _append_jsonl(HEDGE_LOG_PATH, {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "guest": guest_name,
+        "hedge_after": round(hedge_after, 1),
+        "hedged": hedged,
+        "winner": " + ".join(winners) or None,
+        "seconds": round(seconds, 3),
+    })
+
+
+def _print_timings(timings: dict, total: float) -> None:
+    """Gibt die Laufzeit pro Provider aus, inkl. Vergleich mit sequentieller Ausführung."""
+    breakdown = " | ".join(f"{label} {seconds:.1f}s" for label, seconds in timings.items())
+    print(f"  ⏱  {breakdown} | Gesamt {total:.1f}s (sequentiell: {sum(timings.values()):.1f}s)")
+
+
+def _research_plan(policy: Optional[str], hedge_after) -> tuple[list, Optional[float]]:
+    """Ablaufplan laut Policy und Hedging-Schwelle; meldet Provider ohne API-Key."""
+    policy = research_providers.resolve_policy(policy)
+    hedge_seconds = None
+    if cost_ledger.economy_mode():
+        # Sparmodus (Budget erschöpft): günstigste Provider zuerst, kein spekulativer Zweit-Call
+        policy = "cheapest"
+    skipped = []
+    groups = research_providers.plan(policy, skipped)
+    for provider in skipped:
+        print(f"  ⚪ {provider.label} übersprungen: {provider.env_key} nicht gesetzt")
+    deep = next((group for group in groups if group[0][0].role != "realtime"), None)
+    if deep and not cost_ledger.economy_mode():
+        hedge_seconds = _resolve_hedge_after(hedge_after, deep[0][0].label)
+    return groups, hedge_seconds
+
+
+def run_research(
+    guest_name: str,
+    context_hint: str = "",
+    concurrent: Optional[bool] = None,
+    timings: Optional[dict] = None,
+    hedge_after=None,
+    refresh: bool = False,
+    checkpoint=None,
+    deadline=None,
+    policy: Optional[str] = None,
+) -> Path:
+    """
+    Führt die komplette Research-Pipeline aus und speichert das Ergebnis.
+    Welche Provider wann laufen, bestimmt die Registry (research_providers.py).
+
+    concurrent: Gruppen des Plans (Deep Research, Echtzeit-Check) parallel abfragen
+        (Default: Env RESEARCH_CONCURRENT, an).
+    timings: Optionales Dict, das mit der Laufzeit pro Provider (Sekunden) befüllt wird.
+    hedge_after: Schwelle für den spekulativen Start des nächsten Deep-Providers – Sekunden, "p90"
+        oder "off" (Default: Env RESEARCH_HEDGE_AFTER, aus; im Sparmodus immer aus).
+    refresh: Research-Cache umgehen und alle Provider frisch abfragen.
+    checkpoint: RunCheckpoint des Laufs – bereits abgeschlossene Stufen werden übernommen
+        (z.B. beim Fortsetzen nach einem Fehler), neue Ergebnisse gesichert.
+    deadline: Zeitbudget in Sekunden für den gesamten Research (Default: Env RESEARCH_DEADLINE,
+        aus). Danach geht es mit den fertigen Providern weiter; fehlende Teile werden im
+        Research markiert und in .tmp/deadline_log.jsonl protokolliert.
+    policy: Ablauf-Policy der Registry (Default: Env RESEARCH_POLICY, fallback).
+    """
+    if concurrent is None:
+        concurrent = os.getenv("RESEARCH_CONCURRENT", "1") != "0"
+    deadline_seconds = _resolve_deadline(deadline)
+    if timings is None:
+        timings = {}
+
+    print(f"🔍 Starte Research für: {guest_name}")
+    if context_hint:
+        print(f"  Kontext: {context_hint}")
+
+    if checkpoint is not None and checkpoint.has("research"):
+        print("  ↻ Research aus Checkpoint")
+        return save_research(guest_name, checkpoint.load("research"), context_hint)
+
+    groups, hedge_seconds = _research_plan(policy, hedge_after)
+    start = time.perf_counter()
+    deadline_at = start + deadline_seconds if deadline_seconds else None
+
+    def remaining() -> Optional[float]:
+        return None if deadline_at is None else max(0.0, deadline_at - time.perf_counter())
+
+    # Deep Research (z.B. Perplexity, ggf. OpenAI) und Echtzeit-Check (Tavily) sind unabhängig
+    # voneinander – im Concurrent-Modus laufen sie gleichzeitig, die Wartezeit ist dann nur
+    # noch die des langsameren Providers.
+    # Retries der Provider enden mit dem Zeitbudget (tracing.bind reicht es an die Threads weiter)
+    futures = []
+    pool = ThreadPoolExecutor(max_workers=len(groups) if concurrent and groups else 1, thread_name_prefix="research")
+    try:
+        with resilience.deadline_context(deadline_seconds):
+            for group in groups:
+                if remaining() == 0:
+                    break
+                futures.append(pool.submit(tracing.bind(_run_group), group, guest_name, context_hint, hedge_seconds, timings, refresh, checkpoint))
+                if not concurrent:
+                    wait(futures[-1:], timeout=remaining())
+        wait(futures, timeout=remaining())
+    finally:
+        # Nach Ablauf des Zeitbudgets nicht auf Nachzügler warten: laufende HTTP-Requests lassen
+        # sich nicht abbrechen, ihr Ergebnis wird aber ignoriert.
+        pool.shutdown(wait=deadline_at is None, cancel_futures=True)
+
+    results = {}
+    timed_out = []
+    for index, group in enumerate(groups):
+        if index < len(futures) and futures[index].done():
+            results.update(futures[index].result())
+        else:
+            timed_out += research_providers.waiting_on(group, timings)
+
+    _print_timings(timings, time.perf_counter() - start)
+    if timed_out:
+        _report_deadline(guest_name, deadline_seconds, timed_out, time.perf_counter() - start)
+
+    output = _merge_research(guest_name, context_hint, results, timed_out)
+    # Unvollständigen Research nicht sichern – ein fortgesetzter Lauf versucht es erneut
+    if checkpoint is not None and not timed_out:
+        checkpoint.save("research", output)
+    return save_research(guest_name, output, context_hint)
+
+
+def _resolve_deadline(deadline) -> Optional[float]:
+    """
+    Zeitbudget des Research in Sekunden (None = unbegrenzt); "off"/"0" schaltet es ab.
+    Wirft ValueError bei einem ungültigen Wert (z.B. RESEARCH_DEADLINE=30s).
+    """
+    if deadline is None:
+        deadline = os.getenv("RESEARCH_DEADLINE", "off")
+    if isinstance(deadline, str):
+        value = deadline.strip().lower()
+        if value in ("", "off", "0"):
+            return None
+        try:
+            deadline = float(value)
+            if not math.isfinite(deadline):
+                raise ValueError
+        except ValueError:
+            raise ValueError(
+                f"Zeitbudget (RESEARCH_DEADLINE bzw. --deadline) muss Sekunden oder 'off' sein, nicht '{deadline}'"
+            ) from None
+    return deadline if deadline > 0 else None
+
+
+def _report_deadline(guest_name: str, deadline: float, timed_out: list[str], seconds: float) -> None:
+    """Meldet und protokolliert, welche Provider das Zeitbudget überschritten haben."""
+    print(f"  ⏰ Zeitbudget von {deadline:g}s überschritten – weiter ohne: {', '.join(timed_out)}")
+    tracing.annotate(deadline_s=deadline, timed_out=timed_out)
+    _append_jsonl(DEADLINE_LOG_PATH, {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "guest": guest_name,
+        "deadline": deadline,
+        "timed_out": timed_out,
+        "seconds": round(seconds, 3),
+    })
+
+
+def _merge_research(
+    guest_name: str,
+    context_hint: str,
+    results: dict[str, str],
+    timed_out: Optional[list[str]] = None,
+) -> str:
+    """
+    Führt die Provider-Ergebnisse ({label: markdown}) zum Research-Dokument zusammen – immer
+    in Registry-Reihenfolge (Rolle, Priorität), unabhängig davon, wer zuerst fertig war.
+    timed_out: Provider, die das Zeitbudget überschritten haben – ihre Teile werden markiert.
+    Ohne Deep Research geht es nur weiter, wenn sie am Zeitbudget scheiterte und ein
+    Echtzeit-Ergebnis da ist.
+    """
+    timed_out = timed_out or []
+    registered = research_providers.providers()
+    deep = [p for p in registered if p.role != "realtime"]
+    realtime = [p for p in registered if p.role == "realtime"]
+
+    def parts(providers: list[ResearchProvider]) -> list[str]:
+        return [
+            f"{p.heading}\n\n{results[p.label]}" if p.heading else results[p.label]
+            for p in providers if results.get(p.label)
+        ]
+
+    deep_parts = parts(deep)
+    realtime_parts = parts(realtime)
+    deep_timed_out = any(p.label in timed_out for p in deep)
+    if not deep_parts and not (deep_timed_out and realtime_parts):
+        if deep_timed_out:
+            raise RuntimeError(f"Research für '{guest_name}' lieferte innerhalb des Zeitbudgets keine Ergebnisse.")
+        labels = ", ".join(p.label for p in deep) or "keiner registriert"
+        raise RuntimeError(f"Research für '{guest_name}' komplett fehlgeschlagen. Kein Deep-Research-Provider lieferte Ergebnisse ({labels}).")
 
     output = f"# Research-Dossier: {guest_name}\n"
     if context_hint:
         output += f"**Identifikation:** {context_hint}\n"
     output += f"*Erstellt am {datetime.now().strftime('%d.%m.%Y %H:%M')}*\n\n"
 
-    if perplexity_result:
-        output += perplexity_result
-    elif openai_result:
-        output += "## Deep Research (OpenAI Fallback)\n\n"
-        output += openai_result
+    if deep_parts:
+        output += "\n\n".join(deep_parts)
+    else:
+        output += "## Deep Research\n\n"
+        output += f"Keine Deep-Research-Daten verfügbar {research_providers.TIMED_OUT_NOTE}.\n"
 
     output += "\n\n---\n\n"
 
-    if tavily_result:
-        output += tavily_result
+    if realtime_parts:
+        output += "\n\n".join(realtime_parts)
+    elif any(p.label in timed_out for p in realtime):
+        output += f"{REALTIME_MARKER}\n\nKeine Echtzeit-Daten verfügbar {research_providers.TIMED_OUT_NOTE}.\n"
+    return output
+
+
+def refresh_realtime(guest_name: str, context_hint: str = "") -> Path:
+    """
+    Erneuert nur den Echtzeit-Check (Tavily) im gespeicherten Research eines Gastes.
+    Deep Research bleibt unverändert; der Abschnitt ab "## Echtzeit-Check (Tavily)" wird
+    ausgetauscht (bzw. angehängt). Wirft FileNotFoundError, wenn es noch kein Research gibt.
+    Der Research-Cache wird immer umgangen – sonst kämen dieselben Nachrichten zurück,
+    die ersetzt werden sollen (das neue Ergebnis landet trotzdem im Cache).
+    """
+    research_path = research_path_for(guest_name, context_hint)
+    if not research_path.exists():
+        raise FileNotFoundError(f"Kein Research für '{guest_name}' vorhanden – bitte zuerst die komplette Pipeline ausführen.")
+
+    print(f"🔄 Erneuere Echtzeit-Check für: {guest_name}")
+    timings = {}
+    realtime_parts = []
+    for provider in research_providers.providers("realtime"):
+        if provider.is_available():
+            result = _run_provider(provider, guest_name, context_hint, timings, refresh=True)
+            if result is not None:
+                realtime_parts.append(f"{provider.heading}\n\n{result}" if provider.heading else result)
+    if not realtime_parts:
+        raise RuntimeError(f"Echtzeit-Check für '{guest_name}' fehlgeschlagen.")
 
+    content = research_path.read_text(encoding="utf-8")
+    deep_part = content.split(REALTIME_MARKER, 1)[0] if REALTIME_MARKER in content else content.rstrip() + "\n\n---\n\n"
+    return save_research(guest_name, deep_part + "\n\n".join(realtime_parts), context_hint)
+
+
+def research_path_for(guest_name: str, context_hint: str = "") -> Path:
+    """Pfad des gespeicherten Research einer Gast-Identität."""
+    return PROJECT_ROOT / ".tmp" / f"{identity_slug(guest_name, context_hint)}_research.md"
+
+
+def save_research(guest_name: str, output: str, context_hint: str = "") -> Path:
+    """Speichert das zusammengeführte Research (Rohdaten + verifizierte Fassung)."""
     # Speichern: Rohdaten
     tmp_dir = PROJECT_ROOT / ".tmp"
     tmp_dir.mkdir(exist_ok=True)
-    slug = slugify(guest_name)
+    slug = identity_slug(guest_name, context_hint)
     raw_path = tmp_dir / f"{slug}_research_raw.md"
     raw_path.write_text(output, encoding="utf-8")
     print(f"  💾 Rohdaten gespeichert: {raw_path}")
@@ -427,7 +993,9 @@ def run_research(guest_name: str, context_hint: str = "") -> Path:
     # Die Disambiguierung am Anfang stellt sicher, dass wir die richtige Person recherchieren.
     # Ein Claude-Filter ohne Web-Zugang würde Live-Daten aus 2025/2026 fälschlicherweise blockieren.
     verified_path = tmp_dir / f"{slug}_research.md"
-    verified_path.write_text(output, encoding="utf-8")
+    with tracing.span("file_write", kind="research", guest=slug, path=verified_path.name, bytes=len(output.encode("utf-8"))):
+        verified_path.write_text(output, encoding="utf-8")
+        archive_index.record(verified_path, "research", guest_name, output)
 
     print(f"✅ Research gespeichert: {verified_path}")
     return verified_path
@@ -451,6 +1019,7 @@ if __name__ == "__main__":
         choice = input("\nWelche Person meinst du? (Nummer eingeben): ").strip()
         idx = int(choice) - 1
         selected = candidates[idx]
+        guest_registry.remember_choice(guest, selected)
         print(f"\n✓ Ausgewählt: {selected['name']} – {selected['description']}")
         run_research(selected["name"], selected.get("context_hint", ""))
     else:
@@ -0,0 +1,185 @@
+"""
+Registry der Research-Provider.
+
+Jeder Provider meldet sich mit Rolle, geschätzten Kosten pro Research, erwarteter Latenz und
+benötigtem API-Key an. run_research (research_guest.py, async_engine.py) fragt die Registry
+nach einem Plan und führt die Ergebnisse in fester Reihenfolge zusammen – eine neue Quelle
+oder ein lokaler Ersatz für Tests braucht nur register(), keine Änderung am Orchestrator:
+
+    research_providers.register(ResearchProvider("Archiv", "deep", lookup_archive, priority=5))
+
+Rollen:
+    deep      Deep Research; der erste Provider mit Ergebnis gewinnt.
+    fallback  Deep Research, aber nur wenn kein deep-Provider geliefert hat (bzw. beim Hedging).
+    realtime  Echtzeit-Check; alle laufen parallel zur Deep Research und werden alle übernommen.
+
+Policy (RESEARCH_POLICY):
+    fallback  Deep-Provider nacheinander nach Priorität (Default).
+    cheapest  Wie fallback, innerhalb einer Rolle nach geschätzten Kosten (im Sparmodus immer).
+    fastest   Wie fallback, innerhalb einer Rolle nach erwarteter Latenz.
+    parallel  Alle deep-Provider gleichzeitig, alle Ergebnisse werden übernommen; fallback erst,
+              wenn keiner geliefert hat.
+
+Die eingebauten Provider (Perplexity, OpenAI Fallback, Tavily) registriert research_guest.py.
+
+Usage:
+    python tools/research_providers.py       # registrierte Provider und Plan
+"""
+
+import os
+import sys
+from pathlib import Path
+from typing import Optional
+
+import transport
+
+ROLES = ("deep", "fallback", "realtime")
+POLICIES = ("fallback", "cheapest", "fastest", "parallel")
+
+# Zusatz der Platzhalter, die der Merge für Provider über dem Zeitbudget einsetzt
+TIMED_OUT_NOTE = "(Zeitbudget überschritten)"
+
+
+class ResearchProvider:
+    """
+    Eine Research-Quelle.
+
+    label: Name in Ausgaben, Timings, Checkpoints, Cache und Tracing (z.B. "Perplexity").
+    role: "deep", "fallback" oder "realtime" (siehe Modul-Docstring).
+    fetch(guest_name, context_hint) -> str: synchroner Abruf, liefert Markdown.
+    env_key: benötigter API-Key; fehlt er, wird der Provider übersprungen (außer offline).
+    cost_usd / latency_s: Schätzwerte pro Research für die Policies cheapest/fastest.
+    priority: kleiner = früher, auch in der Reihenfolge im zusammengeführten Research.
+    heading: Überschrift vor dem Ergebnis im Research (None: das Ergebnis bringt eine mit).
+    marker: Überschrift, an der das Ergebnis im gespeicherten Research erkannt wird
+        (Default: heading; nötig, wenn das Ergebnis seine Überschrift selbst mitbringt).
+    parts: weitere Funktionen (Request-Aufbau, Formatierung), die in den Cache-Fingerprint eingehen.
+    async_method: Name der nativen Methode in async_engine.AsyncEngine; ohne läuft fetch dort
+        in einem Worker-Thread.
+    """
+
+    def __init__(
+        self,
+        label: str,
+        role: str,
+        fetch,
+        env_key: Optional[str] = None,
+        cost_usd: float = 0.0,
+        latency_s: float = 0.0,
+        priority: int = 100,
+        heading: Optional[str] = None,
+        marker: Optional[str] = None,
+        parts: tuple = (),
+        async_method: Optional[str] = None,
+    ):
+        if role not in ROLES:
+            raise ValueError(f"Unbekannte Rolle '{role}' (erlaubt: {', '.join(ROLES)})")
+        self.label = label
+        self.role = role
+        self.fetch = fetch
+        self.env_key = env_key
+        self.cost_usd = cost_usd
+        self.latency_s = latency_s
+        self.priority = priority
+        self.heading = heading
+        self.marker = marker or heading
+        self.parts = parts
+        self.async_method = async_method
+
+    def is_available(self) -> bool:
+        """API-Key vorhanden (Replay/Simulation brauchen keinen)."""
+        return not self.env_key or bool(os.getenv(self.env_key)) or transport.is_offline()
+
+    def __repr__(self) -> str:
+        return f"ResearchProvider({self.label!r}, {self.role!r})"
+
+
+_registry: dict[str, ResearchProvider] = {}
+
+
+def register(provider: ResearchProvider) -> ResearchProvider:
+    """Registriert einen Provider (ersetzt einen gleichnamigen)."""
+    _registry[provider.label] = provider
+    return provider
+
+
+def unregister(label: str) -> Optional[ResearchProvider]:
+    """Entfernt einen Provider aus der Registry und gibt ihn zurück."""
+    return _registry.pop(label, None)
+
+
+def get(label: str) -> Optional[ResearchProvider]:
+    return _registry.get(label)
+
+
+def providers(role: Optional[str] = None) -> list[ResearchProvider]:
+    """Registrierte Provider in Merge-Reihenfolge (Rolle, Priorität, Label), optional einer Rolle."""
+    ordered = sorted(_registry.values(), key=lambda p: (ROLES.index(p.role), p.priority, p.label))
+    return [p for p in ordered if role is None or p.role == role]
+
+
+def resolve_policy(policy: Optional[str] = None) -> str:
+    """Policy aus Argument oder Env RESEARCH_POLICY (Default: fallback)."""
+    policy = (policy or os.getenv("RESEARCH_POLICY", "fallback")).strip().lower()
+    if policy not in POLICIES:
+        raise ValueError(f"RESEARCH_POLICY muss {', '.join(POLICIES)} sein, nicht '{policy}'")
+    return policy
+
+
+def plan(policy: str = "fallback", skipped: Optional[list] = None) -> list[list[list[ResearchProvider]]]:
+    """
+    Ablaufplan: Gruppen, die gleichzeitig laufen. Jede Gruppe ist eine Folge von Stufen; eine
+    Stufe (Provider, die gleichzeitig laufen) startet erst, wenn die vorherige nichts geliefert
+    hat (beim Hedging schon früher). Nicht verfügbare Provider landen in skipped.
+    """
+    available = []
+    for provider in providers():
+        if provider.is_available():
+            available.append(provider)
+        elif skipped is not None:
+            skipped.append(provider)
+
+    order = {
+        "fallback": lambda p: p.priority,
+        "cheapest": lambda p: p.cost_usd,
+        "fastest": lambda p: p.latency_s,
+        "parallel": lambda p: p.priority,
+    }[policy]
+    deep_group = []
+    for role in ("deep", "fallback"):
+        members = sorted((p for p in available if p.role == role), key=lambda p: (order(p), p.priority, p.label))
+        if policy == "parallel":
+            deep_group += [members] if members else []
+        else:
+            deep_group += [[p] for p in members]
+
+    groups = [deep_group] if deep_group else []
+    groups += [[[p]] for p in available if p.role == "realtime"]
+    return groups
+
+
+def waiting_on(group: list[list[ResearchProvider]], timings: dict) -> list[str]:
+    """Provider einer Gruppe, auf die bei Ablauf des Zeitbudgets noch gewartet wurde (bzw. die nicht mehr starteten)."""
+    for stage in group:
+        missing = [p.label for p in stage if p.label not in timings]
+        if missing:
+            return missing
+    return [group[-1][-1].label] if group else []
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    # Die eingebauten Provider registriert research_guest.py – in der importierten Registry,
+    # nicht in diesem als Skript gestarteten Modul
+    import research_guest  # noqa: F401
+    import research_providers as registry
+
+    print(f"{'Provider':<18} {'Rolle':<9} {'Prio':>4} {'Kosten':>8} {'Latenz':>7}  API-Key")
+    for provider in registry.providers():
+        key = provider.env_key or "—"
+        state = "✓" if provider.is_available() else "✗ fehlt"
+        print(f"{provider.label:<18} {provider.role:<9} {provider.priority:>4} ${provider.cost_usd:>7.3f} {provider.latency_s:>6.1f}s  {key} {state}")
+    policy = registry.resolve_policy()
+    print(f"\nPlan ({policy}):")
+    for group in registry.plan(policy):
+        print("  " + " → ".join(" + ".join(p.label for p in stage) for stage in group))
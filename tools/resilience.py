@@ -0,0 +1,345 @@
+"""
+Wiederholungen und Circuit Breaker für Provider-Calls.
+
+- Retry: Vorübergehende Fehler (429, 5xx, 408, Timeouts, Verbindungsabbrüche) werden mit
+  exponentiellem Backoff und Jitter wiederholt; ein Retry-After-Header des Providers hat
+  Vorrang. Dauerhafte Fehler (401/403 Auth, 400/404/422, Kontingent erschöpft) schlagen sofort
+  durch – ein erneuter Versuch würde nur Zeit kosten. Innerhalb von deadline_context()
+  (Zeitbudget des Research) wird nur wiederholt, solange das Budget die Wartezeit hergibt.
+- Circuit Breaker pro Provider: Nach BREAKER_THRESHOLD fehlgeschlagenen Calls in Folge
+  (vorübergehende Fehler, jeweils erst nach allen Wiederholungen gezählt) ist der Provider für BREAKER_COOLDOWN Sekunden gesperrt; Calls scheitern sofort mit
+  CircuitOpenError, der Research nimmt den Fallback-Pfad. Danach darf ein einzelner
+  Probe-Call durch – Erfolg schließt den Breaker, Fehler sperrt erneut. Der Zustand liegt in
+  .tmp/circuit_breaker.sqlite und gilt damit für alle Prozesse (App, Batch, CLI).
+
+Konfiguration per Env: RETRY_ATTEMPTS (Versuche gesamt, Default 3), RETRY_BASE_DELAY (1 s),
+RETRY_MAX_DELAY (20 s; längeres Retry-After = kein Retry), BREAKER_THRESHOLD (5),
+BREAKER_COOLDOWN (60 s, 0 = Breaker aus).
+
+Offline (Replay/Simulation, transport.py) wird wiederholt, der Breaker aber nicht
+angefasst, damit simulierte Fehler keinen echten Provider sperren.
+
+    response = resilience.call("perplexity", post)          # post: ein Versuch inkl. Rate Limit
+    response = await resilience.call_async("perplexity", post_async)
+
+    with resilience.deadline_context(75):                   # Retries enden mit dem Zeitbudget
+        ...
+
+Usage:
+    python tools/resilience.py               # Zustand der Breaker
+    python tools/resilience.py reset [PROVIDER]
+"""
+
+import asyncio
+import contextvars
+import os
+import random
+import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Optional
+
+import tracing
+import transport
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+BREAKER_PATH = PROJECT_ROOT / ".tmp" / "circuit_breaker.sqlite"
+
+# Diese HTTP-Status gelten als vorübergehend (zusätzlich alle 5xx)
+RETRY_STATUSES = {408, 425, 429}
+
+# Exceptions ohne HTTP-Status: Timeouts und Verbindungsfehler von requests, httpx und den SDKs
+TRANSIENT_NAMES = ("Timeout", "Connect", "NetworkError", "RemoteProtocolError")
+
+# Ende des Zeitbudgets (time.monotonic) im aktuellen Kontext; gelangt per tracing.bind bzw.
+# asyncio-Task in Worker-Threads und Tasks
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("resilience_deadline", default=None)
+
+
+class CircuitOpenError(RuntimeError):
+    """Der Circuit Breaker des Providers ist offen – der Call wird gar nicht erst versucht."""
+
+    def __init__(self, provider: str, failures: int, retry_in: float):
+        self.provider = provider
+        self.failures = failures
+        self.retry_in = retry_in
+        super().__init__(f"Circuit Breaker für {provider} offen ({failures} Fehler in Folge, nächster Versuch in {retry_in:.0f}s)")
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, str(default)))
+
+
+def is_transient(error: Exception) -> bool:
+    """True für Fehler, bei denen ein erneuter Versuch Erfolg haben kann."""
+    status = transport._error_status(error)
+    if status is not None:
+        return status in RETRY_STATUSES or status >= 500
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    return any(part in cls.__name__ for cls in type(error).__mro__ for part in TRANSIENT_NAMES)
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Wartezeit aus dem Retry-After-Header der Fehlerantwort (Sekunden oder HTTP-Datum)."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    value = headers.get("retry-after") or headers.get("Retry-After") if headers else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff(attempt: int) -> float:
+    """Wartezeit vor Versuch attempt+1: Full Jitter über base·2^attempt, gedeckelt."""
+    ceiling = min(_env_float("RETRY_MAX_DELAY", 20), _env_float("RETRY_BASE_DELAY", 1) * 2 ** attempt)
+    return random.uniform(0, ceiling)
+
+
+@contextmanager
+def deadline_context(seconds: Optional[float]):
+    """Begrenzt Wiederholungen innerhalb des Blocks auf ein Zeitbudget in Sekunden (None = unbegrenzt)."""
+    token = _deadline.set(None if seconds is None else time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_budget() -> Optional[float]:
+    """Verbleibende Sekunden des Zeitbudgets im aktuellen Kontext (None = unbegrenzt)."""
+    deadline = _deadline.get()
+    return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+
+def _next_delay(provider: str, error: Exception, attempt: int, attempts: int) -> Optional[float]:
+    """Wartezeit bis zum nächsten Versuch – None, wenn nicht wiederholt wird."""
+    if attempt + 1 >= attempts:
+        return None
+    hinted = retry_after(error)
+    if hinted is not None:
+        if hinted > _env_float("RETRY_MAX_DELAY", 20):
+            print(f"  ✗ {provider}: Retry-After {hinted:.0f}s zu lang – kein neuer Versuch")
+            return None
+        # Kleiner Jitter, damit parallele Läufe nicht gleichzeitig wiederkommen
+        delay = hinted + random.uniform(0, 0.1 * hinted + 0.1)
+    else:
+        delay = backoff(attempt)
+    budget = remaining_budget()
+    if budget is not None and delay >= budget:
+        print(f"  ✗ {provider}: Zeitbudget reicht nicht für einen neuen Versuch ({budget:.1f}s übrig)")
+        return None
+    return delay
+
+
+def call(provider: str, fn, *args, **kwargs):
+    """
+    Ruft fn(*args, **kwargs) mit Retry-Policy und Circuit Breaker auf. fn ist genau ein
+    Versuch (inkl. rate_limit.acquire und raise_for_status). Wirft CircuitOpenError, solange
+    der Breaker offen ist, sonst den Fehler des letzten Versuchs.
+    """
+    attempts = max(1, int(os.getenv("RETRY_ATTEMPTS", "3")))
+    for attempt in range(attempts):
+        probe = allow(provider)
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            delay = _failed(provider, e, attempt, attempts, probe)
+            if delay is None:
+                raise
+            time.sleep(delay)
+            continue
+        record_success(provider)
+        return result
+
+
+async def call_async(provider: str, fn, *args, **kwargs):
+    """
+    Wie call(), für Coroutine-Funktionen; gewartet wird per asyncio.sleep. Der Breaker-Zustand
+    (SQLite) wird in einem Worker-Thread gelesen und geschrieben, damit der Event-Loop nicht blockiert.
+    """
+    attempts = max(1, int(os.getenv("RETRY_ATTEMPTS", "3")))
+    for attempt in range(attempts):
+        probe = await asyncio.to_thread(allow, provider)
+        try:
+            result = await fn(*args, **kwargs)
+        except Exception as e:
+            delay = await asyncio.to_thread(_failed, provider, e, attempt, attempts, probe)
+            if delay is None:
+                raise
+            await asyncio.sleep(delay)
+            continue
+        await asyncio.to_thread(record_success, provider)
+        return result
+
+
+def _failed(provider: str, error: Exception, attempt: int, attempts: int, probe: bool = False) -> Optional[float]:
+    """
+    Verbucht einen fehlgeschlagenen Versuch; gibt die Wartezeit bis zum nächsten zurück (None = aufgeben).
+    Der Breaker zählt einen Fehler pro Call, erst wenn nicht mehr wiederholt wird; ein
+    gescheiterter Probe-Call wird nicht wiederholt, sondern sperrt sofort erneut.
+    """
+    if not is_transient(error):
+        return None
+    delay = None if probe else _next_delay(provider, error, attempt, attempts)
+    if delay is None:
+        record_failure(provider)
+        return None
+    status = transport._error_status(error) or type(error).__name__
+    print(f"  ↻ {provider}: {status} – neuer Versuch in {delay:.1f}s ({attempt + 2}/{attempts})")
+    tracing.increment("retries")
+    return delay
+
+
+# --- Circuit Breaker ---
+
+
+def _threshold() -> int:
+    return int(os.getenv("BREAKER_THRESHOLD", "5"))
+
+
+def _cooldown() -> float:
+    return _env_float("BREAKER_COOLDOWN", 60)
+
+
+def _enabled() -> bool:
+    return _cooldown() > 0 and _threshold() > 0 and not transport.is_offline()
+
+
+def _connect() -> sqlite3.Connection:
+    BREAKER_PATH.parent.mkdir(exist_ok=True)
+    conn = sqlite3.connect(BREAKER_PATH, timeout=30)
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS breakers (
+            provider TEXT PRIMARY KEY,
+            state TEXT NOT NULL DEFAULT 'closed',
+            failures INTEGER NOT NULL DEFAULT 0,
+            opened_at REAL NOT NULL DEFAULT 0,
+            updated_at TEXT
+        )"""
+    )
+    return conn
+
+
+def allow(provider: str) -> bool:
+    """
+    Wirft CircuitOpenError, solange der Breaker offen ist. Nach Ablauf des Cooldowns
+    darf genau ein Aufrufer (prozessübergreifend) einen Probe-Call machen ("half_open").
+    True, wenn dieser Aufrufer den Probe-Call macht.
+    """
+    if not _enabled():
+        return False
+    now = time.time()
+    cooldown = _cooldown()
+    with _connect() as conn:
+        row = conn.execute("SELECT state, failures, opened_at FROM breakers WHERE provider = ?", (provider,)).fetchone()
+        if row is None or row[0] == "closed":
+            return False
+        state, failures, opened_at = row
+        # Probe beanspruchen: opened_at neu setzen, damit parallele Aufrufer gesperrt bleiben.
+        # Auch ein hängengebliebener Probe (half_open) wird nach einem weiteren Cooldown abgelöst.
+        claimed = conn.execute(
+            "UPDATE breakers SET state = 'half_open', opened_at = ?, updated_at = ? WHERE provider = ? AND opened_at = ? AND opened_at + ? <= ?",
+            (now, _timestamp(), provider, opened_at, cooldown, now),
+        ).rowcount
+    if claimed:
+        print(f"  ⚡ Circuit Breaker {provider}: Probe-Call")
+        return True
+    raise CircuitOpenError(provider, failures, max(0.0, opened_at + cooldown - now))
+
+
+def record_success(provider: str) -> None:
+    """Erfolgreicher Call: Fehlerzähler zurücksetzen, Breaker schließen."""
+    if not _enabled():
+        return
+    with _connect() as conn:
+        conn.execute(
+            "UPDATE breakers SET failures = 0, updated_at = ? WHERE provider = ? AND failures > 0", (_timestamp(), provider)
+        )
+        closed = conn.execute(
+            "UPDATE breakers SET state = 'closed' WHERE provider = ? AND state != 'closed'", (provider,)
+        ).rowcount
+    if closed:
+        print(f"  ✓ Circuit Breaker {provider} wieder geschlossen")
+        tracing.annotate(breaker="closed")
+
+
+def record_failure(provider: str) -> bool:
+    """Fehlgeschlagener Call (nach allen Versuchen): zählt mit und öffnet ggf. den Breaker. True, wenn er (wieder) offen ist."""
+    if not _enabled():
+        return False
+    now = time.time()
+    with _connect() as conn:
+        conn.execute("INSERT OR IGNORE INTO breakers (provider) VALUES (?)", (provider,))
+        conn.execute(
+            "UPDATE breakers SET failures = failures + 1, updated_at = ? WHERE provider = ?", (_timestamp(), provider)
+        )
+        state, failures = conn.execute("SELECT state, failures FROM breakers WHERE provider = ?", (provider,)).fetchone()
+        opened = state == "half_open" or (state == "closed" and failures >= _threshold())
+        if opened:
+            conn.execute(
+                "UPDATE breakers SET state = 'open', opened_at = ? WHERE provider = ?", (now, provider)
+            )
+    if opened:
+        print(f"  ⚡ Circuit Breaker {provider} offen ({failures} Fehler in Folge) – {_cooldown():.0f}s Pause")
+        tracing.annotate(breaker="open")
+    return state != "closed" or opened
+
+
+def status() -> list[dict]:
+    """Zustand aller Breaker (Provider, Zustand, Fehler in Folge, Sekunden bis zum nächsten Probe)."""
+    if not BREAKER_PATH.exists():
+        return []
+    now = time.time()
+    with _connect() as conn:
+        rows = conn.execute("SELECT provider, state, failures, opened_at, updated_at FROM breakers ORDER BY provider").fetchall()
+    return [
+        {
+            "provider": provider,
+            "state": state,
+            "failures": failures,
+            "retry_in": max(0.0, opened_at + _cooldown() - now) if state != "closed" else 0.0,
+            "updated_at": updated_at,
+        }
+        for provider, state, failures, opened_at, updated_at in rows
+    ]
+
+
+def reset(provider: Optional[str] = None) -> None:
+    """Schließt den Breaker eines Providers (ohne Angabe: alle)."""
+    with _connect() as conn:
+        if provider:
+            conn.execute("DELETE FROM breakers WHERE provider = ?", (provider,))
+        else:
+            conn.execute("DELETE FROM breakers")
+
+
+def _timestamp() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "status"
+    if command == "status":
+        entries = status()
+        if not entries:
+            print("Keine Breaker-Einträge – alle Provider geschlossen.")
+        for entry in entries:
+            extra = f"  nächster Probe in {entry['retry_in']:.0f}s" if entry["state"] != "closed" else ""
+            print(f"  {entry['provider']:<12} {entry['state']:<10} {entry['failures']:>3} Fehler in Folge  ({entry['updated_at']}){extra}")
+    elif command == "reset":
+        reset(sys.argv[2] if len(sys.argv) > 2 else None)
+        print("✓ Breaker zurückgesetzt")
+    else:
+        print("Usage: python tools/resilience.py [status|reset [PROVIDER]]")
+        sys.exit(1)
@@ -0,0 +1,211 @@
+"""
+Batch-Modus: Dossiers für eine ganze Gästeliste (z.B. die Gäste einer Woche).
+Verarbeitet mehrere Gäste parallel, läuft bei einzelnen Fehlern weiter und
+schreibt am Ende einen Report (Status, Dauer, Pfade pro Gast).
+
+Eingabe:
+    CSV mit Spalten "name" und optional "context_hint" (oder "context"), oder
+    JSON-Liste aus Strings bzw. Objekten {"name": ..., "context_hint": ...}.
+
+Ohne context_hint wird eine bereits bekannte Identität aus der Gast-Registry übernommen.
+Mehrdeutige, unbekannte Namen werden mit dem Namen allein recherchiert.
+
+Mit --async laufen alle Gäste auf einem Event-Loop (async_engine.py) statt in Threads;
+--workers begrenzt dann die gleichzeitig bearbeiteten Gäste (z.B. 20).
+
+Usage:
+    python tools/run_batch.py gaeste.csv [--workers 4] [--refresh] [--report report.json]
+    python tools/run_batch.py gaeste.csv --async --workers 20
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+
+# Projekt-Root ermitteln
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "tools"))
+
+import guest_registry
+from research_guest import research_path_for
+from run_pipeline import run_pipeline
+
+
+def load_guest_list(path: Path) -> list[dict]:
+    """Liest die Gästeliste aus einer CSV- oder JSON-Datei."""
+    if path.suffix.lower() == ".json":
+        data = json.loads(path.read_text(encoding="utf-8"))
+        guests = []
+        for entry in data:
+            if isinstance(entry, str):
+                guests.append({"name": entry, "context_hint": ""})
+            else:
+                guests.append({
+                    "name": entry["name"],
+                    "context_hint": entry.get("context_hint", entry.get("context", "")),
+                })
+        return guests
+
+    with path.open(encoding="utf-8-sig", newline="") as f:
+        reader = csv.DictReader(f)
+        return [
+            {
+                "name": row["name"].strip(),
+                "context_hint": (row.get("context_hint") or row.get("context") or "").strip(),
+            }
+            for row in reader
+            if row.get("name", "").strip()
+        ]
+
+
+def _resolve_context_hint(name: str, context_hint: str) -> str:
+    """Übernimmt bei fehlendem Hinweis die bekannte Identität aus der Registry (ohne API-Calls)."""
+    if context_hint:
+        return context_hint
+    known = guest_registry.lookup(name)
+    if known is None:
+        return ""
+    if known["chosen"]:
+        return known["chosen"].get("context_hint", "")
+    if not known["is_ambiguous"] and known["candidates"]:
+        return known["candidates"][0].get("context_hint", "")
+    return ""
+
+
+def _run_guest(guest: dict, refresh: bool) -> dict:
+    """Führt die Pipeline für einen Gast aus und liefert einen Report-Eintrag (wirft nie)."""
+    name = guest["name"]
+    start = time.time()
+    entry = {"name": name, "context_hint": guest.get("context_hint", "")}
+    try:
+        entry["context_hint"] = _resolve_context_hint(name, entry["context_hint"])
+        dossier_path = run_pipeline(name, entry["context_hint"], refresh=refresh)
+        entry.update({
+            "status": "ok",
+            "dossier": str(dossier_path),
+            "research": str(research_path_for(name, entry["context_hint"])),
+        })
+    except Exception as e:
+        entry.update({"status": "error", "error": f"{type(e).__name__}: {e}"})
+    entry["duration"] = round(time.time() - start, 1)
+    return entry
+
+
+async def _run_guest_async(engine, guest: dict, refresh: bool, limit: asyncio.Semaphore) -> dict:
+    """Wie _run_guest, aber auf dem Event-Loop der AsyncEngine."""
+    async with limit:
+        name = guest["name"]
+        start = time.time()
+        entry = {"name": name, "context_hint": guest.get("context_hint", "")}
+        try:
+            entry["context_hint"] = _resolve_context_hint(name, entry["context_hint"])
+            dossier_path = await engine.run_pipeline(name, entry["context_hint"], refresh=refresh)
+            entry.update({
+                "status": "ok",
+                "dossier": str(dossier_path),
+                "research": str(research_path_for(name, entry["context_hint"])),
+            })
+        except Exception as e:
+            entry.update({"status": "error", "error": f"{type(e).__name__}: {e}"})
+        entry["duration"] = round(time.time() - start, 1)
+    _print_done(entry)
+    return entry
+
+
+async def _run_batch_async(guests: list[dict], workers: int, refresh: bool) -> list[dict]:
+    from async_engine import AsyncEngine
+
+    limit = asyncio.Semaphore(max(1, workers))
+    async with AsyncEngine() as engine:
+        return list(await asyncio.gather(*(_run_guest_async(engine, guest, refresh, limit) for guest in guests)))
+
+
+def _print_done(entry: dict) -> None:
+    mark = "✓" if entry["status"] == "ok" else "✗"
+    print(f"  {mark} {entry['name']} ({entry['duration']:.0f}s)")
+
+
+def run_batch(guests: list[dict], workers: int = 4, refresh: bool = False, use_async: bool = False) -> dict:
+    """
+    Verarbeitet alle Gäste mit begrenzter Parallelität und gibt den Report zurück.
+    use_async: alle Gäste auf einem Event-Loop (async_engine.py) statt in Worker-Threads.
+    """
+    print("=" * 60)
+    print(f"  BATCH: {len(guests)} Gäste, {workers} parallel{' (async)' if use_async else ''}")
+    print("=" * 60)
+    start = time.time()
+
+    # Reihenfolge der Eingabeliste beibehalten – per Index, Namen können doppelt vorkommen
+    # (Namensvettern mit unterschiedlichem context_hint)
+    if use_async:
+        results = asyncio.run(_run_batch_async(guests, workers, refresh))
+    else:
+        results = [None] * len(guests)
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="batch") as pool:
+            futures = {pool.submit(_run_guest, guest, refresh): index for index, guest in enumerate(guests)}
+            for future in as_completed(futures):
+                entry = future.result()
+                results[futures[future]] = entry
+                _print_done(entry)
+
+    elapsed = time.time() - start
+    report = {
+        "started_at": datetime.fromtimestamp(start).isoformat(timespec="seconds"),
+        "duration": round(elapsed, 1),
+        "sequential_duration": round(sum(entry["duration"] for entry in results), 1),
+        "workers": workers,
+        "engine": "async" if use_async else "threads",
+        "succeeded": sum(1 for entry in results if entry["status"] == "ok"),
+        "failed": sum(1 for entry in results if entry["status"] != "ok"),
+        "guests": results,
+    }
+    return report
+
+
+def print_report(report: dict) -> None:
+    """Gibt den Batch-Report als Tabelle aus."""
+    print("\n" + "=" * 60)
+    print(f"  BATCH FERTIG in {report['duration']:.0f} Sekunden "
+          f"(sequentiell: {report['sequential_duration']:.0f}s)")
+    print(f"  {report['succeeded']} erfolgreich, {report['failed']} fehlgeschlagen")
+    print("=" * 60)
+    for entry in report["guests"]:
+        if entry["status"] == "ok":
+            print(f"  ✓ {entry['name']:<30} {entry['duration']:>6.0f}s  {entry['dossier']}")
+        else:
+            print(f"  ✗ {entry['name']:<30} {entry['duration']:>6.0f}s  {entry['error']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gästedossiers für eine ganze Gästeliste erstellen")
+    parser.add_argument("guest_list", type=Path, help="CSV- oder JSON-Datei mit Gästen")
+    parser.add_argument("--workers", type=int, default=4, help="Anzahl parallel verarbeiteter Gäste (Default: 4)")
+    parser.add_argument("--refresh", action="store_true", help="Research-Cache ignorieren")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Alle Gäste auf einem Event-Loop verarbeiten (async_engine.py)")
+    parser.add_argument("--report", type=Path, help="Pfad für den JSON-Report (Default: .tmp/batch_<Zeitstempel>.json)")
+    args = parser.parse_args()
+
+    if not args.guest_list.exists():
+        print(f"Fehler: Gästeliste nicht gefunden: {args.guest_list}")
+        sys.exit(1)
+
+    guests = load_guest_list(args.guest_list)
+    if not guests:
+        print("Fehler: Gästeliste ist leer")
+        sys.exit(1)
+
+    report = run_batch(guests, workers=args.workers, refresh=args.refresh, use_async=args.use_async)
+    print_report(report)
+
+    report_path = args.report or PROJECT_ROOT / ".tmp" / f"batch_{datetime.now().strftime('%Y-%m-%d_%H%M%S')}.json"
+    report_path.parent.mkdir(exist_ok=True)
+    report_path.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"\n📄 Report gespeichert: {report_path}")
+
+    sys.exit(1 if report["failed"] else 0)
@@ -2,38 +2,153 @@
 Hauptskript: Gästedossier-Pipeline.
 Orchestriert Research und Dossier-Erstellung.
 
+Jede Stufe wird pro Lauf gecheckpointet (.tmp/runs/{run_id}/). Ein abgebrochener Lauf
+kann mit --resume ab der letzten erfolgreichen Stufe fortgesetzt werden.
+
+Läuft für dieselbe Gast-Identität bereits ein Lauf (auch in einem anderen Prozess),
+wartet die Pipeline auf dessen Ende und übernimmt seine Ergebnisse aus den Checkpoints.
+
+Mit --freshness wird für ein bestehendes Dossier nur der Echtzeit-Check (Tavily) erneuert
+und Abschnitt 7 samt Vibe-Zeile neu geschrieben – gedacht für den Sendetag.
+
+Vor jedem Lauf werden die Budgets geprüft (cost_ledger.py): ist eines ausgeschöpft, wird
+der Lauf abgelehnt (BUDGET_POLICY=refuse) oder im Sparmodus ausgeführt (downgrade).
+
 Usage:
-    python tools/run_pipeline.py "Gastname"
+    python tools/run_pipeline.py "Gastname" [--context "Hinweis"] [--refresh]
+    python tools/run_pipeline.py "Gastname" --resume [RUN_ID]
+    python tools/run_pipeline.py "Gastname" --freshness
+    python tools/run_pipeline.py "Gastname" --section killer-fragen [--note "Hinweis"]
 """
 
+import argparse
 import sys
 import time
 from pathlib import Path
+from typing import Optional
 
 # Projekt-Root ermitteln
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(PROJECT_ROOT / "tools"))
 
-from research_guest import run_research
-from create_dossier import create_dossier
+from research_guest import _resolve_deadline, refresh_realtime, run_research, slugify
+from create_dossier import create_dossier, latest_dossier, refresh_freshness, regenerate_section, save_dossier
+from dossier_sections import SECTION_IDS
+from checkpoints import RUNS_DIR, RunCheckpoint, discard_empty_run, latest_incomplete_run, new_run_id, run_exists
+import cost_ledger
+import singleflight
+import tracing
+
+
+def run_pipeline(
+    guest_name: str,
+    context_hint: str = "",
+    refresh: bool = False,
+    run_id: Optional[str] = None,
+    on_chunk=None,
+    on_stage=None,
+    deadline=None,
+) -> Path:
+    """
+    Führt die komplette Pipeline aus: Research → Dossier. refresh=True umgeht den Research-Cache.
+
+    run_id: Lauf-ID für die Checkpoints. Bei einer bestehenden ID werden bereits
+        abgeschlossene Stufen übernommen (Fortsetzen); ohne ID wird ein neuer Lauf angelegt.
+    on_chunk: Streaming-Callback für create_dossier.
+    on_stage(stage, path): wird nach jeder abgeschlossenen Stufe ("research", "dossier") aufgerufen.
+    deadline: Zeitbudget des Research in Sekunden (Default: Env RESEARCH_DEADLINE, aus).
+
+    Wirft cost_ledger.BudgetExceededError, wenn ein Budget ausgeschöpft ist (BUDGET_POLICY=refuse),
+    und singleflight.WaitTimeoutError, wenn ein identischer Lauf zu lange blockiert.
+    """
+    economy = cost_ledger.check_budget(slugify(guest_name))
+    requested_run_id = run_id or new_run_id(guest_name)
+
+    # Single-Flight: Läuft derselbe Gast bereits, auf diesen Lauf warten und seine
+    # Checkpoints übernehmen (fehlende Stufen werden dann hier fortgesetzt). Der Lock
+    # kommt vor dem ersten Checkpoint, damit kein leerer Lauf zurückbleibt.
+    flight_key = singleflight.identity_key(guest_name, context_hint)
+    run_id = requested_run_id
+    while True:
+        owner = singleflight.acquire(flight_key, run_id)
+        if owner is None:
+            break
+        print(f"🔗 Identischer Lauf aktiv ({owner['run_id']}) – warte auf dessen Ergebnis...")
+        singleflight.wait_or_fail(flight_key)
+        # Nur echte Läufe übernehmen (ein Freshness-Refresh hält den Lock ohne Checkpoints)
+        if run_exists(owner["run_id"]):
+            run_id = owner["run_id"]
+    if run_id != requested_run_id:
+        discard_empty_run(requested_run_id)
+
+    try:
+        checkpoint = RunCheckpoint(run_id, guest_name, context_hint)
+        if not checkpoint.has("disambiguation"):
+            checkpoint.save_json("disambiguation", {"guest": guest_name, "context_hint": context_hint})
+        with cost_ledger.run_context(slugify(guest_name), checkpoint.run_id, economy), \
+                tracing.span("pipeline", guest=slugify(guest_name), run_id=checkpoint.run_id):
+            return _run_stages(guest_name, context_hint, refresh, checkpoint, on_chunk, on_stage, deadline)
+    finally:
+        singleflight.release(flight_key, run_id)
+
+
+def run_freshness(guest_name: str, context_hint: str = "") -> Path:
+    """
+    Freshness-Refresh eines bestehenden Dossiers: nur Tavily neu abfragen (immer am Cache
+    vorbei), den Echtzeit-Teil im Research austauschen und Abschnitt 7 + Vibe-Zeile neu schreiben.
+    """
+    economy = cost_ledger.check_budget(slugify(guest_name))
 
+    # Den Lock für die ganze Aktualisierung halten – kein vollständiger Lauf desselben Gastes
+    # schreibt währenddessen in Research und Dossier (und umgekehrt)
+    flight_key = singleflight.identity_key(guest_name, context_hint)
+    lock_id = f"freshness_{new_run_id(guest_name)}"
+    while (owner := singleflight.acquire(flight_key, lock_id)) is not None:
+        print(f"🔗 Lauf für diesen Gast aktiv ({owner['run_id']}) – warte auf dessen Ende...")
+        singleflight.wait_or_fail(flight_key)
+
+    start = time.time()
+    try:
+        with cost_ledger.run_context(slugify(guest_name), "freshness", economy):
+            research_path = refresh_realtime(guest_name, context_hint)
+            dossier_path = refresh_freshness(guest_name, research_path, context_hint=context_hint)
+    finally:
+        singleflight.release(flight_key, lock_id)
+    print(f"\n⏱ Freshness-Refresh in {time.time() - start:.0f} Sekunden: {dossier_path}")
+    return dossier_path
+
+
+def _run_stages(
+    guest_name: str, context_hint: str, refresh: bool, checkpoint: RunCheckpoint, on_chunk, on_stage, deadline=None
+) -> Path:
+    """Research- und Dossier-Stufe eines Laufs (bereits gecheckpointete Stufen werden übernommen)."""
 
-def run_pipeline(guest_name: str) -> Path:
-    """Führt die komplette Pipeline aus: Research → Dossier."""
     print("=" * 60)
     print(f"  GÄSTEDOSSIER-PIPELINE: {guest_name}")
+    print(f"  Lauf: {checkpoint.run_id}")
     print("=" * 60)
     start = time.time()
 
     # Schritt 1: Research
     print("\n📋 SCHRITT 1/2: Deep Research")
     print("-" * 40)
-    research_path = run_research(guest_name)
+    with tracing.span("stage", stage="research"):
+        research_path = run_research(guest_name, context_hint, refresh=refresh, checkpoint=checkpoint, deadline=deadline)
+    if on_stage:
+        on_stage("research", research_path)
 
     # Schritt 2: Dossier erstellen
     print(f"\n📋 SCHRITT 2/2: Dossier erstellen")
     print("-" * 40)
-    dossier_path = create_dossier(guest_name, research_path)
+    with tracing.span("stage", stage="dossier"):
+        if checkpoint.has("dossier"):
+            print("  ↻ Dossier aus Checkpoint")
+            dossier_path = save_dossier(guest_name, checkpoint.load("dossier"), context_hint)
+        else:
+            dossier_path = create_dossier(guest_name, research_path, on_chunk=on_chunk, context_hint=context_hint)
+            checkpoint.save("dossier", dossier_path.read_text(encoding="utf-8"))
+    if on_stage:
+        on_stage("dossier", dossier_path)
 
     elapsed = time.time() - start
     print("\n" + "=" * 60)
@@ -46,10 +161,80 @@ def run_pipeline(guest_name: str) -> Path:
 
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python tools/run_pipeline.py \"Gastname\"")
-        print("Beispiel: python tools/run_pipeline.py \"Udo Lindenberg\"")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(
+        description="Gästedossier-Pipeline",
+        epilog='Beispiel: python tools/run_pipeline.py "Udo Lindenberg"',
+    )
+    parser.add_argument("guest", help="Name des Gastes")
+    parser.add_argument("--context", default="", help="Identifikations-Hinweis (z.B. Beruf, Werk, Ort)")
+    parser.add_argument("--refresh", action="store_true", help="Research-Cache ignorieren und frisch recherchieren")
+    parser.add_argument("--freshness", action="store_true", help="Nur Echtzeit-Check und Freshness-Abschnitt eines bestehenden Dossiers erneuern")
+    parser.add_argument("--section", choices=SECTION_IDS, help="Nur diesen Abschnitt des jüngsten Dossiers neu schreiben")
+    parser.add_argument("--note", default="", help="Hinweis der Redaktion für --section")
+    parser.add_argument(
+        "--deadline",
+        metavar="SEKUNDEN",
+        help="Zeitbudget für den Research; danach weiter mit den fertigen Providern, 'off' = ohne (Default: RESEARCH_DEADLINE)",
+    )
+    parser.add_argument(
+        "--resume",
+        nargs="?",
+        const="latest",
+        metavar="RUN_ID",
+        help="Abgebrochenen Lauf fortsetzen (ohne ID: jüngster unvollständiger Lauf des Gastes)",
+    )
+    args = parser.parse_args()
 
-    guest = sys.argv[1]
-    run_pipeline(guest)
+    # Zeitbudget (Argument bzw. RESEARCH_DEADLINE) vor dem Start prüfen statt mitten im Lauf
+    try:
+        _resolve_deadline(args.deadline)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.freshness:
+        try:
+            run_freshness(args.guest, args.context)
+        except (FileNotFoundError, cost_ledger.BudgetExceededError, singleflight.WaitTimeoutError) as e:
+            print(f"Fehler: {e}")
+            sys.exit(1)
+        except KeyError as e:
+            # Ältere Dossiers ohne Abschnitts-Anker (freshness-check, cheat-sheet)
+            print(f"Fehler: {e.args[0]} – Dossier bitte komplett neu erstellen.")
+            sys.exit(1)
+        sys.exit(0)
+
+    if args.section:
+        dossier = latest_dossier(args.guest, args.context)
+        if dossier is None:
+            print(f"Fehler: Kein Dossier für '{args.guest}' vorhanden.")
+            sys.exit(1)
+        try:
+            regenerate_section(args.guest, dossier, args.section, instructions=args.note, context_hint=args.context)
+        except (FileNotFoundError, KeyError) as e:
+            # KeyError: ältere Dossiers ohne Abschnitts-Anker
+            print(f"Fehler: {e.args[0] if isinstance(e, KeyError) else e} – Dossier bitte komplett neu erstellen.")
+            sys.exit(1)
+        sys.exit(0)
+
+    run_id = None
+    context_hint = args.context
+    if args.resume:
+        if args.resume == "latest":
+            run = latest_incomplete_run(args.guest)
+        elif (RUNS_DIR / args.resume / "run.json").exists():
+            run = RunCheckpoint(args.resume)
+        else:
+            print(f"Fehler: Lauf nicht gefunden: {args.resume}")
+            sys.exit(1)
+        if run is None:
+            print(f"Kein unvollständiger Lauf für '{args.guest}' gefunden – starte neu.")
+        else:
+            print(f"↻ Setze Lauf fort: {run.run_id} (fertig: {', '.join(run.completed_stages()) or '—'})")
+            run_id = run.run_id
+            context_hint = context_hint or run.context_hint
+
+    try:
+        run_pipeline(args.guest, context_hint, refresh=args.refresh, run_id=run_id, deadline=args.deadline)
+    except (cost_ledger.BudgetExceededError, singleflight.WaitTimeoutError) as e:
+        print(f"Fehler: {e}")
+        sys.exit(1)
@@ -0,0 +1,224 @@
+"""
+Single-Flight für Pipeline-Läufe.
+Pro Gast-Identität (Name + context_hint) darf nur ein Lauf gleichzeitig arbeiten – im
+Prozess und prozessübergreifend über eine Lock-Datei in .tmp/locks/. Wer denselben Gast
+anfragt, während ein Lauf aktiv ist, hängt sich an diesen Lauf an, statt Research und
+Dossier doppelt zu bezahlen (und dieselben Dateien zu überschreiben).
+
+Die Lock-Datei enthält run_id, pid und ein Prozess-Token (PROCESS_TOKEN) des Besitzers. Ein
+Lock gilt als verwaist und wird übernommen, wenn der Prozess nicht mehr läuft, das Token nicht
+passt (dieselbe PID nach einem Container-Neustart) oder der Heartbeat länger als
+SINGLEFLIGHT_MAX_AGE Sekunden (Default 120) ausbleibt – der Besitzer frischt die mtime seiner
+Locks regelmäßig auf. Prüfen und Übernehmen laufen unter einem flock auf {key}.guard, zwei
+Prozesse können einen verwaisten Lock also nicht gleichzeitig übernehmen. Wartende geben nach
+SINGLEFLIGHT_WAIT Sekunden (Default 1800) auf.
+"""
+
+import asyncio
+import fcntl
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from guest_registry import hint_hash, normalize_name
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+LOCKS_DIR = PROJECT_ROOT / ".tmp" / "locks"
+
+# Kennung dieses Prozesses – unterscheidet ihn von einem früheren Prozess mit derselben PID
+PROCESS_TOKEN = uuid.uuid4().hex
+
+# Dateien, deren mtime der Heartbeat-Thread auffrischt (Locks und Job-Zustände dieses Prozesses)
+_kept_alive: set[Path] = set()
+_heartbeat_lock = threading.Lock()
+_heartbeat_thread: Optional[threading.Thread] = None
+
+
+class WaitTimeoutError(TimeoutError):
+    """Ein identischer Lauf blockiert länger als SINGLEFLIGHT_WAIT Sekunden."""
+
+    def __init__(self, key: str, owner: Optional[dict], timeout: float):
+        self.key = key
+        self.owner = owner
+        run_id = owner["run_id"] if owner else "?"
+        super().__init__(f"Identischer Lauf {run_id} nach {timeout:g}s nicht beendet – Lock {key} prüfen oder entfernen")
+
+
+def max_age() -> float:
+    """Sekunden ohne Heartbeat, nach denen ein Lock als verwaist gilt."""
+    return float(os.getenv("SINGLEFLIGHT_MAX_AGE", "120"))
+
+
+def wait_timeout() -> float:
+    """Maximale Wartezeit auf einen identischen Lauf."""
+    return float(os.getenv("SINGLEFLIGHT_WAIT", "1800"))
+
+
+def identity_key(guest_name: str, context_hint: str = "") -> str:
+    """Schlüssel einer Gast-Identität (normalisierter Name + Hash des Hinweises)."""
+    name = normalize_name(guest_name).replace(" ", "_")
+    return f"{name}_{hint_hash(context_hint)}"
+
+
+def _lock_path(key: str) -> Path:
+    return LOCKS_DIR / f"{key}.lock"
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def is_alive(pid: int, token: Optional[str], last_seen: float) -> bool:
+    """
+    True, wenn der Prozess (pid + token) noch arbeitet. Im eigenen Prozess entscheidet das
+    Token, bei fremden Prozessen zusätzlich der Heartbeat (last_seen: mtime der Datei).
+    """
+    if pid == os.getpid():
+        return token == PROCESS_TOKEN
+    return _pid_alive(pid) and time.time() - last_seen < max_age()
+
+
+def _heartbeat() -> None:
+    while True:
+        time.sleep(max(0.05, max_age() / 4))
+        with _heartbeat_lock:
+            paths = list(_kept_alive)
+        for path in paths:
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                pass
+
+
+def keep_alive(path: Path) -> None:
+    """Frischt die mtime von path regelmäßig auf, bis forget(path) aufgerufen wird."""
+    global _heartbeat_thread
+    with _heartbeat_lock:
+        _kept_alive.add(path)
+        if _heartbeat_thread is None:
+            _heartbeat_thread = threading.Thread(target=_heartbeat, name="singleflight-heartbeat", daemon=True)
+            _heartbeat_thread.start()
+
+
+def forget(path: Path) -> None:
+    with _heartbeat_lock:
+        _kept_alive.discard(path)
+
+
+def _read_owner(path: Path) -> Optional[dict]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _owner_alive(path: Path, info: dict) -> bool:
+    try:
+        last_seen = path.stat().st_mtime
+    except FileNotFoundError:
+        return False
+    return is_alive(info.get("pid", 0), info.get("token"), last_seen)
+
+
+def owner(key: str) -> Optional[dict]:
+    """Besitzer des Locks ({"run_id", "pid", "token", "started_at"}), falls ein Lauf aktiv ist."""
+    path = _lock_path(key)
+    info = _read_owner(path)
+    if info is not None and _owner_alive(path, info):
+        return info
+    return None
+
+
+@contextmanager
+def _guard(key: str):
+    """
+    Exklusiver flock auf {key}.guard: Prüfen, Übernehmen und Freigeben eines Locks laufen
+    darunter atomar – sonst könnte ein Prozess den verwaisten Lock entfernen, nachdem ein
+    anderer ihn bereits durch einen neuen, gültigen ersetzt hat. Die Guard-Datei bleibt liegen.
+    """
+    LOCKS_DIR.mkdir(parents=True, exist_ok=True)
+    with open(LOCKS_DIR / f"{key}.guard", "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def acquire(key: str, run_id: str) -> Optional[dict]:
+    """
+    Versucht, den Lock für eine Identität zu übernehmen.
+    Gibt None zurück, wenn der Aufrufer jetzt Besitzer ist, sonst die Daten des aktiven Besitzers.
+    """
+    path = _lock_path(key)
+    info = {"run_id": run_id, "pid": os.getpid(), "token": PROCESS_TOKEN, "started_at": datetime.now().isoformat(timespec="seconds")}
+    with _guard(key):
+        current = _read_owner(path)
+        if current is not None and _owner_alive(path, current):
+            return current
+        # Frei oder verwaist (Prozess tot, fremdes Token, kein Heartbeat, beschädigt) → übernehmen.
+        # Atomar ersetzen, damit owner() ohne Guard nie eine halb geschriebene Datei liest.
+        tmp_path = path.with_name(f".{path.name}.{PROCESS_TOKEN}.{threading.get_ident()}.tmp")
+        tmp_path.write_text(json.dumps(info), encoding="utf-8")
+        os.replace(tmp_path, path)
+    keep_alive(path)
+    return None
+
+
+def release(key: str, run_id: str) -> None:
+    """Gibt den Lock frei (nur wenn er noch diesem Lauf gehört)."""
+    path = _lock_path(key)
+    with _guard(key):
+        current = _read_owner(path)
+        if current is not None and current.get("run_id") == run_id and current.get("token") == PROCESS_TOKEN:
+            forget(path)
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def wait(key: str, poll_seconds: float = 1.0, timeout: Optional[float] = None) -> bool:
+    """Wartet, bis kein aktiver Lauf mehr den Lock hält. False bei Timeout."""
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    while owner(key) is not None:
+        if deadline is not None and time.monotonic() > deadline:
+            return False
+        time.sleep(poll_seconds)
+    return True
+
+
+async def wait_async(key: str, poll_seconds: float = 1.0, timeout: Optional[float] = None) -> bool:
+    """Wie wait(), blockiert aber den Event-Loop nicht (für async_engine.py)."""
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    while await asyncio.to_thread(owner, key) is not None:
+        if deadline is not None and time.monotonic() > deadline:
+            return False
+        await asyncio.sleep(poll_seconds)
+    return True
+
+
+def wait_or_fail(key: str, timeout: Optional[float] = None) -> None:
+    """wait() mit begrenzter Wartezeit (Default SINGLEFLIGHT_WAIT); wirft WaitTimeoutError."""
+    timeout = wait_timeout() if timeout is None else timeout
+    if not wait(key, timeout=timeout):
+        raise WaitTimeoutError(key, owner(key), timeout)
+
+
+async def wait_or_fail_async(key: str, timeout: Optional[float] = None) -> None:
+    """Wie wait_or_fail(), für async_engine.py."""
+    timeout = wait_timeout() if timeout is None else timeout
+    if not await wait_async(key, timeout=timeout):
+        raise WaitTimeoutError(key, await asyncio.to_thread(owner, key), timeout)
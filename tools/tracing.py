@@ -0,0 +1,193 @@
+"""
+Strukturiertes Tracing der Pipeline.
+Spans (Name, Dauer, Eltern-Span, Attribute wie Gast-Slug, Provider, HTTP-Status, Tokens,
+Bytes) werden als JSON-Zeilen in eine lokale Datei geschrieben – eingeschaltet über
+TRACING=1, Ziel über TRACE_PATH (Default .tmp/traces.jsonl).
+
+Ist Tracing aus, liefert span() ein geteiltes No-op-Objekt: kein Zeitstempel, keine
+Allokation, kein I/O.
+
+    with tracing.span("provider", provider="Perplexity", guest=slug) as s:
+        ...
+        s.set(bytes=len(result))
+
+Usage:
+    python tools/tracing.py summary        # p50/p95/max pro Span-Name (und Provider)
+    python tools/tracing.py slow [N]       # die N langsamsten Spans
+"""
+
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_TRACE_PATH = PROJECT_ROOT / ".tmp" / "traces.jsonl"
+
+_current: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+_write_lock = threading.Lock()
+
+
+def is_enabled() -> bool:
+    return os.getenv("TRACING", "0") not in ("", "0")
+
+
+def trace_path() -> Path:
+    return Path(os.getenv("TRACE_PATH", str(DEFAULT_TRACE_PATH)))
+
+
+class Span:
+    """Ein laufender Span; wird beim Verlassen des with-Blocks geschrieben."""
+
+    def __init__(self, name: str, attributes: dict):
+        parent = _current.get()
+        self.name = name
+        self.attributes = attributes
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex
+        self.start = time.time()
+        self._start = time.perf_counter()
+        self._token = None
+
+    def set(self, **attributes) -> None:
+        """Setzt bzw. überschreibt Attribute."""
+        self.attributes.update(attributes)
+
+    def elapsed_ms(self) -> float:
+        """Millisekunden seit Span-Beginn (z.B. für Time-to-first-Token)."""
+        return (time.perf_counter() - self._start) * 1000
+
+    def __enter__(self):
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current.reset(self._token)
+        record = {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": datetime.fromtimestamp(self.start).isoformat(timespec="milliseconds"),
+            "duration_ms": round(self.elapsed_ms(), 2),
+            "status": "error" if exc_type else "ok",
+            "thread": threading.current_thread().name,
+            **self.attributes,
+        }
+        if exc_type:
+            record["error"] = f"{exc_type.__name__}: {exc}"
+        _write(record)
+        return False
+
+
+class _NoopSpan:
+    """Platzhalter bei abgeschaltetem Tracing."""
+
+    def set(self, **attributes) -> None:
+        pass
+
+    def elapsed_ms(self) -> float:
+        return 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+def _write(record: dict) -> None:
+    path = trace_path()
+    line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+    with _write_lock:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("a", encoding="utf-8") as f:
+            f.write(line)
+
+
+def span(name: str, **attributes):
+    """Neuer Span als Kontextmanager (No-op, wenn TRACING aus ist)."""
+    if not is_enabled():
+        return _NOOP
+    return Span(name, attributes)
+
+
+def annotate(**attributes) -> None:
+    """Setzt Attribute am aktuell laufenden Span (z.B. HTTP-Status tief in einem Provider-Call)."""
+    current = _current.get()
+    if current is not None:
+        current.set(**attributes)
+
+
+def increment(attribute: str, by: int = 1) -> None:
+    """Zählt ein Attribut am aktuell laufenden Span hoch (z.B. Wiederholungen eines Provider-Calls)."""
+    current = _current.get()
+    if current is not None:
+        current.set(**{attribute: current.attributes.get(attribute, 0) + by})
+
+
+def bind(fn):
+    """
+    Bindet fn an den aktuellen Kontext, damit Spans in Worker-Threads
+    (ThreadPoolExecutor.submit) ihren Eltern-Span und Calls ihren Lauf-Kontext
+    im Kosten-Ledger (cost_ledger.run_context) behalten.
+    """
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(fn, *args, **kwargs)
+
+
+def load_spans(path: Optional[Path] = None) -> list[dict]:
+    path = path or trace_path()
+    if not path.exists():
+        return []
+    spans = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        try:
+            spans.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue
+    return spans
+
+
+def summary(spans: list[dict]) -> dict[str, dict]:
+    """Anzahl, p50, p95 und Maximum der Dauer pro Span-Name (Provider-Spans pro Provider)."""
+    groups: dict[str, list[float]] = {}
+    for entry in spans:
+        key = entry["name"] + (f" [{entry['provider']}]" if entry.get("provider") else "")
+        groups.setdefault(key, []).append(entry["duration_ms"])
+    result = {}
+    for key, durations in sorted(groups.items()):
+        durations.sort()
+        result[key] = {
+            "count": len(durations),
+            "p50_ms": durations[int(0.5 * (len(durations) - 1))],
+            "p95_ms": durations[int(0.95 * (len(durations) - 1))],
+            "max_ms": durations[-1],
+        }
+    return result
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "summary"
+    spans = load_spans()
+    if command == "summary":
+        for key, stats in summary(spans).items():
+            print(f"{key:40} {stats['count']:5}×  p50 {stats['p50_ms']:9.0f} ms  p95 {stats['p95_ms']:9.0f} ms  max {stats['max_ms']:9.0f} ms")
+    elif command == "slow":
+        limit = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+        for entry in sorted(spans, key=lambda s: s["duration_ms"], reverse=True)[:limit]:
+            extra = {k: v for k, v in entry.items() if k not in ("trace_id", "span_id", "parent_id", "name", "start", "duration_ms", "thread")}
+            print(f"{entry['duration_ms']:9.0f} ms  {entry['start']}  {entry['name']}  {json.dumps(extra, ensure_ascii=False)}")
+    else:
+        print("Usage: python tools/tracing.py [summary|slow [N]]")
+        sys.exit(1)
@@ -0,0 +1,513 @@
+"""
+Austauschbare Transportschicht für alle Provider-Calls (Record/Replay).
+Die Clients aus clients.py werden je nach PROVIDER_TRANSPORT umhüllt:
+
+    live     Standard: echte API-Calls, keine Aufzeichnung
+    record   echte API-Calls, jede Antwort wird als Fixture gespeichert – bei
+             messages.stream inklusive Zeitstempel jedes Streaming-Chunks
+    replay   keine Netzwerkzugriffe und keine API-Keys nötig: Antworten kommen aus den
+             Fixtures, mit der aufgezeichneten Latenz × REPLAY_LATENCY_SCALE (0 = sofort)
+    simulate wie replay, aber die Antworten erzeugt ein registrierter Simulator
+             (set_simulator) – z.B. mit Latenzverteilungen und Fehlerraten (benchmark.py)
+
+Fixtures liegen als JSON unter PROVIDER_FIXTURES_DIR (Default .tmp/fixtures/). Der Schlüssel
+ist ein Hash aus Provider, Operation und Request; Datums- und Uhrzeitangaben im Request
+werden dabei maskiert, damit eine Aufnahme auch an späteren Tagen wieder passt.
+
+Async-Clients (async_engine.py) laufen über dieselben Modi: wrap(..., is_async=True).
+
+Jeder echte Call (live/record) landet mit Tokens, Latenz und Kosten im Kosten-Ledger
+(cost_ledger.py); Replay und Simulation kosten nichts und werden nicht verbucht.
+
+Usage:
+    PROVIDER_TRANSPORT=record python tools/run_pipeline.py "Gastname"
+    PROVIDER_TRANSPORT=replay REPLAY_LATENCY_SCALE=0 python tools/run_pipeline.py "Gastname"
+    python tools/transport.py list
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import cost_ledger
+import tracing
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+FIXTURES_DIR = Path(os.getenv("PROVIDER_FIXTURES_DIR", str(PROJECT_ROOT / ".tmp" / "fixtures")))
+
+MODES = ("live", "record", "replay", "simulate")
+
+# Aufgezeichnete Operationen pro Provider (Attributpfad am Client)
+OPERATIONS = {
+    "anthropic": {"messages.create", "messages.stream"},
+    "openai": {"responses.create"},
+    "tavily": {"search"},
+    "perplexity": {"post"},
+}
+
+# Request-Parameter, die das Ergebnis nicht beeinflussen und nicht in den Schlüssel gehören
+_IGNORED_KWARGS = {"timeout"}
+
+_DATE_PATTERNS = [
+    re.compile(r"\b\d{1,2}\.\d{1,2}\.\d{4}\b"),
+    re.compile(r"\b\d{4}-\d{2}-\d{2}\b"),
+    re.compile(r"\b\d{1,2}:\d{2}\b"),
+]
+
+
+class FixtureNotFoundError(LookupError):
+    """Im Replay-Modus existiert für einen Request keine Aufnahme."""
+
+
+def mode() -> str:
+    """Aktueller Transport-Modus (Env PROVIDER_TRANSPORT)."""
+    value = os.getenv("PROVIDER_TRANSPORT", "live").lower()
+    if value not in MODES:
+        raise ValueError(f"PROVIDER_TRANSPORT muss live, record, replay oder simulate sein, nicht '{value}'")
+    return value
+
+
+def is_offline() -> bool:
+    """True, wenn keine echten Provider-Calls stattfinden (replay/simulate)."""
+    return mode() in ("replay", "simulate")
+
+
+_simulator = None
+
+
+def set_simulator(simulator) -> None:
+    """
+    Registriert den Antwort-Erzeuger für den Modus "simulate".
+    simulator(provider, operation, args, kwargs) liefert ein Dict im Fixture-Format
+    ({"latency", "response"} bzw. {"chunks", "response"} für messages.stream) oder wirft
+    eine Exception, um einen Provider-Fehler zu simulieren.
+    """
+    global _simulator
+    _simulator = simulator
+
+
+def latency_scale() -> float:
+    return float(os.getenv("REPLAY_LATENCY_SCALE", "1.0"))
+
+
+def mask_dates(text: str) -> str:
+    """Ersetzt Datums- und Uhrzeitangaben durch Platzhalter (für stabile Fixture-Schlüssel)."""
+    for pattern in _DATE_PATTERNS:
+        text = pattern.sub("<DATE>", text)
+    return text
+
+
+def request_key(provider: str, operation: str, args: tuple, kwargs: dict) -> str:
+    """Schlüssel einer Anfrage: Hash aus Provider, Operation und maskiertem Request."""
+    request = {
+        "args": list(args),
+        "kwargs": {k: v for k, v in kwargs.items() if k not in _IGNORED_KWARGS},
+    }
+    canonical = mask_dates(json.dumps(request, sort_keys=True, ensure_ascii=False, default=str))
+    return hashlib.sha256(f"{provider}\x1f{operation}\x1f{canonical}".encode("utf-8")).hexdigest()
+
+
+def _fixture_path(provider: str, operation: str, key: str) -> Path:
+    return FIXTURES_DIR / f"{provider}_{operation.replace('.', '_')}_{key[:20]}.json"
+
+
+def _write_fixture(path: Path, data: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{threading.get_ident()}.tmp")
+    tmp_path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def _load_fixture(provider: str, operation: str, args: tuple, kwargs: dict) -> dict:
+    path = _fixture_path(provider, operation, request_key(provider, operation, args, kwargs))
+    if not path.exists():
+        raise FixtureNotFoundError(f"Keine Aufnahme für {provider} {operation} ({path.name}) – zuerst mit PROVIDER_TRANSPORT=record laufen lassen")
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+# --- Serialisierung ---
+
+def _to_data(value):
+    """SDK-Objekte (pydantic), requests-Responses und Dicts in JSON-taugliche Daten umwandeln."""
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    if hasattr(value, "status_code") and hasattr(value, "headers"):
+        try:
+            body = value.json()
+        except ValueError:
+            body = None
+        return {
+            "status_code": value.status_code,
+            "headers": dict(value.headers),
+            "json": body,
+            "text": value.text if body is None else None,
+        }
+    return value
+
+
+def _to_object(data):
+    """Gespeicherte Daten als Objekt mit Attributzugriff (wie die SDK-Antworten)."""
+    if isinstance(data, dict):
+        return SimpleNamespace(**{k: _to_object(v) for k, v in data.items()})
+    if isinstance(data, list):
+        return [_to_object(v) for v in data]
+    return data
+
+
+class ReplayHTTPResponse:
+    """Nachbau einer requests.Response für aufgezeichnete Perplexity-Calls."""
+
+    def __init__(self, data: dict):
+        self.status_code = data["status_code"]
+        self.headers = data.get("headers") or {}
+        self._json = data.get("json")
+        self.text = data.get("text") or json.dumps(self._json, ensure_ascii=False)
+
+    def json(self):
+        if self._json is None:
+            raise ValueError("Antwort enthält kein JSON")
+        return self._json
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            import requests
+
+            raise requests.HTTPError(f"{self.status_code} Error (Replay)", response=self)
+
+
+def _replay_response(provider: str, data):
+    if provider == "perplexity":
+        return ReplayHTTPResponse(data)
+    if provider == "tavily":
+        return data
+    return _to_object(data)
+
+
+# --- Streaming (anthropic messages.stream) ---
+
+class _LiveStream:
+    """
+    Umhüllt den MessageStream des SDK: verbucht den Call am Ende im Kosten-Ledger und
+    protokolliert im Record-Modus (path gesetzt) die Chunks mit Zeitversatz als Fixture.
+    """
+
+    def __init__(self, manager, request: dict, kwargs: dict, path: Path = None):
+        self._manager = manager
+        self._path = path
+        self._request = request
+        self._kwargs = kwargs
+        self._chunks: list[tuple[float, str]] = []
+        self._final = None
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        self._stream = self._manager.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        result = self._manager.__exit__(exc_type, exc, tb)
+        if exc_type is None and self._final is None:
+            self._final = self._stream.get_final_message()
+        self._finish(exc_type, time.perf_counter() - self._start)
+        return result
+
+    def _finish(self, exc_type, latency: float) -> None:
+        cost_ledger.record_call(self._request["provider"], self._request["operation"], self._kwargs, self._final, latency, ok=exc_type is None)
+        if exc_type is None and self._path is not None:
+            _write_fixture(self._path, {
+                **self._request,
+                "latency": round(latency, 4),
+                "chunks": [[round(offset, 4), text] for offset, text in self._chunks],
+                "response": _to_data(self._final),
+            })
+
+    @property
+    def text_stream(self):
+        for text in self._stream.text_stream:
+            if self._path is not None:
+                self._chunks.append((time.perf_counter() - self._start, text))
+            yield text
+
+    def get_final_message(self):
+        self._final = self._stream.get_final_message()
+        return self._final
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+class _ReplayStream:
+    """Spielt eine aufgezeichnete Streaming-Antwort mit (skaliertem) Chunk-Timing ab."""
+
+    def __init__(self, fixture: dict, scale: float = 1.0):
+        self._fixture = fixture
+        self._scale = scale
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    @property
+    def text_stream(self):
+        start = time.perf_counter()
+        for offset, text in self._fixture["chunks"]:
+            delay = offset * self._scale - (time.perf_counter() - start)
+            if delay > 0:
+                time.sleep(delay)
+            yield text
+
+    def get_final_message(self):
+        return _to_object(self._fixture["response"])
+
+
+class _AsyncLiveStream(_LiveStream):
+    """Async-Gegenstück zu _LiveStream für AsyncAnthropic (async with / async for)."""
+
+    async def __aenter__(self):
+        self._start = time.perf_counter()
+        self._stream = await self._manager.__aenter__()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is None and self._final is None:
+            self._final = await self._stream.get_final_message()
+        result = await self._manager.__aexit__(exc_type, exc, tb)
+        await asyncio.to_thread(self._finish, exc_type, time.perf_counter() - self._start)
+        return result
+
+    @property
+    def text_stream(self):
+        return self._iter_text()
+
+    async def _iter_text(self):
+        async for text in self._stream.text_stream:
+            if self._path is not None:
+                self._chunks.append((time.perf_counter() - self._start, text))
+            yield text
+
+    async def get_final_message(self):
+        self._final = await self._stream.get_final_message()
+        return self._final
+
+
+class _AsyncReplayStream(_ReplayStream):
+    """Async-Gegenstück zu _ReplayStream (wartet mit asyncio.sleep statt time.sleep)."""
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+    @property
+    def text_stream(self):
+        return self._iter_text()
+
+    async def _iter_text(self):
+        start = time.perf_counter()
+        for offset, text in self._fixture["chunks"]:
+            delay = offset * self._scale - (time.perf_counter() - start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            yield text
+
+    async def get_final_message(self):
+        return _to_object(self._fixture["response"])
+
+
+# --- Client-Proxies ---
+
+def _error_status(error: Exception):
+    """HTTP-Status einer Provider-Exception (SDK-Fehler oder HTTPError), sonst None."""
+    return getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+
+
+def _response_attributes(provider: str, response) -> dict:
+    """Trace-Attribute einer Antwort: HTTP-Status, Bytes, Tokens, Trefferzahl."""
+    if provider == "perplexity":
+        return {"http_status": response.status_code, "bytes": len(response.text or "")}
+    if provider == "tavily":
+        return {"results": len(response.get("results", []))}
+    usage = getattr(response, "usage", None)
+    return {
+        "input_tokens": getattr(usage, "input_tokens", None),
+        "output_tokens": getattr(usage, "output_tokens", None),
+    }
+
+
+class _ProviderProxy:
+    """
+    Proxy um einen Provider-Client. Aufgezeichnete Operationen (OPERATIONS) werden je nach
+    Modus mitgeschnitten, aus Fixtures bedient oder (live) durchgereicht und im Kosten-Ledger
+    verbucht; bei aktivem Tracing erzeugt jeder Call einen "provider_call"-Span.
+    Alles andere geht an den echten Client. Mit is_async sind die Operationen Coroutinen
+    (messages.stream liefert einen Async-Kontextmanager).
+    """
+
+    def __init__(self, provider: str, target, replay: bool, record: bool = False, path: tuple = (), is_async: bool = False):
+        self._provider = provider
+        self._target = target
+        self._replay = replay
+        self._record = record
+        self._path = path
+        self._async = is_async
+
+    def __getattr__(self, name):
+        path = self._path + (name,)
+        dotted = ".".join(path)
+        operations = OPERATIONS[self._provider]
+        if dotted in operations:
+            return self._operation(dotted)
+        if any(op.startswith(dotted + ".") for op in operations):
+            target = None if self._target is None else getattr(self._target, name)
+            return _ProviderProxy(self._provider, target, self._replay, self._record, path, self._async)
+        if self._target is None:
+            raise AttributeError(f"{name} ist im Replay-Modus nicht verfügbar")
+        return getattr(self._target, name)
+
+    def _replayed(self, operation: str, args: tuple, kwargs: dict) -> tuple[dict, float]:
+        """Fixture bzw. simulierte Antwort und Latenz-Faktor für Replay/Simulation."""
+        if mode() == "simulate":
+            if _simulator is None:
+                raise RuntimeError("PROVIDER_TRANSPORT=simulate ohne registrierten Simulator (transport.set_simulator)")
+            return _simulator(self._provider, operation, args, kwargs), 1.0
+        return _load_fixture(self._provider, operation, args, kwargs), latency_scale()
+
+    def _stream(self, operation: str, args: tuple, kwargs: dict):
+        """messages.stream: Kontextmanager für Replay/Simulation bzw. den echten Stream."""
+        if self._replay:
+            fixture, scale = self._replayed(operation, args, kwargs)
+            return (_AsyncReplayStream if self._async else _ReplayStream)(fixture, scale=scale)
+        real = getattr(self._target, operation.rsplit(".", 1)[-1])
+        path = _fixture_path(self._provider, operation, request_key(self._provider, operation, args, kwargs)) if self._record else None
+        request = {"provider": self._provider, "operation": operation}
+        return (_AsyncLiveStream if self._async else _LiveStream)(real(*args, **kwargs), request, kwargs, path)
+
+    def _finish(self, operation: str, args: tuple, kwargs: dict, response, latency: float) -> None:
+        """Verbucht einen echten Call im Kosten-Ledger und zeichnet ihn im Record-Modus auf."""
+        cost_ledger.record_call(self._provider, operation, kwargs, response, latency)
+        if self._record:
+            _write_fixture(_fixture_path(self._provider, operation, request_key(self._provider, operation, args, kwargs)), {
+                "provider": self._provider,
+                "operation": operation,
+                "latency": round(latency, 4),
+                "response": _to_data(response),
+            })
+
+    def _dispatch(self, operation: str, args: tuple, kwargs: dict):
+        if self._replay:
+            fixture, scale = self._replayed(operation, args, kwargs)
+            delay = fixture.get("latency", 0) * scale
+            if delay > 0:
+                time.sleep(delay)
+            return _replay_response(self._provider, fixture["response"])
+
+        real = getattr(self._target, operation.rsplit(".", 1)[-1])
+        start = time.perf_counter()
+        try:
+            response = real(*args, **kwargs)
+        except Exception:
+            cost_ledger.record_call(self._provider, operation, kwargs, None, time.perf_counter() - start, ok=False)
+            raise
+        self._finish(operation, args, kwargs, response, time.perf_counter() - start)
+        return response
+
+    async def _dispatch_async(self, operation: str, args: tuple, kwargs: dict):
+        if self._replay:
+            fixture, scale = self._replayed(operation, args, kwargs)
+            delay = fixture.get("latency", 0) * scale
+            if delay > 0:
+                await asyncio.sleep(delay)
+            return _replay_response(self._provider, fixture["response"])
+
+        real = getattr(self._target, operation.rsplit(".", 1)[-1])
+        start = time.perf_counter()
+        try:
+            response = await real(*args, **kwargs)
+        except Exception:
+            latency = time.perf_counter() - start
+            await asyncio.to_thread(cost_ledger.record_call, self._provider, operation, kwargs, None, latency, ok=False)
+            raise
+        # Ledger (SQLite) und Fixture im Worker-Thread – der Event-Loop bedient derweil andere Gäste
+        await asyncio.to_thread(self._finish, operation, args, kwargs, response, time.perf_counter() - start)
+        return response
+
+    def _operation(self, operation: str):
+        # Streams werden in create_dossier bzw. async_engine getraced (Time-to-first-Token, Gesamtdauer)
+        if operation == "messages.stream":
+            return lambda *args, **kwargs: self._stream(operation, args, kwargs)
+
+        def call(*args, **kwargs):
+            with tracing.span("provider_call", provider=self._provider, operation=operation, transport=mode()) as span:
+                try:
+                    response = self._dispatch(operation, args, kwargs)
+                except Exception as e:
+                    if _error_status(e):
+                        span.set(http_status=_error_status(e))
+                    raise
+                if tracing.is_enabled():
+                    span.set(**_response_attributes(self._provider, response))
+                return response
+
+        async def call_async(*args, **kwargs):
+            with tracing.span("provider_call", provider=self._provider, operation=operation, transport=mode()) as span:
+                try:
+                    response = await self._dispatch_async(operation, args, kwargs)
+                except Exception as e:
+                    if _error_status(e):
+                        span.set(http_status=_error_status(e))
+                    raise
+                if tracing.is_enabled():
+                    span.set(**_response_attributes(self._provider, response))
+                return response
+
+        return call_async if self._async else call
+
+
+def wrap(provider: str, client, is_async: bool = False):
+    """Umhüllt einen echten Client passend zum Modus (record: mit Aufzeichnung)."""
+    return _ProviderProxy(provider, client, replay=False, record=mode() == "record", is_async=is_async)
+
+
+def replay_client(provider: str, is_async: bool = False):
+    """Client-Ersatz für Replay und Simulation (ohne SDK, API-Key und Netzwerk)."""
+    return _ProviderProxy(provider, None, replay=True, is_async=is_async)
+
+
+def list_fixtures() -> list[dict]:
+    """Alle Aufnahmen mit Provider, Operation, Latenz und Anzahl Stream-Chunks."""
+    if not FIXTURES_DIR.exists():
+        return []
+    fixtures = []
+    for path in sorted(FIXTURES_DIR.glob("*.json")):
+        data = json.loads(path.read_text(encoding="utf-8"))
+        fixtures.append({
+            "file": path.name,
+            "provider": data.get("provider"),
+            "operation": data.get("operation"),
+            "latency": data.get("latency", 0),
+            "chunks": len(data.get("chunks", [])),
+        })
+    return fixtures
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "list"
+    if command == "list":
+        fixtures = list_fixtures()
+        for fixture in fixtures:
+            chunks = f", {fixture['chunks']} Chunks" if fixture["chunks"] else ""
+            print(f"{fixture['provider']:10} {fixture['operation']:16} {fixture['latency']:6.2f}s{chunks}  {fixture['file']}")
+        print(f"\n{len(fixtures)} Aufnahmen in {FIXTURES_DIR}")
+    else:
+        print("Usage: python tools/transport.py list")
+        sys.exit(1)